@@ -24,7 +24,7 @@ class AdvisorVerifier:
                 'firm_name': 'Kumar Investment Advisory',
                 'contact_email': 'rajesh@kumarinvestment.com',
                 'contact_phone': '+91-9876543210',
-                'specializations': '["Equity", "Mutual Funds", "Portfolio Management"]',
+                'specializations': ['Equity', 'Mutual Funds', 'Portfolio Management'],
                 'verification_score': 9.8
             },
             {
@@ -35,7 +35,7 @@ class AdvisorVerifier:
                 'firm_name': 'Patel Financial Services',
                 'contact_email': 'priya@patelfinancial.com',
                 'contact_phone': '+91-9876543211',
-                'specializations': '["Insurance", "Tax Planning", "Retirement Planning"]',
+                'specializations': ['Insurance', 'Tax Planning', 'Retirement Planning'],
                 'verification_score': 9.5
             },
             {
@@ -46,7 +46,7 @@ class AdvisorVerifier:
                 'firm_name': 'Singh Wealth Management',
                 'contact_email': 'amit@singhwealth.com',
                 'contact_phone': '+91-9876543212',
-                'specializations': '["Bonds", "Fixed Income", "Risk Assessment"]',
+                'specializations': ['Bonds', 'Fixed Income', 'Risk Assessment'],
                 'verification_score': 9.2
             },
             {
@@ -57,7 +57,7 @@ class AdvisorVerifier:
                 'firm_name': 'Gupta Investment Solutions',
                 'contact_email': 'sunita@guptainvestment.com',
                 'contact_phone': '+91-9876543213',
-                'specializations': '["Derivatives", "Options Trading"]',
+                'specializations': ['Derivatives', 'Options Trading'],
                 'verification_score': 3.2
             },
             {
@@ -68,7 +68,7 @@ class AdvisorVerifier:
                 'firm_name': 'Agarwal Capital',
                 'contact_email': 'vikash@agarwalcapital.com',
                 'contact_phone': '+91-9876543214',
-                'specializations': '["Forex", "Commodities"]',
+                'specializations': ['Forex', 'Commodities'],
                 'verification_score': 1.5
             }
         ]
@@ -0,0 +1,146 @@
+from models import AlertRollup, FraudAlert
+from app import db
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Risk score bounds of the dashboard's buckets; 'high' matches the high-risk counts
+HIGH_RISK_SCORE = 7.0
+MEDIUM_RISK_SCORE = 4.0
+
+
+def risk_bucket(risk_score):
+    if risk_score >= HIGH_RISK_SCORE:
+        return 'high'
+    if risk_score >= MEDIUM_RISK_SCORE:
+        return 'medium'
+    return 'low'
+
+
+def rollup_key(created_at, severity, status, risk_score):
+    return ((created_at or datetime.utcnow()).date(), severity, status or 'unknown', risk_bucket(risk_score))
+
+
+def apply_counts(connection, deltas):
+    """Add {rollup key: change in alert count} to alert_rollup in one upsert per key"""
+    deltas = [(key, change) for key, change in deltas.items() if change]
+    if not deltas:
+        return
+
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}[connection.dialect.name]
+    statement = dialect.insert(AlertRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=['day', 'severity', 'status', 'risk_bucket'],
+        set_={'alert_count': AlertRollup.alert_count + statement.excluded.alert_count}
+    )
+    connection.execute(statement, [
+        {'day': day, 'severity': severity, 'status': status, 'risk_bucket': bucket, 'alert_count': change}
+        for (day, severity, status, bucket), change in deltas
+    ])
+
+
+def count_alert_rows(connection, rows):
+    """
+    Roll up FraudAlert rows written with a Core INSERT (which the ORM events
+    below never see); call it in the same transaction as the insert. Rows
+    without created_at are counted under today.
+    """
+    deltas = {}
+    for row in rows:
+        key = rollup_key(row.get('created_at'), row['severity'], row.get('status', 'active'), row['risk_score'])
+        deltas[key] = deltas.get(key, 0) + 1
+    apply_counts(connection, deltas)
+
+
+@event.listens_for(FraudAlert, 'after_insert')
+def _alert_inserted(mapper, connection, alert):
+    apply_counts(connection, {rollup_key(alert.created_at, alert.severity, alert.status, alert.risk_score): 1})
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the old value before it is replaced, so after_update can move the count
+# out of the old bucket even when the attribute was expired
+for _attribute in (FraudAlert.created_at, FraudAlert.severity, FraudAlert.status, FraudAlert.risk_score):
+    event.listen(_attribute, 'set', _load_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(FraudAlert, 'after_update')
+def _alert_updated(mapper, connection, alert):
+    state = db.inspect(alert)
+    before = {}
+    changed = False
+    for name in ('created_at', 'severity', 'status', 'risk_score'):
+        history = state.attrs[name].history
+        if history.deleted:
+            before[name] = history.deleted[0]
+            changed = True
+        else:
+            before[name] = getattr(alert, name)
+    if not changed:
+        return
+
+    old_key = rollup_key(before['created_at'], before['severity'], before['status'], before['risk_score'])
+    new_key = rollup_key(alert.created_at, alert.severity, alert.status, alert.risk_score)
+    if old_key != new_key:
+        apply_counts(connection, {old_key: -1, new_key: 1})
+
+
+@event.listens_for(FraudAlert, 'after_delete')
+def _alert_deleted(mapper, connection, alert):
+    apply_counts(connection, {rollup_key(alert.created_at, alert.severity, alert.status, alert.risk_score): -1})
+
+
+def backfill(connection):
+    """Rebuild alert_rollup from FraudAlert with one INSERT ... SELECT"""
+    bucket = db.case(
+        (FraudAlert.risk_score >= HIGH_RISK_SCORE, 'high'),
+        (FraudAlert.risk_score >= MEDIUM_RISK_SCORE, 'medium'),
+        else_='low'
+    )
+    # Like rollup_key, count alerts without a created_at under today
+    day = db.func.coalesce(db.func.date(FraudAlert.created_at), db.func.current_date())
+    status = db.func.coalesce(FraudAlert.status, 'unknown')
+    counts = db.select(day, FraudAlert.severity, status, bucket, db.func.count()).group_by(
+        day, FraudAlert.severity, status, bucket
+    )
+
+    connection.execute(db.delete(AlertRollup))
+    connection.execute(db.insert(AlertRollup).from_select(
+        ['day', 'severity', 'status', 'risk_bucket', 'alert_count'], counts
+    ))
+
+
+def alert_totals():
+    """Alert counts for the dashboards: total, high risk, active and per risk bucket"""
+    rows = db.session.query(
+        AlertRollup.risk_bucket, AlertRollup.status, db.func.sum(AlertRollup.alert_count)
+    ).group_by(AlertRollup.risk_bucket, AlertRollup.status).all()
+
+    totals = {'total': 0, 'high_risk': 0, 'active': 0, 'risk_distribution': {'low': 0, 'medium': 0, 'high': 0}}
+    for bucket, status, count in rows:
+        count = int(count or 0)
+        totals['total'] += count
+        totals['risk_distribution'][bucket] += count
+        if bucket == 'high':
+            totals['high_risk'] += count
+        if status == 'active':
+            totals['active'] += count
+    return totals
+
+
+def daily_alert_counts(days=7, today=None):
+    """[{'date': 'YYYY-MM-DD', 'count': n}] for the last days days, oldest first"""
+    today = today or datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+    counts = dict(db.session.query(
+        AlertRollup.day, db.func.sum(AlertRollup.alert_count)
+    ).filter(AlertRollup.day >= first_day, AlertRollup.day <= today).group_by(AlertRollup.day).all())
+
+    daily = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        daily.append({'date': day.strftime('%Y-%m-%d'), 'count': int(counts.get(day, 0) or 0)})
+    return daily
@@ -0,0 +1,194 @@
+from models import AnalysisHistory
+from app import db
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+
+
+class AnalysisCache:
+    """
+    Two-tier result cache in front of FraudDetector.analyze_content.
+
+    Tier one is an in-process LRU bounded by entry count and serialized size.
+    Tier two looks the content hash up in AnalysisHistory, which the analyzer
+    already writes for every submission. Entries are keyed by content hash,
+    content type, language and the detector's ruleset version, so a ruleset
+    change makes every older entry unreachable and empties the LRU.
+    """
+
+    # Hashes per AnalysisHistory IN (...) query
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, detector, max_entries=10000, max_bytes=32 * 1024 * 1024):
+        self.detector = detector
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # key -> (result, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._ruleset_version = detector.ruleset_version
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def content_hash(content):
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def analyze(self, content, content_type='text', language='english'):
+        """
+        Return (analysis_result, content_hash, source) where source is 'memory',
+        'database' or 'analyzed'. The result is always a private copy.
+        """
+        content_hash = self.content_hash(content)
+        key = self._key(content_hash, content_type, language)
+
+        result = self._get(key)
+        if result is not None:
+            return result, content_hash, 'memory'
+
+        result = self._lookup_history([content_hash], content_type, language).get(content_hash)
+        if result is not None:
+            with self._lock:
+                self.db_hits += 1
+            self._put(key, result)
+            return self.detector.copy_result(result), content_hash, 'database'
+
+        with self._lock:
+            self.misses += 1
+        result = self.detector.analyze_content(content, content_type, language)
+        self._put(key, result)
+        return self.detector.copy_result(result), content_hash, 'analyzed'
+
+    def analyze_many(self, items):
+        """
+        Batch form of analyze() for dicts with 'content', 'content_type' and
+        'language'. LRU misses are resolved with one AnalysisHistory query per
+        content type and language, and the rest go through analyze_batch.
+        Returns a list of (analysis_result, content_hash, source) in input order.
+        """
+        output = [None] * len(items)
+        missing = {}  # (content_type, language) -> [(index, content_hash, key)]
+
+        for index, item in enumerate(items):
+            content_hash = self.content_hash(item['content'])
+            key = self._key(content_hash, item['content_type'], item['language'])
+            result = self._get(key)
+            if result is not None:
+                output[index] = (result, content_hash, 'memory')
+            else:
+                missing.setdefault((item['content_type'], item['language']), []).append((index, content_hash, key))
+
+        to_analyze = []
+        for (content_type, language), entries in missing.items():
+            stored = self._lookup_history([content_hash for _, content_hash, _ in entries], content_type, language)
+            for index, content_hash, key in entries:
+                result = stored.get(content_hash)
+                if result is None:
+                    to_analyze.append((index, content_hash, key))
+                    continue
+                with self._lock:
+                    self.db_hits += 1
+                self._put(key, result)
+                output[index] = (self.detector.copy_result(result), content_hash, 'database')
+
+        if to_analyze:
+            with self._lock:
+                self.misses += len(to_analyze)
+            results = self.detector.analyze_batch([items[index] for index, _, _ in to_analyze])
+            for (index, content_hash, key), result in zip(to_analyze, results):
+                self._put(key, result)
+                output[index] = (self.detector.copy_result(result), content_hash, 'analyzed')
+
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'ruleset_version': self._ruleset_version
+            }
+
+    def _key(self, content_hash, content_type, language):
+        ruleset_version = self.detector.ruleset_version
+        if ruleset_version != self._ruleset_version:
+            with self._lock:
+                if ruleset_version != self._ruleset_version:
+                    self._entries.clear()
+                    self._bytes = 0
+                    self._ruleset_version = ruleset_version
+                    self.invalidations += 1
+        return (content_hash, content_type, language, ruleset_version)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+        return self.detector.copy_result(entry[0])
+
+    def _put(self, key, result):
+        # A scan cut short by its time budget is not the content's real result
+        if result.get('time_budget_exceeded'):
+            return
+        size = len(json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key[3] != self._ruleset_version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (self.detector.copy_result(result), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _lookup_history(self, content_hashes, content_type, language):
+        """Latest stored result per hash, kept only if the current ruleset produced it"""
+        found = {}
+        for start in range(0, len(content_hashes), self.LOOKUP_CHUNK):
+            chunk = content_hashes[start:start + self.LOOKUP_CHUNK]
+            # Viral content has many history rows per hash; only read the newest
+            latest_ids = db.session.query(db.func.max(AnalysisHistory.id)).filter(
+                AnalysisHistory.content_hash.in_(chunk),
+                AnalysisHistory.analysis_type == content_type
+            ).group_by(AnalysisHistory.content_hash)
+
+            rows = db.session.query(
+                AnalysisHistory.content_hash, AnalysisHistory.analysis_result
+            ).filter(AnalysisHistory.id.in_(latest_ids)).all()
+
+            for content_hash, result in rows:
+                if not isinstance(result, dict):
+                    continue
+                # Rows written before results carried these fields never match
+                if (result.get('ruleset_version') == self._ruleset_version and result.get('language') == language
+                        and not result.get('time_budget_exceeded')):
+                    found[content_hash] = result
+        return found
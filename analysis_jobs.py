@@ -0,0 +1,155 @@
+from models import AnalysisJob
+from app import app, db
+from datetime import datetime, timedelta
+import logging
+import threading
+import uuid
+
+
+class AnalysisJobQueue:
+    """
+    Database-backed queue of analysis jobs drained by a pool of worker threads.
+
+    Jobs are AnalysisJob rows, so they survive restarts and any process sharing
+    the database can enqueue or report on them. Workers claim the oldest queued
+    row with a conditional UPDATE, which keeps two workers (or two processes)
+    from running the same job. The handler does the actual work inside an
+    application context and returns a JSON-serializable result.
+    """
+
+    def __init__(self, handler, workers=2, poll_interval=1.0, stale_after=600):
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        # Running jobs not finished after this many seconds are requeued on start
+        self.stale_after = stale_after
+
+        self._threads = []
+        self._wakeup = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._stopping = False
+
+    def enqueue(self, content, content_type='text', language='english', user_id=None):
+        """Store a queued job and return its id; starts the workers on first use"""
+        job = AnalysisJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            content=content,
+            content_type=content_type,
+            language=language
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job.id
+
+    def get(self, job_id, user_id=None):
+        """The job as a dict, or None if it does not exist or belongs to another user"""
+        job = db.session.get(AnalysisJob, job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return self.describe(job)
+
+    @staticmethod
+    def describe(job):
+        return {
+            'id': job.id,
+            'status': job.status,
+            'content_type': job.content_type,
+            'language': job.language,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'result': job.result,
+            'error': job.error
+        }
+
+    def stats(self):
+        counts = dict(db.session.query(AnalysisJob.status, db.func.count(AnalysisJob.id))
+                      .group_by(AnalysisJob.status).all())
+        return {
+            'workers': len(self._threads),
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0)
+        }
+
+    def start(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            with app.app_context():
+                self._requeue_stale()
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'analysis-job-{number}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Let the workers finish their current job and exit"""
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping = False
+
+    def _requeue_stale(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        db.session.query(AnalysisJob).filter(
+            AnalysisJob.status == 'running',
+            AnalysisJob.started_at < cutoff
+        ).update({'status': 'queued', 'started_at': None}, synchronize_session=False)
+        db.session.commit()
+
+    def _work(self):
+        while not self._stopping:
+            with app.app_context():
+                job = self._claim()
+                if job is not None:
+                    self._run(job)
+                    continue
+            # Nothing queued here; also poll for jobs enqueued by other processes
+            with self._wakeup:
+                if not self._stopping:
+                    self._wakeup.wait(self.poll_interval)
+
+    def _claim(self):
+        """Mark the oldest queued job running and return it, or None when the queue is empty"""
+        while True:
+            job_id = db.session.query(AnalysisJob.id).filter(
+                AnalysisJob.status == 'queued'
+            ).order_by(AnalysisJob.created_at, AnalysisJob.id).limit(1).scalar()
+            if job_id is None:
+                db.session.rollback()
+                return None
+
+            claimed = db.session.query(AnalysisJob).filter(
+                AnalysisJob.id == job_id,
+                AnalysisJob.status == 'queued'
+            ).update({'status': 'running', 'started_at': datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(AnalysisJob, job_id)
+
+    def _run(self, job):
+        try:
+            result = self.handler(job.content, job.content_type, job.language)
+        except Exception as e:
+            logging.exception(f"Analysis job {job.id} failed")
+            db.session.rollback()
+            job = db.session.get(AnalysisJob, job.id)
+            job.status = 'failed'
+            job.error = str(e)
+        else:
+            job.status = 'done'
+            job.result = result
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
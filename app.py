@@ -6,6 +6,7 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from flask_login import LoginManager
 from werkzeug.middleware.proxy_fix import ProxyFix
+from json_columns import compact_dumps
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -30,18 +31,23 @@ if database_url.startswith('postgresql'):
         "pool_pre_ping": True,
         "connect_args": {
             "client_encoding": "utf8"
-        }
+        },
+        "json_serializer": compact_dumps
     }
 else:
     # For SQLite
     database_url += "?charset=utf8"
     app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
         "pool_recycle": 300,
-        "pool_pre_ping": True
+        "pool_pre_ping": True,
+        "json_serializer": compact_dumps
     }
 
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 
+# Reject oversized request bodies before they reach the analyzer (bytes)
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_CONTENT_LENGTH", 16 * 1024 * 1024))
+
 # initialize the app with the extension
 db.init_app(app)
 
@@ -58,9 +64,10 @@ def load_user(user_id):
     return User.query.get(int(user_id))
 
 with app.app_context():
-    # Import models to ensure tables are created
+    # Create the schema, or bring an existing database up to date, without touching data
     import models
-    db.create_all()
+    from migrations import run_migrations
+    run_migrations()
 
     # Import and register routes
     import routes
\ No newline at end of file
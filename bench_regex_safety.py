@@ -0,0 +1,92 @@
+"""
+Worst-case timing of the suspicious-pattern scan on hostile input.
+
+Each case is text built to make a backtracking regex work hardest: a long line
+full of a pattern's leading word and none of its tail, or digit runs that never
+complete a match. Sizes double each step, so a linear scan roughly doubles its
+time per step while a quadratic one roughly quadruples it. The plain re column
+times the pattern as the rules used to write it, run through re. The detector
+runs with the length and time budgets lifted so every character is scanned.
+
+    python bench_regex_safety.py [--max-size 1600000] [--repeat 3]
+"""
+import argparse
+import json
+import re
+import time
+
+from fraud_detector import FraudDetector
+from pattern_scanners import LINE_PAIR_PATTERNS
+from ruleset import DEFAULT_RULES_PATH, Ruleset
+
+# Plain re is not timed again once one run takes longer than this (seconds);
+# the next sizes of a quadratic case would take minutes
+RE_TIME_LIMIT = 1.0
+
+HOSTILE_CASES = {
+    'whatsapp_without_number': ('whatsapp ', r'whatsapp.*\+\d+'),
+    'telegram_without_handle': ('telegram ', r'telegram.*@\w+'),
+    'digits_without_percent': ('1', r'(\d+(?:\.\d+)?)\s*%\s*success'),
+}
+
+
+def _best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _sizes(start, stop):
+    size = start
+    while size <= stop:
+        yield size
+        size *= 2
+
+
+def run(max_size=1600000, repeat=3):
+    with open(DEFAULT_RULES_PATH, encoding='utf-8') as f:
+        rules = json.load(f)
+    rules.pop('limits', None)
+    detector = FraudDetector()
+    detector.use_ruleset(Ruleset(rules))
+
+    for name, (unit, pattern) in HOSTILE_CASES.items():
+        plain = re.compile(pattern, re.IGNORECASE)
+        print(f"{name}  ({pattern!r}{', linear scanner' if pattern in LINE_PAIR_PATTERNS else ''})")
+        print(f"  {'chars':>10}  {'detector':>10}  {'ratio':>6}  {'plain re':>10}  {'ratio':>6}")
+
+        previous = {}
+        for size in _sizes(12500, max_size):
+            text = (unit * (size // len(unit) + 1))[:size]
+            timings = {
+                'detector': _best_time(lambda: detector.analyze_content(text), repeat),
+                're': _best_time(lambda: plain.findall(text), 1) if previous.get('re', 0) < RE_TIME_LIMIT else None
+            }
+
+            columns = []
+            for key in ('detector', 're'):
+                elapsed = timings[key]
+                if elapsed is None:
+                    columns.append(f"{'-':>10}  {'':>6}")
+                    continue
+                ratio = f"{elapsed / previous[key]:.1f}x" if previous.get(key) else ''
+                columns.append(f"{elapsed * 1000:>8.1f}ms  {ratio:>6}")
+                previous[key] = elapsed
+            print(f"  {size:>10}  " + '  '.join(columns))
+        print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-size', type=int, default=1600000, help='largest input, in characters')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per detector timing (best is kept)')
+    args = parser.parse_args(argv)
+    run(args.max_size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+from app import app, db
+from datetime import datetime
+import atexit
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+
+class BulkWriter:
+    """
+    Write-behind buffer that turns single-row inserts into multi-row INSERTs.
+
+    Rows for any model are collected in memory and flushed, one INSERT per
+    table and a single commit, once max_rows are waiting or the oldest has
+    waited max_delay seconds. The durability setting decides what a crash can
+    lose:
+
+    - 'memory': nothing is persisted before the flush (up to max_delay of rows)
+    - 'journal': rows are appended to a journal file first and replayed on
+      the next start, so only an OS crash can lose them
+    - 'fsync': as 'journal', with an fsync after every append
+    - 'sync' (the default): every add is written and committed before it
+      returns, with no buffering
+
+    Journaled rows are delivered at least once: a crash between the commit and
+    the journal cleanup replays rows that were already written. close(), also
+    registered with atexit, flushes whatever is still buffered.
+
+    Each process journals to journal_path.<pid> and holds a lock on it while
+    it runs, so the workers of one server can share a journal_path. On start
+    a writer also takes over the journals of processes that have exited.
+
+    after_insert maps a model to a callable(connection, rows) run in the same
+    transaction as that model's INSERT, for bookkeeping the ORM events miss.
+    """
+
+    DURABILITY_MODES = ('memory', 'journal', 'fsync', 'sync')
+
+    def __init__(self, models, max_rows=500, max_delay=1.0, durability='sync', journal_path=None, after_insert=None):
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Unknown durability '{durability}'; expected one of {', '.join(self.DURABILITY_MODES)}")
+        if durability in ('journal', 'fsync') and not journal_path:
+            raise ValueError(f"durability '{durability}' needs a journal_path")
+
+        self.models = {model.__tablename__: model for model in models}
+        self.after_insert = {model.__tablename__: hook for model, hook in (after_insert or {}).items()}
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.durability = durability
+        journaled = durability in ('journal', 'fsync')
+        self.journal_base = journal_path if journaled else None
+        self.journal_path = f"{journal_path}.{os.getpid()}" if journaled else None
+
+        self._rows = []  # (table name, row dict) in insertion order
+        self._oldest = None  # time.monotonic() of the first buffered row
+        self._lock = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._journal = None
+        self._journal_lock = None
+        self._closed = False
+
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+        if self.journal_path:
+            # Writers start one at a time, so none sees another's journal before it is locked
+            with open(self.journal_base + '.lock', 'a') as startup_lock:
+                fcntl.flock(startup_lock, fcntl.LOCK_EX)
+                # Held while this process runs: a journal whose lock is free was left by one that exited
+                self._journal_lock = open(self.journal_path + '.lock', 'a')
+                fcntl.flock(self._journal_lock, fcntl.LOCK_EX)
+                self._adopt_orphaned_journals()
+            self._replay_journal()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            # Terminate a torn last line so the next row starts on its own line
+            if self._journal.tell() and not self._ends_with_newline():
+                self._journal.write('\n')
+
+        self._thread = None
+        if durability != 'sync':
+            self._thread = threading.Thread(target=self._run, name='bulk-writer', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, model, **values):
+        """Buffer one row for model's table; created_at is stamped now if the model has one"""
+        self.add_rows([(model, values)])
+
+    def add_rows(self, rows):
+        """
+        Buffer (model, values) rows that belong together: they reach the
+        database in the same transaction ('sync' writes them in one commit of
+        their own, without waiting for other threads' writes)
+        """
+        entries = []
+        for model, values in rows:
+            if 'created_at' in model.__table__.columns and 'created_at' not in values:
+                values['created_at'] = datetime.utcnow()
+            entries.append((model.__tablename__, values))
+        if not entries:
+            return
+
+        if self.durability == 'sync':
+            self._write(entries)
+            return
+
+        with self._lock:
+            if self._journal is not None:
+                self._journal.write(''.join(
+                    json.dumps({'table': table, 'row': self._encode(values)}, ensure_ascii=False) + '\n'
+                    for table, values in entries
+                ))
+                self._journal.flush()
+                if self.durability == 'fsync':
+                    os.fsync(self._journal.fileno())
+            if not self._rows:
+                # Start the flush thread's max_delay timer
+                self._oldest = time.monotonic()
+                self._lock.notify()
+            # A flush takes the whole buffer, so these rows are written together
+            self._rows.extend(entries)
+            if len(self._rows) >= self.max_rows:
+                self._lock.notify()
+
+    def flush(self):
+        """Write everything buffered so far; returns False if the write failed and the rows were kept"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows, self._oldest = self._rows, [], None
+                if not rows:
+                    return True
+                flushing_path = self._rotate_journal()
+
+            try:
+                self._write(rows)
+            except Exception as e:
+                logging.error(f"Bulk write of {len(rows)} rows failed, keeping them buffered: {e}")
+                with self._lock:
+                    self.failed_flushes += 1
+                    self._rows = rows + self._rows
+                    self._oldest = time.monotonic()
+                    self._restore_journal(flushing_path)
+                return False
+
+            if flushing_path:
+                os.remove(flushing_path)
+            return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'durability': self.durability,
+                'pending': len(self._rows),
+                'rows_written': self.rows_written,
+                'flushes': self.flushes,
+                'failed_flushes': self.failed_flushes,
+                'max_rows': self.max_rows,
+                'max_delay': self.max_delay
+            }
+
+    def close(self):
+        """Stop the flush thread and write out the remaining rows"""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            self._lock.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self._journal_lock is not None:
+            self._journal_lock.close()
+            self._journal_lock = None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self._oldest + self.max_delay - time.monotonic())
+                    self._lock.wait(timeout)
+                if self._closed:
+                    return
+            # A failed flush keeps its rows; wait a full period before retrying
+            if not self.flush():
+                time.sleep(self.max_delay)
+
+    def _due(self):
+        if not self._rows:
+            return False
+        return len(self._rows) >= self.max_rows or time.monotonic() - self._oldest >= self.max_delay
+
+    def _write(self, rows):
+        """One multi-row INSERT per table, in first-seen order, and a single commit"""
+        by_table = {}
+        for table, values in rows:
+            by_table.setdefault(table, []).append(values)
+
+        with app.app_context():
+            try:
+                for table, values in by_table.items():
+                    db.session.execute(db.insert(self.models[table]), values)
+                    if table in self.after_insert:
+                        self.after_insert[table](db.session.connection(), values)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        with self._lock:
+            self.rows_written += len(rows)
+            self.flushes += 1
+
+    @staticmethod
+    def _encode(values):
+        return {key: {'datetime': value.isoformat()} if isinstance(value, datetime) else value
+                for key, value in values.items()}
+
+    @staticmethod
+    def _decode(values):
+        return {key: datetime.fromisoformat(value['datetime']) if isinstance(value, dict) and value.keys() == {'datetime'} else value
+                for key, value in values.items()}
+
+    def _rotate_journal(self):
+        """Set the journaled rows being flushed aside and start a new journal; caller holds _lock"""
+        if self._journal is None:
+            return None
+        flushing_path = self.journal_path + '.flushing'
+        self._journal.close()
+        os.replace(self.journal_path, flushing_path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return flushing_path
+
+    def _ends_with_newline(self):
+        with open(self.journal_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _restore_journal(self, flushing_path):
+        """Put rows set aside by _rotate_journal back in front of the journal; caller holds _lock"""
+        if flushing_path is None:
+            return
+        self._journal.close()
+        with open(flushing_path, 'a', encoding='utf-8') as restored, open(self.journal_path, encoding='utf-8') as newer:
+            restored.write(newer.read())
+            if self.durability == 'fsync':
+                restored.flush()
+                os.fsync(restored.fileno())
+        os.replace(flushing_path, self.journal_path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _adopt_orphaned_journals(self):
+        """Append the journals of exited processes to this one's; caller holds the startup lock"""
+        directory = os.path.dirname(self.journal_base) or '.'
+        name = re.compile(re.escape(os.path.basename(self.journal_base)) + r'\.(\d+)(?:\.flushing|\.lock)?$')
+        pids = {int(match.group(1)) for match in map(name.match, os.listdir(directory)) if match}
+        pids.discard(os.getpid())
+
+        for pid in sorted(pids):
+            orphan = f"{self.journal_base}.{pid}"
+            with open(orphan + '.lock', 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Its process is still running
+                    continue
+                # .flushing holds the older rows
+                paths = [path for path in (orphan + '.flushing', orphan) if os.path.exists(path)]
+                with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                    if journal.tell() and not self._ends_with_newline():
+                        journal.write('\n')
+                    for path in paths:
+                        with open(path, encoding='utf-8') as f:
+                            text = f.read()
+                        # A torn last line stays on its own line and is skipped on replay
+                        journal.write(text if not text or text.endswith('\n') else text + '\n')
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                for path in paths + [orphan + '.lock']:
+                    os.remove(path)
+            if paths:
+                logging.info(f"Took over the write journal of exited process {pid}")
+
+    def _replay_journal(self):
+        """Buffer rows journaled by a previous process that were never confirmed written"""
+        flushing_path = self.journal_path + '.flushing'
+        if os.path.exists(flushing_path):
+            if not os.path.exists(self.journal_path):
+                open(self.journal_path, 'a').close()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._restore_journal(flushing_path)
+            self._journal.close()
+            self._journal = None
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append
+                    continue
+                if entry.get('table') in self.models:
+                    self._rows.append((entry['table'], self._decode(entry['row'])))
+        if self._rows:
+            self._oldest = time.monotonic()
+            logging.info(f"Replaying {len(self._rows)} journaled rows from {self.journal_path}")
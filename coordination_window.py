@@ -0,0 +1,200 @@
+from models import FraudAlert, NetworkConnection
+from app import db
+from datetime import datetime, timedelta
+import re
+import threading
+import time
+
+# Entity identifiers found in alert content
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\b\d{10}\b')
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class CoordinationWindow:
+    """
+    Sliding window of high-risk alerts and suspicious connections for
+    coordinated-activity checks.
+
+    Events are counted in bucket_seconds buckets over the last retention_hours.
+    For each entity (emails and phone numbers in alert content, endpoints of
+    connections) it keeps when it was last seen in each kind of event. Only
+    rows added since the last read are fetched, at most every refresh_interval
+    seconds, and each alert's content is scanned once. A check for any window
+    then sums the buckets it spans and intersects the entities seen in both
+    kinds of event, without reloading the window. Window edges are rounded to
+    whole buckets.
+
+    New rows are found by id, so a row committed after one with a higher id
+    is missed until the window is reloaded in full, every max_age seconds.
+    """
+
+    def __init__(self, min_alert_risk=6.0, min_connection_score=6.0, bucket_seconds=10, retention_hours=168,
+                 refresh_interval=2.0, max_age=300.0):
+        self.min_alert_risk = min_alert_risk
+        self.min_connection_score = min_connection_score
+        self.bucket_seconds = bucket_seconds
+        self.retention_hours = retention_hours
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+        self._reset()
+
+        self.syncs = 0
+        self.reloads = 0
+
+    def _reset(self):
+        """Drop the window so the next refresh reads the retention period again; caller holds _lock"""
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._last_alert_id = 0
+        self._last_connection_id = 0
+
+        self._buckets = {}  # bucket number -> [alerts, connections]
+        self._oldest_bucket = None
+        self._alert_entities = {}  # entity -> last seen in an alert
+        self._connection_entities = {}  # entity -> last seen in a connection
+
+        self.alerts_seen = 0
+        self.connections_seen = 0
+
+    def detect(self, time_window_hours=24, now=None):
+        """Coordination indicators over the last time_window_hours, same shape as before"""
+        if not 0 < time_window_hours <= self.retention_hours:
+            raise ValueError(f'time window must be between 0 and {self.retention_hours} hours')
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(hours=time_window_hours)
+
+        with self._lock:
+            self._refresh(now)
+            alerts = connections = 0
+            for bucket in range(self._bucket(cutoff), self._bucket(now) + 1):
+                counts = self._buckets.get(bucket)
+                if counts:
+                    alerts += counts[0]
+                    connections += counts[1]
+            first, second = self._alert_entities, self._connection_entities
+            if len(second) < len(first):
+                first, second = second, first
+            overlap = sorted(entity for entity, seen in first.items()
+                             if seen >= cutoff and (second.get(entity) or EPOCH) >= cutoff)
+
+        coordination_indicators = {
+            'simultaneous_alerts': alerts,
+            'new_connections': connections,
+            'coordination_score': 0.0,
+            'risk_level': 'low',
+            'evidence': []
+        }
+
+        if alerts >= 3:
+            coordination_indicators['coordination_score'] += 3.0
+            coordination_indicators['evidence'].append(f'{alerts} fraud alerts in {time_window_hours} hours')
+
+        if connections >= 2:
+            coordination_indicators['coordination_score'] += 2.0
+            coordination_indicators['evidence'].append(f'{connections} new suspicious connections detected')
+
+        if overlap:
+            coordination_indicators['coordination_score'] += len(overlap) * 2.0
+            coordination_indicators['evidence'].append(f'Entities appear in both alerts and network connections: {overlap}')
+
+        if coordination_indicators['coordination_score'] >= 7.0:
+            coordination_indicators['risk_level'] = 'critical'
+        elif coordination_indicators['coordination_score'] >= 4.0:
+            coordination_indicators['risk_level'] = 'high'
+        elif coordination_indicators['coordination_score'] >= 2.0:
+            coordination_indicators['risk_level'] = 'medium'
+
+        return coordination_indicators
+
+    def stats(self):
+        with self._lock:
+            return {
+                'buckets': len(self._buckets),
+                'alert_entities': len(self._alert_entities),
+                'connection_entities': len(self._connection_entities),
+                'alerts_seen': self.alerts_seen,
+                'connections_seen': self.connections_seen,
+                'last_alert_id': self._last_alert_id,
+                'last_connection_id': self._last_connection_id,
+                'syncs': self.syncs,
+                'reloads': self.reloads
+            }
+
+    def _bucket(self, moment):
+        return int((moment - EPOCH).total_seconds()) // self.bucket_seconds
+
+    def _refresh(self, now):
+        """Read events added since the last read and drop those past retention; caller holds _lock"""
+        if self._loaded and time.monotonic() - self._synced_at < self.refresh_interval:
+            return
+        if self._loaded and time.monotonic() - self._loaded_at > self.max_age:
+            # Pick up rows that committed behind a higher id since the last full read
+            self._reset()
+        horizon = now - timedelta(hours=self.retention_hours)
+
+        alerts = db.session.query(
+            FraudAlert.id, FraudAlert.created_at,
+            # Only high-risk alerts are counted, so only their content is read
+            db.case((FraudAlert.risk_score >= self.min_alert_risk, FraudAlert.content), else_=None)
+        ).filter(FraudAlert.id > self._last_alert_id)
+        connections = db.session.query(
+            NetworkConnection.id, NetworkConnection.detected_at, NetworkConnection.source_entity,
+            NetworkConnection.target_entity
+        ).filter(
+            NetworkConnection.id > self._last_connection_id,
+            NetworkConnection.suspicious_score >= self.min_connection_score
+        )
+        if not self._loaded:
+            # First read: only the retention period, the ids below it are skipped
+            alerts = alerts.filter(FraudAlert.created_at >= horizon)
+            connections = connections.filter(NetworkConnection.detected_at >= horizon)
+            self._last_alert_id = db.session.query(db.func.max(FraudAlert.id)).scalar() or 0
+            self._last_connection_id = db.session.query(db.func.max(NetworkConnection.id)).scalar() or 0
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+
+        for alert_id, created_at, content in alerts.order_by(FraudAlert.id):
+            self._last_alert_id = max(self._last_alert_id, alert_id)
+            if content is not None and created_at is not None and created_at >= horizon:
+                self._add(created_at, 0, EMAIL_PATTERN.findall(content) + PHONE_PATTERN.findall(content),
+                          self._alert_entities)
+                self.alerts_seen += 1
+
+        for connection_id, detected_at, source, target in connections.order_by(NetworkConnection.id):
+            self._last_connection_id = max(self._last_connection_id, connection_id)
+            if detected_at is not None and detected_at >= horizon:
+                self._add(detected_at, 1, (source, target), self._connection_entities)
+                self.connections_seen += 1
+
+        self._evict(horizon)
+        self._loaded = True
+        self._synced_at = time.monotonic()
+        self.syncs += 1
+
+    def _add(self, moment, kind, entities, last_seen):
+        bucket = self._bucket(moment)
+        counts = self._buckets.get(bucket)
+        if counts is None:
+            counts = self._buckets[bucket] = [0, 0]
+            if self._oldest_bucket is None or bucket < self._oldest_bucket:
+                self._oldest_bucket = bucket
+        counts[kind] += 1
+        for entity in entities:
+            if last_seen.get(entity, moment) <= moment:
+                last_seen[entity] = moment
+
+    def _evict(self, horizon):
+        oldest = self._bucket(horizon)
+        if self._oldest_bucket is None or self._oldest_bucket >= oldest:
+            return
+        for bucket in [bucket for bucket in self._buckets if bucket < oldest]:
+            del self._buckets[bucket]
+        self._oldest_bucket = min(self._buckets, default=None)
+        for last_seen in (self._alert_entities, self._connection_entities):
+            for entity in [entity for entity, seen in last_seen.items() if seen < horizon]:
+                del last_seen[entity]
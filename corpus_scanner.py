@@ -0,0 +1,315 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+from fraud_detector import FraudDetector
+
+# Per-process detector and analysis mode, set once by the pool initializer
+_worker_detector = None
+_worker_mode = 'full'
+
+
+def _init_worker(mode='full'):
+    global _worker_detector, _worker_mode
+    _worker_detector = FraudDetector()
+    _worker_mode = mode
+
+
+def _score_chunk(chunk):
+    """
+    Score one chunk of (line_number, raw_line) pairs in a worker process and
+    return the serialized JSONL output lines in the same order.
+    """
+    detector = _worker_detector or FraudDetector()
+    parsed = []
+    output = [None] * len(chunk)
+
+    for position, (line_number, raw_line) in enumerate(chunk):
+        try:
+            record = _parse_record(raw_line)
+        except ValueError as e:
+            output[position] = json.dumps({'line': line_number, 'error': str(e)}, ensure_ascii=False)
+            continue
+        parsed.append((position, line_number, record))
+
+    results = detector.analyze_batch([_batch_item(record) for _, _, record in parsed], mode=_worker_mode)
+
+    for (position, line_number, record), analysis_result in zip(parsed, results):
+        entry = {
+            'line': line_number,
+            'id': record.get('id', line_number),
+            'content_hash': hashlib.sha256(record['content'].encode('utf-8')).hexdigest()
+        }
+        entry.update(analysis_result)
+        output[position] = json.dumps(entry, ensure_ascii=False)
+
+    return output
+
+
+def _feature_chunk(chunk):
+    """Return (line_numbers, feature rows) for the valid records of one chunk"""
+    detector = _worker_detector or FraudDetector()
+    line_numbers = []
+    items = []
+    for line_number, raw_line in chunk:
+        try:
+            record = _parse_record(raw_line)
+        except ValueError:
+            continue
+        line_numbers.append(line_number)
+        items.append(_batch_item(record))
+    return line_numbers, detector.extract_features(items)
+
+
+def _parse_record(raw_line):
+    """Decode one corpus line into a record dict, raising ValueError for an invalid one"""
+    record = json.loads(raw_line)
+    if isinstance(record, str):
+        record = {'content': record}
+    if not isinstance(record, dict) or not isinstance(record.get('content'), str):
+        raise ValueError('record has no content')
+    for field in ('content_type', 'language'):
+        if record.get(field) is not None and not isinstance(record[field], str):
+            raise ValueError(f'record {field} is not a string')
+    return record
+
+
+def _batch_item(record):
+    """The analyze_batch / extract_features item for a parsed record"""
+    return {
+        'content': record['content'],
+        'content_type': record.get('content_type') or 'text',
+        'language': record.get('language') or 'english'
+    }
+
+
+def _read_chunks(path, chunk_size, skip_lines):
+    """Yield lists of (line_number, raw_line), skipping blank lines and lines already scanned"""
+    with open(path, encoding='utf-8') as corpus:
+        numbered = ((number, line) for number, line in enumerate(corpus, start=1)
+                    if number > skip_lines and line.strip())
+        while True:
+            chunk = [(number, line) for number, line in islice(numbered, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+
+def _load_checkpoint(path, input_path):
+    if not os.path.exists(path):
+        return {'lines_done': 0, 'output_offset': 0, 'messages': 0}
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('input') != os.path.abspath(input_path):
+        raise SystemExit(f'Checkpoint {path} belongs to {checkpoint.get("input")}, not {input_path}')
+    return checkpoint
+
+
+def _save_checkpoint(path, checkpoint):
+    # Write-then-rename so an interrupted save never leaves a torn checkpoint
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def scan_corpus(input_path, output_path, workers=None, chunk_size=1000, checkpoint_path=None,
+                resume=False, progress_interval=10.0, log=sys.stderr, mode='full'):
+    """
+    Score a JSONL corpus with FraudDetector across a process pool.
+
+    Each input line is a JSON string or an object with 'content' and optional
+    'id', 'content_type' and 'language'. Results are written as JSONL in input
+    order. A checkpoint recording the last fully written chunk is updated after
+    every chunk, so an interrupted scan can continue with resume=True.
+    mode='triage' only guarantees the recommendation (see analyze_content).
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+
+    if resume:
+        checkpoint = _load_checkpoint(checkpoint_path, input_path)
+    else:
+        checkpoint = {'lines_done': 0, 'output_offset': 0, 'messages': 0}
+    checkpoint['input'] = os.path.abspath(input_path)
+
+    # Drop anything written after the last checkpoint before appending again
+    output_mode = 'r+' if resume and os.path.exists(output_path) else 'w'
+    output = open(output_path, output_mode, encoding='utf-8')
+    output.seek(checkpoint['output_offset'])
+    output.truncate()
+
+    started = time.time()
+    last_report = started
+    scanned = 0
+
+    # Keep a bounded number of chunks in flight so memory stays flat on huge corpora
+    max_pending = workers * 2
+    pending = deque()
+
+    def write_next():
+        nonlocal scanned
+        last_line, future = pending.popleft()
+        lines = future.get()
+        if lines:
+            output.write('\n'.join(lines) + '\n')
+        output.flush()
+        os.fsync(output.fileno())
+        scanned += len(lines)
+        checkpoint.update(lines_done=last_line, output_offset=output.tell(),
+                          messages=checkpoint['messages'] + len(lines))
+        _save_checkpoint(checkpoint_path, checkpoint)
+
+    with output, multiprocessing.Pool(workers, initializer=_init_worker, initargs=(mode,)) as pool:
+        for chunk in _read_chunks(input_path, chunk_size, checkpoint['lines_done']):
+            pending.append((chunk[-1][0], pool.apply_async(_score_chunk, (chunk,))))
+            while len(pending) >= max_pending:
+                write_next()
+
+            now = time.time()
+            if log and now - last_report >= progress_interval:
+                elapsed = now - started
+                print(f'Scanned {scanned} messages in {elapsed:.1f}s ({scanned / elapsed:.0f} msg/s)', file=log)
+                last_report = now
+
+        while pending:
+            write_next()
+
+    elapsed = time.time() - started
+    if log:
+        rate = scanned / elapsed if elapsed > 0 else 0.0
+        print(f'Done: {scanned} messages in {elapsed:.1f}s ({rate:.0f} msg/s) with {workers} workers; '
+              f'{checkpoint["messages"]} total written to {output_path}', file=log)
+
+    return {'messages': scanned, 'elapsed': elapsed, 'total_messages': checkpoint['messages']}
+
+
+def extract_corpus_features(input_path, output_path, workers=None, chunk_size=1000, log=sys.stderr):
+    """
+    Extract the FraudDetector feature matrix of a JSONL corpus across a
+    process pool and save it as an .npz file with the matrix, the corpus
+    line number of each row, the column names and the ruleset version.
+    Lines scan_corpus would report as invalid are skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    detector = FraudDetector()
+    started = time.time()
+
+    line_numbers = []
+    blocks = []
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        for chunk_lines, rows in pool.imap(_feature_chunk, _read_chunks(input_path, chunk_size, 0)):
+            line_numbers.extend(chunk_lines)
+            blocks.append(rows)
+
+    columns = detector.feature_columns
+    matrix = np.concatenate(blocks) if blocks else np.zeros((0, len(columns)))
+    np.savez_compressed(output_path, matrix=matrix, lines=np.array(line_numbers, dtype=np.int64),
+                        columns=np.array(columns), ruleset_version=detector.ruleset_version)
+
+    elapsed = time.time() - started
+    if log:
+        print(f'Extracted {len(line_numbers)} feature rows in {elapsed:.1f}s with {workers} workers '
+              f'to {output_path}', file=log)
+    return matrix
+
+
+def rescore_features(features_path, weights=None):
+    """
+    Score a saved feature matrix under the current rules, with optional
+    {column: weight} overrides, and return the recommendation counts.
+    """
+    detector = FraudDetector()
+    with np.load(features_path) as saved:
+        matrix = saved['matrix']
+        columns = tuple(saved['columns'].tolist())
+    if columns != detector.feature_columns:
+        raise SystemExit(f'{features_path} was extracted with columns {columns}; '
+                         f'the current rules use {detector.feature_columns}')
+
+    started = time.time()
+    scores = detector.score_features(matrix, weights)
+    recommendations, counts = np.unique(detector.recommend_scores(scores).astype(str), return_counts=True)
+    return {
+        'rows': len(scores),
+        'mean_score': float(scores.mean()) if len(scores) else 0.0,
+        'recommendations': dict(zip(recommendations.tolist(), counts.tolist())),
+        'elapsed': time.time() - started
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fraud_detector',
+                                     description='Offline fraud scoring tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help='Score a JSONL message corpus across all cores')
+    scan.add_argument('corpus', help='JSONL file: one string or {"content": ...} object per line')
+    scan.add_argument('-o', '--output', help='Output JSONL path (default: <corpus>.scored.jsonl)')
+    scan.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    scan.add_argument('--chunk-size', type=int, default=1000, help='Messages per worker task')
+    scan.add_argument('--checkpoint', help='Checkpoint path (default: <output>.checkpoint)')
+    scan.add_argument('--resume', action='store_true', help='Continue from the checkpoint of a previous run')
+    scan.add_argument('--progress-interval', type=float, default=10.0, help='Seconds between throughput reports')
+    scan.add_argument('--mode', choices=FraudDetector.ANALYSIS_MODES, default='full',
+                      help='triage stops each message once its recommendation is settled')
+
+    document = commands.add_parser('document', help='Score one large document or chat export in constant memory')
+    document.add_argument('path', help='UTF-8 text file, or - for standard input')
+    document.add_argument('--language', default='english', help='Language label for the result')
+    document.add_argument('--chunk-size', type=int, default=None, help='Characters scanned per chunk')
+
+    features = commands.add_parser('features', help='Extract a rescorable feature matrix (.npz) from a JSONL corpus')
+    features.add_argument('corpus', help='JSONL file: one string or {"content": ...} object per line')
+    features.add_argument('-o', '--output', help='Output .npz path (default: <corpus>.features.npz)')
+    features.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    features.add_argument('--chunk-size', type=int, default=1000, help='Messages per worker task')
+
+    rescore = commands.add_parser('rescore', help='Re-score a saved feature matrix, optionally with new weights')
+    rescore.add_argument('features', help='.npz file written by the features command')
+    rescore.add_argument('--weights', help='JSON file mapping feature columns to weights')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'scan':
+        scan_corpus(args.corpus,
+                    args.output or args.corpus + '.scored.jsonl',
+                    workers=args.workers,
+                    chunk_size=args.chunk_size,
+                    checkpoint_path=args.checkpoint,
+                    resume=args.resume,
+                    progress_interval=args.progress_interval,
+                    mode=args.mode)
+    elif args.command == 'document':
+        detector = FraudDetector()
+        if args.path == '-':
+            result = detector.analyze_stream(sys.stdin, args.language, args.chunk_size)
+        else:
+            with open(args.path, 'rb') as document_file:
+                result = detector.analyze_stream(document_file, args.language, args.chunk_size)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.command == 'features':
+        extract_corpus_features(args.corpus,
+                                args.output or args.corpus + '.features.npz',
+                                workers=args.workers,
+                                chunk_size=args.chunk_size)
+    elif args.command == 'rescore':
+        weights = None
+        if args.weights:
+            with open(args.weights, encoding='utf-8') as f:
+                weights = json.load(f)
+        print(json.dumps(rescore_features(args.features, weights), indent=2))
+
+
+if __name__ == '__main__':
+    main()
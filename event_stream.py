@@ -0,0 +1,209 @@
+from models import FraudAlert, UserReport
+from app import app, db
+from alert_rollups import alert_totals
+from pagination import text_preview
+from collections import deque
+import json
+import logging
+import queue
+import threading
+
+# Flat stats whose change is sent as a delta
+STAT_FIELDS = ('total_alerts', 'high_risk_alerts', 'active_alerts', 'pending_reports')
+
+
+def alert_event(alert):
+    """Event data for a row of ALERT_EVENT_COLUMNS"""
+    return {
+        'id': alert.id,
+        'content_type': alert.content_type,
+        'risk_score': alert.risk_score,
+        'severity': alert.severity,
+        'status': alert.status,
+        'source_platform': alert.source_platform,
+        'content_preview': alert.content_preview,
+        'created_at': alert.created_at.isoformat() if alert.created_at else None
+    }
+
+
+# Columns published for a new alert; the preview is cut in SQL
+ALERT_EVENT_COLUMNS = (
+    FraudAlert.id, FraudAlert.content_type, FraudAlert.risk_score, FraudAlert.severity, FraudAlert.status,
+    FraudAlert.source_platform, FraudAlert.created_at, text_preview(FraudAlert.content).label('content_preview')
+)
+
+
+class EventStream:
+    """
+    Server-Sent Events fan-out of new FraudAlerts and dashboard stat changes.
+
+    One background thread per process looks for changes, every poll_interval
+    seconds or as soon as wake() is called (routes call it when a write
+    commits), and publishes each change once. Every subscriber gets it from its
+    own bounded queue, so the database work does not grow with the number of
+    open dashboards. Recent events are kept so a reconnecting EventSource
+    resumes from its Last-Event-ID; a subscriber that falls too far behind is
+    disconnected and resumes the same way.
+
+    Each open stream holds a server thread for as long as the client stays,
+    so at most max_subscribers are served per process; subscribe() returns
+    None beyond that and the client polls instead.
+    """
+
+    # Alerts read per poll; a larger burst is picked up by the following polls
+    ALERT_BATCH = 100
+
+    def __init__(self, poll_interval=1.0, backlog=256, queue_size=100, heartbeat=15.0, max_subscribers=16):
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+
+        self._backlog = deque(maxlen=backlog)  # (event id, SSE message)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._next_id = 1
+
+        self._last_alert_id = None
+        self._stats = None
+
+        self.published = 0
+        self.dropped_subscribers = 0
+        self.rejected_subscribers = 0
+
+    def subscribe(self, last_event_id=None):
+        """
+        A queue of SSE messages, starting after last_event_id when it is still
+        in the backlog; None when max_subscribers streams are already open
+        """
+        self.start()
+        subscriber = queue.Queue(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self.rejected_subscribers += 1
+                return None
+            if last_event_id is not None:
+                for event_id, message in self._backlog:
+                    if event_id > last_event_id:
+                        subscriber.put_nowait(message)
+            # Current stats first, so a new page needs no extra request
+            if self._stats is not None and subscriber.empty():
+                subscriber.put_nowait(self._format('stats', {'stats': self._stats, 'deltas': {}}))
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def messages(self, subscriber):
+        """Generator of SSE text for one response; ends when the subscriber is dropped"""
+        try:
+            yield f"retry: {int(self.poll_interval * 1000) + 1000}\n\n"
+            while True:
+                try:
+                    message = subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def publish(self, event, data):
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            message = self._format(event, data, event_id)
+            self._backlog.append((event_id, message))
+            self.published += 1
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self._drop(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'published': self.published,
+                'dropped_subscribers': self.dropped_subscribers,
+                'rejected_subscribers': self.rejected_subscribers,
+                'last_event_id': self._next_id - 1
+            }
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='event-stream', daemon=True)
+        with app.app_context():
+            self._last_alert_id = db.session.query(db.func.max(FraudAlert.id)).scalar() or 0
+            self._stats = self._current_stats()
+        self._thread.start()
+
+    def _drop(self, subscriber):
+        """Disconnect a subscriber whose queue is full; caller holds _lock"""
+        self._subscribers.discard(subscriber)
+        self.dropped_subscribers += 1
+        # Make room for the end-of-stream marker
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.put_nowait(None)
+
+    @staticmethod
+    def _format(event, data, event_id=None):
+        lines = [f"event: {event}"]
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+        return '\n'.join(lines) + '\n\n'
+
+    @staticmethod
+    def _current_stats():
+        totals = alert_totals()
+        return {
+            'total_alerts': totals['total'],
+            'high_risk_alerts': totals['high_risk'],
+            'active_alerts': totals['active'],
+            'pending_reports': UserReport.query.filter(UserReport.status == 'pending').count(),
+            'risk_distribution': totals['risk_distribution']
+        }
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                with app.app_context():
+                    self._poll()
+            except Exception as e:
+                logging.error(f"Event stream poll failed: {e}")
+
+    def _poll(self):
+        alerts = db.session.query(*ALERT_EVENT_COLUMNS).filter(FraudAlert.id > self._last_alert_id).order_by(
+            FraudAlert.id
+        ).limit(self.ALERT_BATCH).all()
+        for alert in alerts:
+            self.publish('alert', alert_event(alert))
+            self._last_alert_id = alert.id
+        if len(alerts) == self.ALERT_BATCH:
+            self.wake()
+
+        stats = self._current_stats()
+        if stats != self._stats:
+            deltas = {name: stats[name] - self._stats[name] for name in STAT_FIELDS if stats[name] != self._stats[name]}
+            self._stats = stats
+            self.publish('stats', {'stats': stats, 'deltas': deltas})
@@ -1,306 +1,795 @@
+import bisect
+import codecs
 import re
 import json
+import logging
+import os
+import threading
+import time
+import unicodedata
 from datetime import datetime
 from textblob import TextBlob
 import math
+import numpy as np
+from ruleset import Ruleset, DEFAULT_RULES_PATH, SCRIPT_LANGUAGES, WEIGHTED_FAMILIES, count_scripts, normalize_text
 
 class FraudDetector:
-    def __init__(self):
-        # Enhanced fraud indicators with multi-language support
-        self.fraud_keywords = {
-            'english': [
-                # Investment scams
-                'guaranteed returns', 'risk-free investment', 'double your money',
-                'limited time offer', 'exclusive opportunity', 'secret strategy',
-                'insider information', 'pre-ipo', 'binary options', 'forex trading',
-
-                # Ponzi scheme indicators
-                'high returns', 'no risk', 'referral bonus', 'pyramid',
-                'multi-level marketing', 'downline', 'matrix',
-
-                # Urgency tactics
-                'act now', 'limited spots', 'deadline', 'hurry', 'expires soon',
-                'one-time offer', 'closing today', 'final warning',
-
-                # Contact pressure
-                'whatsapp only', 'telegram group', 'private group',
-                'delete after reading', 'confidential', 'dont share',
-
-                # Indian specific
-                'sebi approved', 'rbi certified', 'government backed',
-                'tax free returns', 'black money', 'demonetization profit',
-
-                # Advanced patterns
-                'deepfake', 'ai generated', 'pump and dump', 'wash trading',
-                'market manipulation', 'coordinated buying', 'insider trading'
-            ],
-            'hindi': [
-                'गारंटीशुदा रिटर्न', 'जोखिम मुक्त निवेश', 'पैसा दोगुना',
-                'सीमित समय', 'विशेष अवसर', 'गुप्त रणनीति',
-                'अंदरूनी जानकारी', 'तुरंत कार्य करें', 'व्हाट्सएप ग्रुप',
-                'सेबी अप्रूवड', 'आरबीआई सर्टिफाइड', 'सरकारी समर्थन'
-            ],
-            'tamil': [
-                'உத்தரவாதமான வருமானம்', 'ஆபத்து இல்லாத முதலீடு', 'பணம் இரட்டிப்பாக்கம்',
-                'வரையறுக்கப்பட்ட நேரம்', 'சிறப்பு வாய்ப்பு', 'இரகசிய உத்தி',
-                'உள்ளக தகவல்', 'உடனே செயல்படுங்கள்', 'வாட்ஸ்அப் குழு'
-            ]
-        }
+    # Bump when scoring logic changes without any rule data changing
+    SCORING_REVISION = 1
+
+    # analyze_stream defaults: characters read per chunk, characters re-scanned
+    # across each chunk boundary (longer than any phrase or expected match) and
+    # examples kept per repeated pattern
+    STREAM_CHUNK_SIZE = 64 * 1024
+    STREAM_OVERLAP = 1024
+    STREAM_MAX_EXAMPLES = 100
+
+    # Text checks grouped by the scan that feeds them, cheapest and most
+    # selective first; triage mode stops between stages
+    TEXT_SCAN_STAGES = ('_scan_keywords', '_scan_amounts', '_scan_patterns', '_scan_counts')
+
+    ANALYSIS_MODES = ('full', 'triage')
+
+    # Below this length the bound checks between triage stages cost more
+    # than the stages they could skip
+    TRIAGE_MIN_LENGTH = 100
+
+    def __init__(self, rules_path=None, reload_interval=None):
+        # Weights, thresholds, phrase lists and patterns live in a rules file so
+        # they can be changed without a redeploy
+        self.rules_path = rules_path or os.environ.get('FRAUD_RULES_PATH', DEFAULT_RULES_PATH)
+        if reload_interval is None:
+            reload_interval = float(os.environ.get('FRAUD_RULES_RELOAD_INTERVAL', 30))
+        self.reload_interval = reload_interval
+
+        self._reload_lock = threading.Lock()
+        self._rules_mtime = os.stat(self.rules_path).st_mtime
+        self._next_reload_check = time.monotonic() + self.reload_interval
+        self.ruleset = Ruleset.from_file(self.rules_path)
+
+    @property
+    def ruleset_version(self):
+        """Identifies both the rules and the scoring code that produced a result"""
+        return f"{self.ruleset.version}-r{self.SCORING_REVISION}"
+
+    def use_ruleset(self, ruleset):
+        """Atomically replace the active ruleset; in-flight analyses keep the old one"""
+        self.ruleset = ruleset
+
+    def reload_ruleset(self, force=False):
+        """
+        Load the rules file again if it changed since it was last read (or
+        always, with force). Returns True when a new ruleset was swapped in.
+        A file that fails to load or compile leaves the current ruleset active.
+        """
+        with self._reload_lock:
+            self._next_reload_check = time.monotonic() + self.reload_interval
+            try:
+                mtime = os.stat(self.rules_path).st_mtime
+                if not force and mtime == self._rules_mtime:
+                    return False
+                ruleset = Ruleset.from_file(self.rules_path)
+            except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+                logging.error(f"Keeping ruleset {self.ruleset.version}: failed to load {self.rules_path}: {e}")
+                return False
+
+            self._rules_mtime = mtime
+            if ruleset.digest == self.ruleset.digest:
+                return False
+
+            self.use_ruleset(ruleset)
+            logging.info(f"Loaded fraud ruleset {ruleset.version} from {self.rules_path}")
+            return True
+
+    def _current_ruleset(self):
+        """Return the active ruleset, picking up rules file changes every reload_interval"""
+        if self.reload_interval >= 0 and time.monotonic() >= self._next_reload_check:
+            if not self._reload_lock.locked():
+                self.reload_ruleset()
+        return self.ruleset
+
+    def analyze_content(self, content, content_type='text', language='english', mode='full', time_budget=None):
+        """
+        Analyze content for fraud indicators and return risk score.
+
+        Phrases from every language in the ruleset are matched regardless of
+        the language argument, which only labels the result ('auto' when the
+        caller does not know); text results also report the scripts found and
+        the language detected from them.
+
+        mode='triage' runs the text checks in stages and stops once the
+        recommendation cannot change. The recommendation is always the one a
+        full analysis would give, but the indicators and risk score then only
+        cover the stages that ran and the result is marked truncated.
+
+        Text beyond the ruleset's max_text_length is not analyzed
+        (input_truncated), and checks still pending when time_budget seconds
+        (default: the ruleset's) have passed are skipped
+        (time_budget_exceeded).
+        """
+        if mode not in self.ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
 
-        # Suspicious patterns
-        self.suspicious_patterns = [
-            r'\b\d{10}\b',  # Phone numbers
-            r'₹\s*\d+\s*lakh',  # Large amounts in lakhs
-            r'₹\s*\d+\s*crore',  # Large amounts in crores
-            r'\b\d+%\s*return',  # Percentage returns
-            r'whatsapp.*\+\d+',  # WhatsApp numbers
-            r'telegram.*@\w+',  # Telegram handles
-            r'(?i)ai-generated', # AI generated content
-            r'(?i)deepfake', # Deepfake content
-            r'(?i)pump and dump', # Pump and dump schemes
-            r'(?i)wash trading', # Wash trading
-            r'(?i)market manipulation', # Market manipulation
-            r'(?i)coordinated buying', # Coordinated buying
-            r'(?i)insider trading' # Insider trading
-        ]
+        # One ruleset for the whole analysis, even if a reload swaps it meanwhile
+        ruleset = self._current_ruleset()
+        analysis_result = self._new_result(ruleset, language)
 
-    def analyze_content(self, content, content_type='text', language='english'):
+        if content_type == 'text':
+            if ruleset.max_text_length is not None and len(content) > ruleset.max_text_length:
+                content = content[:ruleset.max_text_length]
+                analysis_result['input_truncated'] = True
+
+            if time_budget is None:
+                time_budget = ruleset.time_budget
+            deadline = time.monotonic() + time_budget if time_budget is not None else None
+
+            if mode == 'triage' and len(content) >= self.TRIAGE_MIN_LENGTH:
+                return self._triage_text(content, analysis_result, ruleset, deadline)
+            return self._analyze_text(content, analysis_result, language, ruleset, deadline)
+        elif content_type == 'url':
+            return self._analyze_url(content, analysis_result, ruleset)
+        else:
+            # For image/video, return basic analysis
+            analysis_result['risk_score'] = ruleset.rules['media_review_score']
+            analysis_result['indicators'].append('Media content requires manual review')
+            return analysis_result
+
+    def analyze_stream(self, source, language='english', chunk_size=None, overlap=None, max_examples=None):
+        """
+        Analyze a large text document without holding it in memory.
+
+        source is a file object (text or binary UTF-8) or any iterable of
+        strings such as lines. The text is scanned in chunks of about
+        chunk_size characters; each chunk re-scans the last overlap characters
+        of the previous one, cut at a line start where possible, so phrases
+        and patterns spanning a boundary are found exactly once. Only
+        max_examples matches of each repeated pattern are kept and scored;
+        examples_truncated reports when that happened.
         """
-        Analyze content for fraud indicators and return risk score
+        ruleset = self._current_ruleset()
+        result = self._new_result(ruleset, language)
+
+        features = self._extract_stream_features(
+            source, ruleset,
+            chunk_size or self.STREAM_CHUNK_SIZE,
+            self.STREAM_OVERLAP if overlap is None else overlap,
+            max_examples or self.STREAM_MAX_EXAMPLES
+        )
+        result['content_length'] = features['length']
+        result['examples_truncated'] = features['examples_truncated']
+
+        return self._score_text_features(features, result, ruleset)
+
+    def analyze_batch(self, items, content_type='text', language='english', mode='full'):
+        """
+        Analyze a batch of content in one call and return results in input order.
+
+        Each item is either a string or a dict with 'content' and optional
+        'content_type' / 'language' overriding the batch defaults. Identical
+        items within a batch are analyzed once and the result is copied.
+        Raises ValueError for an item whose fields are not strings.
         """
-        analysis_result = {
+        results = []
+        batch_results = {}
+
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                key = (item['content'], item.get('content_type', content_type), item.get('language', language))
+            else:
+                key = (item, content_type, language)
+            if not all(isinstance(value, str) for value in key):
+                raise ValueError(f'Item {index}: content, content_type and language must be strings')
+
+            if key in batch_results:
+                results.append(self.copy_result(batch_results[key]))
+            else:
+                batch_results[key] = self.analyze_content(*key, mode=mode)
+                results.append(batch_results[key])
+
+        return results
+
+    @staticmethod
+    def copy_result(result):
+        """Copy an analysis result so callers can mutate it independently"""
+        return {key: list(value) if isinstance(value, list) else value for key, value in result.items()}
+
+    @property
+    def feature_columns(self):
+        """Column names of the extract_features matrix under the active ruleset"""
+        return self.ruleset.feature_columns
+
+    def extract_features(self, items, content_type='text', language='english'):
+        """
+        Return a float matrix with one row per item and one column per rule
+        family (see feature_columns): phrase and match counts, and 0/1 flags
+        for the threshold rules. score_features turns it into the risk scores
+        analyze_content would give.
+
+        Items are given as for analyze_batch, and content types are handled
+        as in analyze_content: text is cut at max_text_length, URLs fill the
+        url_* columns and other types the media_review flag. Raises
+        ValueError for an item whose fields are not strings.
+        """
+        ruleset = self._current_ruleset()
+        rows = []
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                key = (item['content'], item.get('content_type', content_type), item.get('language', language))
+            else:
+                key = (item, content_type, language)
+            if not all(isinstance(value, str) for value in key):
+                raise ValueError(f'Item {index}: content, content_type and language must be strings')
+            rows.append(self._content_feature_row(key[0], key[1], ruleset))
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(ruleset.feature_columns))
+
+    def score_features(self, matrix, weights=None):
+        """
+        Score every row of an extract_features matrix with one dot product.
+        weights optionally maps column names to replacement weights, so stored
+        matrices can be re-scored under other weights without re-scanning text.
+        """
+        ruleset = self.ruleset
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(ruleset.feature_columns):
+            raise ValueError(f"Expected a matrix with {len(ruleset.feature_columns)} columns, got shape {matrix.shape}")
+
+        weight_vector = np.array(ruleset.feature_weights, dtype=np.float64)
+        for column, weight in (weights or {}).items():
+            if column not in ruleset.feature_columns:
+                raise ValueError(f"Unknown feature column: {column}")
+            weight_vector[ruleset.feature_columns.index(column)] = weight
+
+        return np.minimum(matrix @ weight_vector, ruleset.max_score)
+
+    def recommend_scores(self, scores):
+        """Vectorized recommendation_for: an object array of recommendations for an array of scores"""
+        ruleset = self.ruleset
+        scores = np.asarray(scores, dtype=np.float64)
+        recommendations = np.full(scores.shape, ruleset.rules['default_recommendation'], dtype=object)
+        # Highest threshold last so it wins
+        for min_score, recommendation in reversed(ruleset.recommendations):
+            recommendations[scores >= min_score] = recommendation
+        return recommendations
+
+    def _new_result(self, ruleset, language):
+        return {
             'risk_score': 0.0,
             'indicators': [],
             'sentiment': 'neutral',
             'urgency_level': 'low',
             'contact_pressure': False,
             'suspicious_patterns': [],
-            'recommendation': 'safe'
+            'recommendation': 'safe',
+            'language': language,
+            'detected_language': None,
+            'scripts': [],
+            'truncated': False,
+            'input_truncated': False,
+            'time_budget_exceeded': False,
+            'ruleset_version': f"{ruleset.version}-r{self.SCORING_REVISION}"
         }
 
-        if content_type == 'text':
-            return self._analyze_text(content, analysis_result, language)
-        elif content_type == 'url':
-            return self._analyze_url(content, analysis_result)
-        else:
-            # For image/video, return basic analysis
-            analysis_result['risk_score'] = 3.0
-            analysis_result['indicators'].append('Media content requires manual review')
-            return analysis_result
-
-    def _analyze_text(self, text, result, language):
+    def _analyze_text(self, text, result, language, ruleset, deadline=None):
         """Analyze text content for fraud indicators"""
+        features = self._extract_text_features(text, ruleset, deadline)
+        return self._score_text_features(features, result, ruleset)
+
+    def _triage_text(self, text, result, ruleset, deadline=None):
+        """Run the text scan stages in order until the recommendation is settled"""
+        text = normalize_text(text)
         text_lower = text.lower()
-        risk_score = 0.0
+        scan = self._new_text_scan(ruleset, deadline)
+        top_recommendation = ruleset.recommendation_for(ruleset.max_score)
+
+        stages = self.TEXT_SCAN_STAGES
+        last = len(stages) - 1
+        for index, stage in enumerate(stages):
+            getattr(self, stage)(text, text_lower, 0, len(text), 0, ruleset, scan)
+            if index == last or self._out_of_time(scan):
+                break
+
+            low, high = self._score_bounds(scan, ruleset, stages[index + 1:])
+            low_recommendation = ruleset.recommendation_for(min(low, ruleset.max_score))
+            if high == math.inf:
+                settled = low_recommendation == top_recommendation
+            else:
+                settled = low_recommendation == ruleset.recommendation_for(min(high, ruleset.max_score))
+            if settled:
+                result['truncated'] = True
+                break
+
+        return self._score_text_features(self._finish_text_features(scan, ruleset), result, ruleset)
+
+    def _score_bounds(self, scan, ruleset, pending):
+        """
+        Lowest and highest risk score (before capping) that _score_text_features
+        could still give once the pending stages have run as well. Every term
+        of the scoring has to be covered here.
+        """
+        rules = ruleset.rules
+        sentiment = rules['sentiment']
+        pattern_weight = rules['suspicious_pattern_weight']
+        amounts_pending = '_scan_amounts' in pending
+        patterns_pending = '_scan_patterns' in pending
+
+        # Keyword phrases and pattern matches found so far always count in full
+        phrase_weights = ruleset.phrase_weights
+        low = sum(phrase_weights.get(phrase, 0.0) for phrase in scan['phrases'])
+        low += sum(map(len, scan['pattern_matches'].values())) * pattern_weight
+        high = low
+
+        # Rules with a threshold add anywhere between nothing and their weight
+        # per candidate; a pending stage can produce any number of candidates
+        money_count = sum(map(len, scan['money_amounts'].values()))
+        terms = (
+            (rules['money']['weight'], None if amounts_pending else money_count),
+            (rules['success_rate']['weight'], None if patterns_pending else len(scan['success_rates'])),
+            (pattern_weight, None if amounts_pending or patterns_pending else 0),
+            (sentiment['overly_positive_weight'], 1),
+            (sentiment['cautious_weight'], 1),
+            (rules['emoji']['weight'], 1),
+            (rules['caps']['weight'], 1)
+        )
+        for weight, count in terms:
+            if count is None:
+                if weight > 0:
+                    high = math.inf
+                elif weight < 0:
+                    low = -math.inf
+            elif weight > 0:
+                high += weight * count
+            else:
+                low += weight * count
+
+        return low, high
+
+    def _extract_text_features(self, text, ruleset, deadline=None):
+        """Run the ruleset's compiled scanners over text and collect the raw feature record"""
+        text = normalize_text(text)
+        scan = self._new_text_scan(ruleset, deadline)
+        self._scan_text_window(text, 0, len(text), 0, ruleset, scan)
+        return self._finish_text_features(scan, ruleset)
+
+    def _extract_stream_features(self, source, ruleset, chunk_size, overlap, max_examples):
+        """Feature record for a streamed document, built one bounded window at a time"""
+        scan = self._new_text_scan(ruleset)
+        blocks = _read_text_blocks(source, chunk_size)
+
+        # window holds the unscanned text plus a tail of already accepted text;
+        # base is the document offset of window[0] and matches are accepted
+        # when they start in window[start:stop]
+        window = ''
+        base = 0
+        start = 0
+        held = None
+        block = next(blocks, None)
+        while block is not None:
+            next_block = next(blocks, None)
+            window += block
+
+            if next_block is None:
+                stop = len(window)
+            else:
+                # Leave at least overlap characters for the next window, from
+                # the start of a line unless that line is huge
+                limit = len(window) - overlap
+                stop = window.rfind('\n', start, max(limit, start)) + 1
+                if stop <= start or len(window) - stop > chunk_size:
+                    stop = max(limit, start)
+
+            # A "<word>.*<tail>" match runs to the last tail on its line, so
+            # while the line at stop is unfinished its first word (a document
+            # offset, held) stays in the window and the match is left to a
+            # later window
+            opened = None
+            if next_block is not None and ruleset.line_pair_scanners and window.find('\n', stop) == -1:
+                line_start = window.rfind('\n', 0, stop) + 1
+                heads = [scanner.head_position(window, line_start, stop) for _, scanner in ruleset.line_pair_scanners]
+                heads = [head for head in heads if head >= 0]
+                if heads:
+                    opened = base + min(heads)
+            scan['line_pairs'] = (held, opened)
+
+            self._scan_text_window(window, start, stop, base, ruleset, scan)
+            self._trim_examples(scan, max_examples)
+
+            # Keep one accepted character as context for \b and lookbehinds
+            keep = max(stop - 1, 0)
+            if opened is not None:
+                keep = min(keep, opened - base)
+            window = window[keep:]
+            base += keep
+            start = stop - keep
+            held = opened
+            block = next_block
+
+        return self._finish_text_features(scan, ruleset)
+
+    @staticmethod
+    def _new_text_scan(ruleset, deadline=None):
+        """Accumulator filled by _scan_text_window; deadline is a time.monotonic() value"""
+        return {
+            'length': 0,
+            'phrases': set(),
+            'term_next_free': {},
+            'resume': {},
+            'pattern_matches': {name: [] for name in ruleset.suspicious_pattern_names},
+            'success_rates': [],
+            'money_amounts': {'lakh': [], 'crore': [], 'any': []},
+            'emoji_count': 0,
+            'caps_count': 0,
+            'letter_count': 0,
+            'scripts': {},
+            'numeric': True,
+            'punctuation_only': True,
+            'examples_truncated': False,
+            # Document offsets the line-pair patterns scan from and up to,
+            # when they differ from the window's (see _extract_stream_features)
+            'line_pairs': (None, None),
+            'deadline': deadline,
+            'time_budget_exceeded': False
+        }
+
+    def _scan_text_window(self, text, start, stop, base, ruleset, scan):
+        """
+        Add the matches starting in text[start:stop] to scan. Matches may run
+        past stop, and text before start is context only; base is the offset
+        of text[0] within the whole document.
+        """
+        text_lower = text.lower()
+        for stage in self.TEXT_SCAN_STAGES:
+            getattr(self, stage)(text, text_lower, start, stop, base, ruleset, scan)
+            if self._out_of_time(scan):
+                break
+
+    @staticmethod
+    def _out_of_time(scan):
+        """True, and recorded in scan, once the scan has run past its deadline"""
+        if scan['deadline'] is not None and time.monotonic() > scan['deadline']:
+            scan['time_budget_exceeded'] = True
+        return scan['time_budget_exceeded']
+
+    def _scan_keywords(self, text, text_lower, start, stop, base, ruleset, scan):
+        """Keyword families, sentiment words and the flagged terms, from one keyword pass"""
+        # Lower-casing can lengthen text (e.g. 'İ'); window edges then only
+        # approximate the same offsets in text_lower
+        if start == 0 and stop == len(text):
+            keyword_positions = ruleset.keyword_matcher.positions(text_lower)
+        else:
+            keyword_positions = ruleset.keyword_matcher.positions(text_lower, start, stop + len(text_lower) - len(text))
+        scan['phrases'].update(keyword_positions)
+
+        pattern_matches = scan['pattern_matches']
+        if len(text_lower) == len(text) and 'ı' not in text and 'ſ' not in text:
+            term_next_free = scan['term_next_free']
+            for name, term in ruleset.flagged_terms.items():
+                next_free = term_next_free.get(name, 0)
+                for offset in keyword_positions.get(term, []):
+                    # Count non-overlapping occurrences, like re.findall
+                    if base + offset >= next_free:
+                        pattern_matches[name].append(text[offset:offset + len(term)])
+                        next_free = base + offset + len(term)
+                term_next_free[name] = next_free
+        elif ruleset.term_scanner is not None:
+            for match in _window_matches(ruleset.term_scanner, text, start, stop, base, scan['resume'], 'terms'):
+                pattern_matches[match.lastgroup].append(match.group())
+
+    def _scan_amounts(self, text, text_lower, start, stop, base, ruleset, scan):
+        """Phone numbers, percentage returns and rupee amounts"""
+        pattern_matches = scan['pattern_matches']
+        resume = scan['resume']
+
+        if ruleset.number_scanner is not None:
+            for match in _window_matches(ruleset.number_scanner, text, start, stop, base, resume, 'number'):
+                digits = match.group('return_digits')
+                if digits is None:
+                    pattern_matches['phone_number'].append(match.group('phone_number'))
+                    continue
+                if len(digits) == 10:
+                    pattern_matches['phone_number'].append(digits)
+                pattern_matches['percentage_return'].append(match.group())
+
+        money_amounts = scan['money_amounts']
+        for match in _window_matches(ruleset.rupee_scanner, text, start, stop, base, resume, 'rupee'):
+            amount = match.group('amount')
+            unit = match.group('unit')
+            money_amounts['any'].append(amount)
+            if unit is None:
+                continue
+            if unit in money_amounts:
+                money_amounts[unit].append(amount)
+            pattern_name = unit.lower() + '_amount'
+            if ',' not in amount and pattern_name in ruleset.rupee_unit_patterns:
+                pattern_matches[pattern_name].append(match.group())
+
+    def _scan_patterns(self, text, text_lower, start, stop, base, ruleset, scan):
+        """The remaining suspicious-pattern regexes and success rate claims"""
+        pattern_matches = scan['pattern_matches']
+        resume = scan['resume']
+        whole = start == 0 and stop == len(text)
+        line_pair_names = {name for name, _ in ruleset.line_pair_scanners}
+        held, opened = scan['line_pairs']
+
+        for name, scanner in ruleset.pattern_scanners:
+            if whole:
+                pattern_matches[name].extend(scanner.findall(text))
+            elif name in line_pair_names:
+                pattern_start = start if held is None else held - base
+                pattern_stop = stop if opened is None else opened - base
+                pattern_matches[name].extend(
+                    _findall_between(scanner, text, pattern_start, pattern_stop, base, resume, name)
+                )
+            else:
+                pattern_matches[name].extend(_findall_between(scanner, text, start, stop, base, resume, name))
+
+        if whole:
+            rates = ruleset.success_rate_scanner.findall(text_lower)
+        else:
+            # Lower-casing can lengthen text (e.g. 'İ'); window offsets are then
+            # mapped into text_lower
+            offsets = _lowered_offsets(text) if len(text_lower) != len(text) else None
+            rates = _findall_between(ruleset.success_rate_scanner, text_lower, start, stop, base, resume, 'success_rate',
+                                     offsets)
+        scan['success_rates'].extend(float(rate) for rate in rates)
+
+    def _scan_counts(self, text, text_lower, start, stop, base, ruleset, scan):
+        """Per-character counts: length, emojis, capitals, letters and scripts"""
+        region = text if start == 0 and stop == len(text) else text[start:stop]
+        if not region:
+            return
+
+        letter_count = sum(map(str.isalpha, region))
+        scan['length'] += len(region)
+        scan['emoji_count'] += len(ruleset.emoji_scanner.findall(region))
+        scan['caps_count'] += sum(map(str.isupper, region))
+        scan['letter_count'] += letter_count
+        for script, count in count_scripts(region, letter_count).items():
+            scan['scripts'][script] = scan['scripts'].get(script, 0) + count
+        scan['numeric'] = scan['numeric'] and region.isnumeric()
+        scan['punctuation_only'] = scan['punctuation_only'] and all(c in ' .,!?' for c in region)
+
+    @staticmethod
+    def _trim_examples(scan, max_examples):
+        """Cap every match list in scan at max_examples entries"""
+        lists = list(scan['pattern_matches'].values()) + list(scan['money_amounts'].values())
+        lists.append(scan['success_rates'])
+        for matches in lists:
+            if len(matches) > max_examples:
+                del matches[max_examples:]
+                scan['examples_truncated'] = True
+
+    @staticmethod
+    def _finish_text_features(scan, ruleset):
+        money_amounts = scan['money_amounts']
+        return {
+            'length': scan['length'],
+            'keyword_hits': ruleset.keyword_matcher.hits(scan['phrases']),
+            'pattern_matches': scan['pattern_matches'],
+            'success_rates': scan['success_rates'],
+            'money_amounts': money_amounts['lakh'] + money_amounts['crore'] + money_amounts['any'],
+            'emoji_count': scan['emoji_count'],
+            'caps_count': scan['caps_count'],
+            'letter_count': scan['letter_count'],
+            'scripts': scan['scripts'],
+            # Short, numeric or punctuation-only text is never treated as shouting
+            'caps_eligible': (scan['length'] > ruleset.rules['caps']['min_length'] and not scan['numeric']
+                              and not scan['punctuation_only']),
+            'examples_truncated': scan['examples_truncated'],
+            'time_budget_exceeded': scan['time_budget_exceeded']
+        }
 
-        # Get keywords for the specified language, default to English if not found
-        keywords_to_check = self.fraud_keywords.get(language, self.fraud_keywords['english'])
+    def _score_text_features(self, features, result, ruleset):
+        """Turn a text feature record into a risk score, indicators and recommendation"""
+        rules = ruleset.rules
+        risk_score = 0.0
+        keyword_hits = features['keyword_hits']
 
-        # Check for all fraud keywords with proper scoring
-        high_risk_keywords = [
-            'guaranteed returns', 'risk-free investment', 'double your money',
-            'money-back guarantee', '100% guaranteed', '99.9% success rate',
-            'celebrity endorsed', 'bollywood stars', 'risk-free trading'
-        ]
-        
-        medium_risk_keywords = [
-            'limited time offer', 'exclusive opportunity', 'secret strategy',
-            'insider information', 'pre-ipo', 'binary options', 'forex trading',
-            'high returns', 'no risk', 'referral bonus', 'pyramid',
-            'multi-level marketing', 'downline', 'matrix'
-        ]
-        
         # Check for high-risk fraud keywords
-        for keyword in high_risk_keywords:
-            if keyword in text_lower:
-                risk_score += 3.0
-                result['indicators'].append(f"High-risk keyword: '{keyword}'")
+        for keyword in keyword_hits.get('high_risk', []):
+            risk_score += ruleset.weight('high_risk')
+            result['indicators'].append(f"High-risk keyword: '{keyword}'")
 
-        # Check for medium-risk keywords  
-        for keyword in medium_risk_keywords:
-            if keyword in text_lower:
-                risk_score += 2.0
-                result['indicators'].append(f"Medium-risk keyword: '{keyword}'")
+        # Check for high-risk keywords in other languages
+        for language, _, family in ruleset.regional_languages:
+            for keyword in keyword_hits.get(family, []):
+                risk_score += ruleset.regional_weight
+                result['indicators'].append(f"High-risk {language.title()} keyword: '{keyword}'")
+
+        # Check for medium-risk keywords
+        for keyword in keyword_hits.get('medium_risk', []):
+            risk_score += ruleset.weight('medium_risk')
+            result['indicators'].append(f"Medium-risk keyword: '{keyword}'")
 
         # Check for urgency indicators
-        urgency_indicators = [
-            'act now', 'limited spots', 'deadline', 'hurry', 'expires soon',
-            'one-time offer', 'closing today', 'final warning', 'limited time',
-            'only 48 hours', 'only 24 hours', 'expires today'
-        ]
-        
         urgency_count = 0
-        for indicator in urgency_indicators:
-            if indicator in text_lower:
-                urgency_count += 1
-                risk_score += 2.0
-                result['indicators'].append(f"Urgency indicator: '{indicator}'")
+        for indicator in keyword_hits.get('urgency', []):
+            urgency_count += 1
+            risk_score += ruleset.weight('urgency')
+            result['indicators'].append(f"Urgency indicator: '{indicator}'")
 
         if urgency_count > 0:
-            result['urgency_level'] = 'high' if urgency_count >= 2 else 'medium'
+            high_level_count = ruleset.keyword_families['urgency']['high_level_count']
+            result['urgency_level'] = 'high' if urgency_count >= high_level_count else 'medium'
 
         # Check for contact pressure
-        contact_pressure_indicators = [
-            'whatsapp only', 'telegram group', 'private group',
-            'delete after reading', 'confidential', 'dont share',
-            'download our app', 'call immediately', 'contact now'
-        ]
-        
-        for pressure in contact_pressure_indicators:
-            if pressure in text_lower:
-                risk_score += 2.0
-                result['contact_pressure'] = True
-                result['indicators'].append(f"Contact pressure: '{pressure}'")
+        for pressure in keyword_hits.get('contact_pressure', []):
+            risk_score += ruleset.weight('contact_pressure')
+            result['contact_pressure'] = True
+            result['indicators'].append(f"Contact pressure: '{pressure}'")
 
         # Check for suspicious patterns
-        for pattern in self.suspicious_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for matches in features['pattern_matches'].values():
             if matches:
-                risk_score += len(matches) * 1.0
+                risk_score += len(matches) * rules['suspicious_pattern_weight']
                 result['suspicious_patterns'].extend(matches)
                 result['indicators'].append(f"Suspicious pattern found: {matches}")
-        
+
         # Check for unrealistic success rates
-        success_rate_pattern = r'(\d+(?:\.\d+)?)\s*%\s*success'
-        success_matches = re.findall(success_rate_pattern, text_lower)
-        for match in success_matches:
-            rate = float(match)
-            if rate >= 90.0:
-                risk_score += 3.0
+        for rate in features['success_rates']:
+            if rate >= rules['success_rate']['threshold']:
+                risk_score += rules['success_rate']['weight']
                 result['indicators'].append(f"Unrealistic success rate: {rate}%")
-        
+
         # Check for large money amounts
-        money_patterns = [
-            r'₹\s*(\d+(?:,\d+)*)\s*lakh',
-            r'₹\s*(\d+(?:,\d+)*)\s*crore',
-            r'₹\s*(\d+(?:,\d+)*(?:,\d+)*)'
-        ]
-        
-        for pattern in money_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                amount_str = match.replace(',', '')
-                if amount_str.isdigit():
-                    amount = int(amount_str)
-                    if amount >= 50000:  # Large amounts
-                        risk_score += 2.0
-                        result['indicators'].append(f"Large money amount mentioned: ₹{match}")
+        for match in features['money_amounts']:
+            amount_str = match.replace(',', '')
+            if amount_str.isdigit():
+                amount = int(amount_str)
+                if amount >= rules['money']['threshold']:  # Large amounts
+                    risk_score += rules['money']['weight']
+                    result['indicators'].append(f"Large money amount mentioned: ₹{match}")
 
         # Analyze sentiment (basic implementation)
-        positive_words = ['amazing', 'fantastic', 'incredible', 'unbelievable', 'extraordinary', 'profit', 'growth', 'opportunity']
-        negative_words = ['loss', 'risk', 'danger', 'careful', 'warning', 'scam', 'fraud']
-
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        positive_count = len(keyword_hits.get('positive_sentiment', []))
+        negative_count = len(keyword_hits.get('negative_sentiment', []))
 
-        if positive_count > negative_count + 2:
+        if positive_count > negative_count + rules['sentiment']['overly_positive_margin']:
             result['sentiment'] = 'overly_positive'
-            risk_score += 1.0
+            risk_score += rules['sentiment']['overly_positive_weight']
             result['indicators'].append("Overly positive sentiment detected")
         elif negative_count > 0:
             result['sentiment'] = 'cautious'
-            risk_score -= 0.5  # Slightly reduce risk for cautious language
+            risk_score += rules['sentiment']['cautious_weight']  # Slightly reduce risk for cautious language
 
         # Check for excessive use of emojis or special characters
-        emoji_pattern = r'[😀-🙏🌀-🗿🚀-🛿⚀-⚿]'
-        emoji_count = len(re.findall(emoji_pattern, text))
-        if emoji_count > 5:
-            risk_score += 0.5
+        emoji_count = features['emoji_count']
+        if emoji_count > rules['emoji']['threshold']:
+            risk_score += rules['emoji']['weight']
             result['indicators'].append(f"Excessive emoji usage: {emoji_count} emojis")
 
         # Check for all caps (shouting)
-        # Avoid checking if text is too short or contains only numbers/symbols
-        if len(text) > 10 and not text.isnumeric() and not all(c in ' .,!?' for c in text):
-            caps_count = sum(1 for c in text if c.isupper())
-            total_letters = sum(1 for c in text if c.isalpha())
-            if total_letters > 0 and (caps_count / total_letters) > 0.5:
-                risk_score += 1.0
+        if features['caps_eligible']:
+            caps_count = features['caps_count']
+            total_letters = features['letter_count']
+            if total_letters > 0 and (caps_count / total_letters) > rules['caps']['ratio']:
+                risk_score += rules['caps']['weight']
                 result['indicators'].append("Excessive use of capital letters")
 
         # Check for AI-generated or deepfake indicators
-        ai_indicators = ['deepfake', 'ai generated', 'synthetic media', 'generated by ai']
-        for ai_indicator in ai_indicators:
-            if ai_indicator in text_lower:
-                risk_score += 2.0
-                result['indicators'].append(f"AI-generated content detected: '{ai_indicator}'")
+        for ai_indicator in keyword_hits.get('ai_generated', []):
+            risk_score += ruleset.weight('ai_generated')
+            result['indicators'].append(f"AI-generated content detected: '{ai_indicator}'")
+
+        # Report scripts by share of letters; the dominant one decides the language
+        scripts = sorted(features['scripts'], key=lambda script: (-features['scripts'][script], script))
+        result['scripts'] = scripts
+        if scripts:
+            result['detected_language'] = SCRIPT_LANGUAGES.get(scripts[0])
 
-        # Cap the risk score at 10
-        result['risk_score'] = min(risk_score, 10.0)
+        # Checks skipped for time only ever lower the score
+        result['time_budget_exceeded'] = features['time_budget_exceeded']
+
+        # Cap the risk score
+        result['risk_score'] = min(risk_score, ruleset.max_score)
 
         # Set recommendation based on risk score
-        if result['risk_score'] >= 8.0:
-            result['recommendation'] = 'block_immediately'
-        elif result['risk_score'] >= 6.0:
-            result['recommendation'] = 'high_caution'
-        elif result['risk_score'] >= 4.0:
-            result['recommendation'] = 'moderate_caution'
-        else:
-            result['recommendation'] = 'safe'
+        result['recommendation'] = ruleset.recommendation_for(result['risk_score'])
 
         return result
 
-    def _analyze_url(self, url, result):
+    def _content_feature_row(self, content, content_type, ruleset):
+        """One extract_features row, following analyze_content's content_type branches"""
+        text_row = [0] * ruleset.text_feature_count
+        url_row = [0] * (len(ruleset.feature_columns) - ruleset.text_feature_count - 1)
+        media_review = False
+
+        if content_type == 'text':
+            if ruleset.max_text_length is not None and len(content) > ruleset.max_text_length:
+                content = content[:ruleset.max_text_length]
+            text_row = self._feature_row(self._extract_text_features(content, ruleset), ruleset)
+        elif content_type == 'url':
+            url_row = self._url_feature_row(content, ruleset)
+        else:
+            media_review = True
+
+        return text_row + url_row + [media_review]
+
+    def _feature_row(self, features, ruleset):
+        """
+        One extract_features row for a feature record. The flags use the same
+        conditions as _score_text_features, so the weighted row sums to its score.
+        """
+        rules = ruleset.rules
+        keyword_hits = features['keyword_hits']
+
+        row = [len(keyword_hits.get(family, ())) for family in WEIGHTED_FAMILIES]
+        row += [len(keyword_hits.get(family, ())) for _, _, family in ruleset.regional_languages]
+
+        row.append(sum(map(len, features['pattern_matches'].values())))
+        row.append(sum(1 for rate in features['success_rates'] if rate >= rules['success_rate']['threshold']))
+
+        large_amounts = 0
+        for match in features['money_amounts']:
+            amount_str = match.replace(',', '')
+            if amount_str.isdigit() and int(amount_str) >= rules['money']['threshold']:
+                large_amounts += 1
+        row.append(large_amounts)
+
+        positive_count = len(keyword_hits.get('positive_sentiment', ()))
+        negative_count = len(keyword_hits.get('negative_sentiment', ()))
+        overly_positive = positive_count > negative_count + rules['sentiment']['overly_positive_margin']
+        row.append(overly_positive)
+        row.append(not overly_positive and negative_count > 0)
+
+        row.append(features['emoji_count'] > rules['emoji']['threshold'])
+        row.append(features['caps_eligible'] and features['letter_count'] > 0 and
+                   features['caps_count'] / features['letter_count'] > rules['caps']['ratio'])
+
+        return row
+
+    def _url_feature_row(self, url, ruleset):
+        """The url_* columns of an extract_features row, with the conditions of _analyze_url"""
+        url_rules = ruleset.rules['url']
+        url_lower = url.lower()
+        return [
+            sum(1 for domain in url_rules['suspicious_domains']['domains'] if domain in url_lower),
+            bool(ruleset.url_long_number.search(url)),
+            url_lower.count('-') > url_rules['hyphens']['max'],
+            not url.startswith(tuple(url_rules['non_standard_scheme']['schemes'])),
+            sum(1 for param in url_rules['suspicious_params']['params'] if f"{param}=" in url_lower),
+            any(service in url_lower for service in url_rules['shorteners']['services'])
+        ]
+
+    def _analyze_url(self, url, result, ruleset):
         """Analyze URL for suspicious characteristics"""
+        url_rules = ruleset.rules['url']
         url_lower = url.lower()
         risk_score = 0.0
 
         # Check for suspicious domains
-        suspicious_domains = [
-            'bit.ly', 'tinyurl.com', 'short.link', 't.co',
-            'invest-now', 'quick-money', 'easy-profit', 'get-rich-quick',
-            'secure-login', 'verify-account', 'update-details'
-        ]
-
-        for domain in suspicious_domains:
+        for domain in url_rules['suspicious_domains']['domains']:
             if domain in url_lower:
-                risk_score += 2.0
+                risk_score += url_rules['suspicious_domains']['weight']
                 result['indicators'].append(f"Suspicious domain: {domain}")
 
         # Check for suspicious URL patterns
-        if re.search(r'\d{8,}', url):  # Long numbers in URL
-            risk_score += 1.0
+        if ruleset.url_long_number.search(url):  # Long numbers in URL
+            risk_score += url_rules['long_number']['weight']
             result['indicators'].append("Suspicious number pattern in URL")
 
-        if url_lower.count('-') > 3:  # Too many hyphens
-            risk_score += 0.5
+        if url_lower.count('-') > url_rules['hyphens']['max']:  # Too many hyphens
+            risk_score += url_rules['hyphens']['weight']
             result['indicators'].append("Excessive hyphens in URL")
 
-        if not url.startswith(('http://', 'https://')):
-            risk_score += 1.5
+        if not url.startswith(tuple(url_rules['non_standard_scheme']['schemes'])):
+            risk_score += url_rules['non_standard_scheme']['weight']
             result['indicators'].append("Non-standard URL format")
 
         # Check for suspicious parameters
-        suspicious_params = ['user_id', 'account_no', 'password', 'pin', 'otp']
-        for param in suspicious_params:
+        for param in url_rules['suspicious_params']['params']:
             if f"{param}=" in url_lower:
-                risk_score += 1.0
+                risk_score += url_rules['suspicious_params']['weight']
                 result['indicators'].append(f"Suspicious URL parameter: '{param}'")
 
         # Check for shortened URLs that are not common or known
-        shortening_services = ['bit.ly', 'goo.gl', 'tinyurl.com', 'ow.ly', 'is.gd']
-        if any(service in url_lower for service in shortening_services):
-            risk_score += 1.0
+        if any(service in url_lower for service in url_rules['shorteners']['services']):
+            risk_score += url_rules['shorteners']['weight']
             result['indicators'].append("Use of URL shortener detected")
 
-
-        result['risk_score'] = min(risk_score, 10.0)
-
-        if result['risk_score'] >= 6.0:
-            result['recommendation'] = 'block_url'
-        elif result['risk_score'] >= 3.0:
-            result['recommendation'] = 'caution_advised'
-        else:
-            result['recommendation'] = 'safe'
+        result['risk_score'] = min(risk_score, ruleset.max_score)
 
         # Set recommendation based on risk score
-        if result['risk_score'] >= 8.0:
-            result['recommendation'] = 'block_immediately'
-        elif result['risk_score'] >= 6.0:
-            result['recommendation'] = 'high_caution'
-        elif result['risk_score'] >= 4.0:
-            result['recommendation'] = 'moderate_caution'
-        else:
-            result['recommendation'] = 'safe'
+        result['recommendation'] = ruleset.recommendation_for(result['risk_score'])
 
         return result
 
@@ -328,4 +817,116 @@ class FraudDetector:
         elif content_type == 'text':
             return 'medium'
         else: # image, video, etc.
-            return 'low'
\ No newline at end of file
+            return 'low'
+
+def _window_matches(scanner, text, start, stop, base, resume, key):
+    """
+    Iterate scanner's matches starting in text[start:stop], continuing from
+    where the previous window's scan ended (resume[key], a document offset) so
+    the matches are the ones a single scan over the whole document would find.
+    """
+    if start == 0 and stop == len(text) and base == 0 and key not in resume:
+        return scanner.finditer(text)
+    return _resumed_matches(scanner, text, start, stop, base, resume, key)
+
+
+def _resumed_matches(scanner, text, start, stop, base, resume, key):
+    for match in scanner.finditer(text, max(start, resume.get(key, 0) - base)):
+        if match.start() >= stop:
+            break
+        resume[key] = base + match.end()
+        yield match
+
+
+def _lowered_matches(scanner, text_lower, offsets, start, stop, base, resume, key):
+    """
+    _window_matches over a lower-cased copy of the window that is longer than
+    the window itself. start, stop and resume stay offsets into the original
+    text; offsets[i] is where its character i starts in text_lower.
+    """
+    position = max(start, resume.get(key, 0) - base)
+    for match in scanner.finditer(text_lower, offsets[position]):
+        if match.start() >= offsets[stop]:
+            break
+        resume[key] = base + bisect.bisect_left(offsets, match.end())
+        yield match
+
+
+def _lowered_offsets(text):
+    """Offset of each character of text (and of its end) in text.lower()"""
+    offsets = [0]
+    for character in text:
+        offsets.append(offsets[-1] + len(character.lower()))
+    return offsets
+
+
+def _findall_between(scanner, text, start, stop, base, resume, key, offsets=None):
+    """
+    scanner.findall over the matches of _window_matches, or of _lowered_matches
+    when offsets maps the original window into text
+    """
+    if offsets is None:
+        matches = _window_matches(scanner, text, start, stop, base, resume, key)
+    else:
+        matches = _lowered_matches(scanner, text, offsets, start, stop, base, resume, key)
+    found = []
+    for match in matches:
+        if scanner.groups == 0:
+            found.append(match.group())
+        elif scanner.groups == 1:
+            found.append(match.group(1))
+        else:
+            found.append(match.groups())
+    return found
+
+
+def _read_text_blocks(source, chunk_size):
+    """
+    Yield NFC-normalized blocks of at least chunk_size characters (except the
+    last) from a file object or an iterable of strings. A block never ends in
+    a character that could still compose with the next one.
+    """
+    read = getattr(source, 'read', None)
+    if read is not None:
+        pieces = iter(lambda: read(chunk_size), None)
+    else:
+        pieces = iter(source)
+
+    decoder = None
+    held = ''
+    buffered = []
+    size = 0
+    for piece in pieces:
+        if not piece:
+            if read is not None:
+                break
+            continue
+        if isinstance(piece, bytes):
+            decoder = decoder or codecs.getincrementaldecoder('utf-8')('replace')
+            piece = decoder.decode(piece)
+        buffered.append(piece)
+        size += len(piece)
+        if size < chunk_size:
+            continue
+
+        text = held + ''.join(buffered)
+        buffered = []
+        size = 0
+        cut = len(text)
+        while cut > 0 and unicodedata.combining(text[cut - 1]):
+            cut -= 1
+        cut = max(cut - 1, 0)
+        held = text[cut:]
+        yield normalize_text(text[:cut])
+
+    text = held + ''.join(buffered)
+    if decoder is not None:
+        text += decoder.decode(b'', final=True)
+    if text:
+        yield normalize_text(text)
+
+
+if __name__ == '__main__':
+    # python -m fraud_detector scan corpus.jsonl --workers N
+    from corpus_scanner import main
+    main()
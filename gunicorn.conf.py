@@ -0,0 +1,27 @@
+# Gunicorn settings, read automatically when gunicorn starts in this directory.
+#
+# /api/stream keeps a request open for as long as a dashboard is open, so
+# sync workers (one request at a time) would be used up by a few analysts.
+# gthread workers serve each request on a thread; the event stream caps its
+# open streams per process (EVENT_STREAM_MAX_SUBSCRIBERS) below the thread
+# count so other requests always have threads left.
+#
+# Sizing: an open stream costs one mostly idle thread (a queue wait; the
+# database is polled once per process, not per stream), so threads are cheap
+# to raise. Open dashboards = workers * (threads - GUNICORN_REQUEST_THREADS);
+# the defaults give 2 * (256 - 32) = 448. Raise GUNICORN_THREADS for more
+# dashboards and GUNICORN_REQUEST_THREADS for more concurrent page and API
+# requests per worker; past a few thousand streams per host, move the stream
+# to its own service rather than growing the thread pools further.
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 256))
+
+# Threads per worker kept free of streams for ordinary requests
+request_threads = int(os.environ.get('GUNICORN_REQUEST_THREADS', 32))
+
+# Workers inherit the environment; an explicit EVENT_STREAM_MAX_SUBSCRIBERS wins
+os.environ.setdefault('EVENT_STREAM_MAX_SUBSCRIBERS', str(max(threads - request_threads, 0)))
@@ -0,0 +1,39 @@
+from sqlalchemy import Boolean, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+import json
+
+# JSON documents stored in model columns: JSONB on PostgreSQL, JSON text
+# (queried with the JSON1 functions) on SQLite. Python None is stored as SQL
+# NULL, not the JSON 'null'.
+JSONDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
+
+
+def compact_dumps(value):
+    """The engines' json_serializer: no whitespace, non-ASCII kept as is"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class json_array_contains(FunctionElement):
+    """
+    json_array_contains(column, value): true when the JSON array in column has
+    an element equal to value, e.g. alerts with a given fraud indicator. Uses
+    @> on PostgreSQL, which the GIN index on fraud_indicators serves.
+    """
+    type = Boolean()
+    name = 'json_array_contains'
+    inherit_cache = True
+
+
+@compiles(json_array_contains)
+def _array_contains_json1(element, compiler, **kw):
+    column, value = element.clauses
+    return (f"EXISTS (SELECT 1 FROM json_each({compiler.process(column, **kw)}) "
+            f"WHERE json_each.value = {compiler.process(value, **kw)})")
+
+
+@compiles(json_array_contains, 'postgresql')
+def _array_contains_jsonb(element, compiler, **kw):
+    column, value = element.clauses
+    return f"{compiler.process(column, **kw)} @> jsonb_build_array(CAST({compiler.process(value, **kw)} AS TEXT))"
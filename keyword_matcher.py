@@ -0,0 +1,99 @@
+import re
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern phrase matcher compiled once from weighted keyword families.
+
+    All phrases are folded into a single trie-shaped regular expression wrapped
+    in a lookahead, so one scan over the text reports every position where a
+    phrase starts (overlapping hits included) without a separate substring
+    search per phrase. Phrases are matched as plain substrings, exactly like
+    ``phrase in text``.
+    """
+
+    def __init__(self, families):
+        """
+        families: ordered mapping of family name -> list of lower-case phrases.
+        A phrase may belong to several families.
+        """
+        self.families = {name: list(phrases) for name, phrases in families.items()}
+
+        # phrase -> [(family, position within family), ...]
+        self._phrase_index = {}
+        for family, phrases in self.families.items():
+            for position, phrase in enumerate(phrases):
+                if phrase:
+                    self._phrase_index.setdefault(phrase, []).append((family, position))
+
+        phrases = sorted(self._phrase_index)
+
+        # The scan reports the longest phrase starting at each position; every
+        # shorter phrase starting there is necessarily one of its prefixes.
+        self._prefix_phrases = {
+            phrase: [other for other in phrases if phrase.startswith(other)]
+            for phrase in phrases
+        }
+
+        self._scanner = re.compile('(?=(' + self._build_pattern(phrases) + '))') if phrases else None
+
+    @staticmethod
+    def _build_pattern(phrases):
+        """Build a prefix-factored alternation so the regex engine walks a trie"""
+        trie = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = '(?:' + '|'.join(branches) + ')'
+            # Greedy optional keeps the longest phrase at each start position
+            return body + '?' if '' in node else body
+
+        return build(trie)
+
+    def find(self, text):
+        """
+        Return {family: [matched phrases in declaration order]} for every family
+        with at least one phrase present in text.
+        """
+        return self.scan(text)[0]
+
+    def scan(self, text, start=0, stop=None):
+        """
+        Return (hits, positions): the per-family hits described in find() and
+        {phrase: [start offsets]} for every occurrence, overlapping ones included.
+        Only occurrences starting in text[start:stop] are reported; they may
+        extend past stop.
+        """
+        positions = self.positions(text, start, stop)
+        return self.hits(positions), positions
+
+    def positions(self, text, start=0, stop=None):
+        """Return only the {phrase: [start offsets]} part of scan()"""
+        positions = {}
+        if self._scanner is None:
+            return positions
+
+        for match in self._scanner.finditer(text, start):
+            offset = match.start()
+            if stop is not None and offset >= stop:
+                break
+            for phrase in self._prefix_phrases[match.group(1)]:
+                positions.setdefault(phrase, []).append(offset)
+
+        return positions
+
+    def hits(self, phrases):
+        """Group found phrases into {family: [phrases in declaration order]}"""
+        hits = {}
+        for phrase in phrases:
+            for family, position in self._phrase_index[phrase]:
+                hits.setdefault(family, []).append((position, phrase))
+
+        return {family: [phrase for _, phrase in sorted(entries)] for family, entries in hits.items()}
@@ -1,27 +1,69 @@
-
 from app import app, db
 from models import User, OAuth, FraudAlert, Advisor, NetworkConnection, UserReport, AnalysisHistory
+from migrations import MIGRATIONS, applied_versions, run_migrations, explain_hot_queries
+import argparse
 import os
 
-def migrate_database():
-    """Migrate database to new schema with password authentication"""
+def reset_database():
+    """Drop every table and recreate the schema with sample data (destroys all data)"""
     with app.app_context():
-        print("Starting database migration...")
-        
+        print("Starting database reset...")
+
         # Drop all tables to recreate with new schema
         print("Dropping existing tables...")
         db.drop_all()
-        
-        # Create all tables with new schema
+        db.session.execute(db.text("DROP TABLE IF EXISTS schema_migrations"))
+        db.session.commit()
+
+        # Recreate the schema through the migrations
         print("Creating tables with new schema...")
-        db.create_all()
-        
+        run_migrations()
+
         # Initialize sample data
         print("Initializing sample data...")
         from models import init_sample_data
         init_sample_data()
-        
-        print("Database migration completed successfully!")
+
+        print("Database reset completed successfully!")
+
+def migrate_database():
+    """Apply pending schema migrations in place, keeping existing data"""
+    with app.app_context():
+        applied = run_migrations()
+        if applied:
+            print(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+        else:
+            print("Database schema is up to date.")
+
+def show_status():
+    with app.app_context():
+        done = applied_versions()
+        for version, name, _ in MIGRATIONS:
+            print(f"{'applied' if version in done else 'pending':>8}  {version:>3}  {name}")
+
+def show_query_plans():
+    """Print the planner's plan for each hot query; exits non-zero if one is not index-backed"""
+    with app.app_context():
+        missing = 0
+        for name, (uses_index, lines) in explain_hot_queries().items():
+            print(f"{'index' if uses_index else 'NO INDEX':>8}  {name}")
+            for line in lines:
+                print(f"          {line}")
+            missing += not uses_index
+        return missing
 
 if __name__ == '__main__':
-    migrate_database()
+    parser = argparse.ArgumentParser(description='Manage the fraud detection database schema')
+    parser.add_argument('--reset', action='store_true', help='drop all tables and reload sample data (destructive)')
+    parser.add_argument('--status', action='store_true', help='list applied and pending migrations')
+    parser.add_argument('--explain', action='store_true', help='show query plans for the dashboard queries')
+    args = parser.parse_args()
+
+    if args.reset:
+        reset_database()
+    elif args.status:
+        show_status()
+    elif args.explain:
+        raise SystemExit(1 if show_query_plans() else 0)
+    else:
+        migrate_database()
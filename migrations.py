@@ -0,0 +1,363 @@
+from models import FraudAlert, AnalysisHistory, NetworkConnection, Advisor, UserReport
+from app import db
+from json_columns import json_array_contains
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
+import alert_rollups
+import json
+import logging
+
+# Versioned, additive schema changes. Each migration runs once, in order, in
+# its own transaction, and is recorded in schema_migrations; the DDL is written
+# out here (not taken from models.py) so a migration keeps doing what it did
+# when it shipped. Nothing here drops or rewrites existing data.
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(function):
+        MIGRATIONS.append((version, name, function))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return function
+    return register
+
+
+# The tables as first shipped; {serial} and {timestamp} are filled in per dialect
+BASELINE_TABLES = (
+    "CREATE TABLE IF NOT EXISTS users ("
+    "id {serial} NOT NULL, "
+    "email VARCHAR(120) NOT NULL, "
+    "password_hash VARCHAR(255) NOT NULL, "
+    "first_name VARCHAR(50), "
+    "last_name VARCHAR(50), "
+    "profile_image_url VARCHAR, "
+    "is_active BOOLEAN, "
+    "created_at {timestamp}, "
+    "updated_at {timestamp}, "
+    "PRIMARY KEY (id), "
+    "UNIQUE (email))",
+
+    "CREATE TABLE IF NOT EXISTS flask_dance_oauth ("
+    "user_id INTEGER, "
+    "browser_session_key VARCHAR NOT NULL, "
+    "id {serial} NOT NULL, "
+    "provider VARCHAR(50) NOT NULL, "
+    "created_at {timestamp} NOT NULL, "
+    "token JSON NOT NULL, "
+    "PRIMARY KEY (id), "
+    "CONSTRAINT uq_user_browser_session_key_provider UNIQUE (user_id, browser_session_key, provider), "
+    "FOREIGN KEY (user_id) REFERENCES users (id))",
+
+    "CREATE TABLE IF NOT EXISTS fraud_alert ("
+    "id {serial} NOT NULL, "
+    "content_type VARCHAR(50) NOT NULL, "
+    "content TEXT NOT NULL, "
+    "risk_score FLOAT NOT NULL, "
+    "fraud_indicators TEXT, "
+    "severity VARCHAR(20) NOT NULL, "
+    "status VARCHAR(20), "
+    "source_platform VARCHAR(50), "
+    "created_at {timestamp}, "
+    "resolved_at {timestamp}, "
+    "PRIMARY KEY (id))",
+
+    "CREATE TABLE IF NOT EXISTS advisor ("
+    "id {serial} NOT NULL, "
+    "name VARCHAR(100) NOT NULL, "
+    "license_number VARCHAR(50) NOT NULL, "
+    "registration_date DATE NOT NULL, "
+    "status VARCHAR(20) NOT NULL, "
+    "firm_name VARCHAR(200), "
+    "contact_email VARCHAR(120), "
+    "contact_phone VARCHAR(20), "
+    "specializations TEXT, "
+    "verification_score FLOAT, "
+    "last_verified {timestamp}, "
+    "PRIMARY KEY (id), "
+    "UNIQUE (license_number))",
+
+    "CREATE TABLE IF NOT EXISTS network_connection ("
+    "id {serial} NOT NULL, "
+    "source_entity VARCHAR(100) NOT NULL, "
+    "target_entity VARCHAR(100) NOT NULL, "
+    "connection_type VARCHAR(50) NOT NULL, "
+    "strength FLOAT NOT NULL, "
+    "suspicious_score FLOAT NOT NULL, "
+    "detected_at {timestamp}, "
+    "evidence TEXT, "
+    "PRIMARY KEY (id))",
+
+    "CREATE TABLE IF NOT EXISTS user_report ("
+    "id {serial} NOT NULL, "
+    "reporter_email VARCHAR(120), "
+    "content_description TEXT NOT NULL, "
+    "content_url VARCHAR(500), "
+    "platform VARCHAR(50), "
+    "fraud_type VARCHAR(50), "
+    "amount_involved FLOAT, "
+    "status VARCHAR(20), "
+    "created_at {timestamp}, "
+    "investigated_at {timestamp}, "
+    "PRIMARY KEY (id))",
+
+    "CREATE TABLE IF NOT EXISTS analysis_history ("
+    "id {serial} NOT NULL, "
+    "content_hash VARCHAR(64) NOT NULL, "
+    "analysis_type VARCHAR(50) NOT NULL, "
+    "risk_score FLOAT NOT NULL, "
+    "analysis_result TEXT, "
+    "processing_time FLOAT, "
+    "created_at {timestamp}, "
+    "PRIMARY KEY (id))",
+)
+
+
+def _column_types(connection):
+    """Dialect spellings of an auto-increment integer key and a naive timestamp"""
+    if connection.dialect.name == 'postgresql':
+        return {'serial': 'SERIAL', 'timestamp': 'TIMESTAMP WITHOUT TIME ZONE'}
+    return {'serial': 'INTEGER', 'timestamp': 'DATETIME'}
+
+
+@migration(1, 'create missing tables')
+def _create_missing_tables(connection):
+    types = _column_types(connection)
+    for statement in BASELINE_TABLES:
+        connection.exec_driver_sql(statement.format(**types))
+
+
+# (index, table, columns) for the columns the dashboards filter and sort on
+HOT_COLUMN_INDEXES = (
+    ('ix_fraud_alert_status_created_at', 'fraud_alert', ('status', 'created_at')),
+    ('ix_fraud_alert_created_at_risk_score', 'fraud_alert', ('created_at', 'risk_score')),
+    ('ix_fraud_alert_risk_score', 'fraud_alert', ('risk_score',)),
+    ('ix_analysis_history_content_hash_type', 'analysis_history', ('content_hash', 'analysis_type')),
+    ('ix_network_connection_source_entity', 'network_connection', ('source_entity',)),
+    ('ix_network_connection_target_entity', 'network_connection', ('target_entity',)),
+    ('ix_network_connection_suspicious_score', 'network_connection', ('suspicious_score',)),
+    ('ix_network_connection_detected_at_score', 'network_connection', ('detected_at', 'suspicious_score')),
+    ('ix_advisor_status', 'advisor', ('status',)),
+)
+
+
+def _create_indexes(connection, indexes):
+    for name, table, columns in indexes:
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+@migration(2, 'indexes on hot filter and sort columns')
+def _add_hot_column_indexes(connection):
+    _create_indexes(connection, HOT_COLUMN_INDEXES)
+
+
+@migration(3, 'alert rollup table with backfill')
+def _add_alert_rollups(connection):
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS alert_rollup ("
+        "day DATE NOT NULL, "
+        "severity VARCHAR(20) NOT NULL, "
+        "status VARCHAR(20) NOT NULL, "
+        "risk_bucket VARCHAR(10) NOT NULL, "
+        "alert_count INTEGER NOT NULL, "
+        "PRIMARY KEY (day, severity, status, risk_bucket))"
+    )
+    alert_rollups.backfill(connection)
+
+
+# Keyset pagination of the alert and report lists, unfiltered and by filter
+PAGINATION_INDEXES = (
+    ('ix_fraud_alert_severity_created_at', 'fraud_alert', ('severity', 'created_at')),
+    ('ix_fraud_alert_source_platform_created_at', 'fraud_alert', ('source_platform', 'created_at')),
+    ('ix_user_report_created_at_id', 'user_report', ('created_at', 'id')),
+    ('ix_user_report_status_created_at', 'user_report', ('status', 'created_at')),
+)
+
+
+@migration(4, 'indexes for alert and report pagination')
+def _add_pagination_indexes(connection):
+    _create_indexes(connection, PAGINATION_INDEXES)
+
+
+# (table, column) of the JSON documents stored as text before migration 5
+JSON_COLUMNS = (
+    ('fraud_alert', 'fraud_indicators'),
+    ('advisor', 'specializations'),
+    ('network_connection', 'evidence'),
+    ('analysis_history', 'analysis_result'),
+    ('analysis_job', 'result'),
+)
+
+
+def _convert_json_column(connection, table, column):
+    """
+    Rewrite a JSON text column in compact form, keeping any row that is not
+    valid JSON as a JSON string; on PostgreSQL change it to JSONB. SQLite
+    keeps the TEXT column; JSON1 reads it. Skips a table that does not exist
+    yet and a column that is JSONB already.
+    """
+    inspector = db.inspect(connection)
+    if not inspector.has_table(table):
+        return
+    if connection.dialect.name == 'postgresql':
+        column_type = next(info['type'] for info in inspector.get_columns(table) if info['name'] == column)
+        if isinstance(column_type, JSONB):
+            return
+        rows = connection.exec_driver_sql(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL").all()
+        for row_id, value in rows:
+            try:
+                json.loads(value)
+            except ValueError:
+                connection.execute(db.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"),
+                                   {'value': json.dumps(value, ensure_ascii=False), 'id': row_id})
+        connection.exec_driver_sql(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb")
+    else:
+        connection.exec_driver_sql(
+            f"UPDATE {table} SET {column} = CASE WHEN json_valid({column}) THEN json({column}) "
+            f"ELSE json_quote({column}) END WHERE {column} IS NOT NULL"
+        )
+
+
+@migration(5, 'native JSON columns')
+def _convert_json_columns(connection):
+    """The JSON_COLUMNS as native JSON, with a GIN index for indicator lookups on PostgreSQL"""
+    for table, column in JSON_COLUMNS:
+        _convert_json_column(connection, table, column)
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_fraud_alert_fraud_indicators "
+            "ON fraud_alert USING GIN (fraud_indicators jsonb_path_ops)"
+        )
+
+
+@migration(6, 'analysis job table')
+def _add_analysis_jobs(connection):
+    types = _column_types(connection)
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS analysis_job ("
+        "id VARCHAR(32) NOT NULL, "
+        "user_id INTEGER, "
+        "status VARCHAR(20) NOT NULL, "
+        "content TEXT NOT NULL, "
+        "content_type VARCHAR(50) NOT NULL, "
+        "language VARCHAR(20) NOT NULL, "
+        "result TEXT, "
+        "error TEXT, "
+        "created_at {timestamp}, "
+        "started_at {timestamp}, "
+        "finished_at {timestamp}, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY (user_id) REFERENCES users (id))".format(**types)
+    )
+    _create_indexes(connection, (('ix_analysis_job_created_at', 'analysis_job', ('created_at',)),))
+
+
+@migration(7, 'native JSON job results')
+def _convert_job_results(connection):
+    # analysis_job is created by migration 6, after migration 5 ran on most databases
+    _convert_json_column(connection, 'analysis_job', 'result')
+
+
+def _ensure_migrations_table(connection):
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(200) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    )
+
+
+def applied_versions():
+    with db.engine.begin() as connection:
+        _ensure_migrations_table(connection)
+        return {row[0] for row in connection.exec_driver_sql("SELECT version FROM schema_migrations")}
+
+
+def run_migrations():
+    """Apply pending migrations in version order; returns the versions applied"""
+    done = applied_versions()
+    applied = []
+    for version, name, function in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with db.engine.begin() as connection:
+                function(connection)
+                connection.execute(
+                    db.text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                    {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+                )
+        except IntegrityError:
+            # Another process applied it first; its DDL is idempotent
+            if version in applied_versions():
+                continue
+            raise
+        logging.info(f"Applied schema migration {version}: {name}")
+        applied.append(version)
+    return applied
+
+
+def hot_queries():
+    """The dashboard, analyzer and network queries that should be index-backed, by name"""
+    now = datetime.utcnow()
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'active alerts ticker': db.select(FraudAlert).filter(
+            FraudAlert.status == 'active'
+        ).order_by(FraudAlert.created_at.desc()).limit(5),
+        'recent alerts': db.select(FraudAlert).order_by(FraudAlert.created_at.desc()).limit(10),
+        'high-risk alert count': db.select(db.func.count()).select_from(FraudAlert).filter(
+            FraudAlert.risk_score >= 7.0
+        ),
+        'daily alert count': db.select(db.func.count()).select_from(FraudAlert).filter(
+            FraudAlert.created_at >= day, FraudAlert.created_at < day + timedelta(days=1)
+        ),
+        'coordinated alerts': db.select(FraudAlert).filter(
+            FraudAlert.created_at >= now - timedelta(hours=24), FraudAlert.risk_score >= 6.0
+        ),
+        'cached analysis lookup': db.select(db.func.max(AnalysisHistory.id)).filter(
+            AnalysisHistory.content_hash.in_(['0' * 64, 'f' * 64]),
+            AnalysisHistory.analysis_type == 'text'
+        ).group_by(AnalysisHistory.content_hash),
+        'analysis export': db.select(AnalysisHistory).filter_by(content_hash='0' * 64).limit(1),
+        'network view': db.select(NetworkConnection).filter(
+            NetworkConnection.suspicious_score >= 5.0
+        ).order_by(NetworkConnection.detected_at.desc()).limit(50),
+        'entity connections': db.select(NetworkConnection).filter(
+            (NetworkConnection.source_entity == 'entity') | (NetworkConnection.target_entity == 'entity')
+        ),
+        'recent suspicious connections': db.select(NetworkConnection).filter(
+            NetworkConnection.detected_at >= now - timedelta(hours=24), NetworkConnection.suspicious_score >= 6.0
+        ),
+        'alert page': db.select(FraudAlert).filter(
+            FraudAlert.status == 'active',
+            db.tuple_(FraudAlert.created_at, FraudAlert.id) < (now, 2 ** 31)
+        ).order_by(FraudAlert.created_at.desc(), FraudAlert.id.desc()).limit(11),
+        'report page': db.select(UserReport).filter(
+            db.tuple_(UserReport.created_at, UserReport.id) < (now, 2 ** 31)
+        ).order_by(UserReport.created_at.desc(), UserReport.id.desc()).limit(21),
+        'alerts with indicator': db.select(FraudAlert.id).filter(
+            json_array_contains(FraudAlert.fraud_indicators, 'guaranteed_returns')
+        ).order_by(FraudAlert.created_at.desc()).limit(10),
+        'advisor status count': db.select(db.func.count()).select_from(Advisor).filter_by(status='active'),
+    }
+
+
+def explain_hot_queries():
+    """
+    Return {query name: (uses an index, plan lines)} from the database's own
+    planner: EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL. PostgreSQL
+    prefers sequential scans on small tables, so check it against real volumes.
+    """
+    dialect = db.engine.dialect
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    plans = {}
+    with db.engine.connect() as connection:
+        for name, query in hot_queries().items():
+            sql = str(query.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+            rows = connection.exec_driver_sql(prefix + sql).all()
+            lines = [str(row[-1]) for row in rows]
+            uses_index = any(' INDEX ' in line or 'Index Scan' in line or 'Index Only Scan' in line
+                             or 'Bitmap Index Scan' in line for line in lines)
+            plans[name] = (uses_index, lines)
+    return plans
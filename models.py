@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from json_columns import JSONDocument
 from flask_dance.consumer.storage.sqla import OAuthConsumerMixin
 from flask_login import UserMixin
 from sqlalchemy import UniqueConstraint
@@ -48,13 +49,30 @@ class FraudAlert(db.Model):
     content_type = db.Column(db.String(50), nullable=False)  # text, image, video, url
     content = db.Column(db.Text, nullable=False)
     risk_score = db.Column(db.Float, nullable=False)  # 1-10 scale
-    fraud_indicators = db.Column(db.Text)  # JSON string of detected patterns
+    fraud_indicators = db.Column(JSONDocument)  # list of detected patterns
     severity = db.Column(db.String(20), nullable=False)  # low, medium, high, critical
     status = db.Column(db.String(20), default='active')  # active, resolved, false_positive
     source_platform = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     resolved_at = db.Column(db.DateTime)
 
+    # Existing databases get these from migrations.py
+    __table_args__ = (
+        db.Index('ix_fraud_alert_status_created_at', 'status', 'created_at'),
+        db.Index('ix_fraud_alert_created_at_risk_score', 'created_at', 'risk_score'),
+        db.Index('ix_fraud_alert_risk_score', 'risk_score'),
+        db.Index('ix_fraud_alert_severity_created_at', 'severity', 'created_at'),
+        db.Index('ix_fraud_alert_source_platform_created_at', 'source_platform', 'created_at'),
+    )
+
+class AlertRollup(db.Model):
+    # FraudAlert counts per day, severity, status and risk bucket, kept current by alert_rollups.py
+    day = db.Column(db.Date, primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    risk_bucket = db.Column(db.String(10), primary_key=True)  # low, medium, high
+    alert_count = db.Column(db.Integer, nullable=False, default=0)
+
 class Advisor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -64,10 +82,14 @@ class Advisor(db.Model):
     firm_name = db.Column(db.String(200))
     contact_email = db.Column(db.String(120))
     contact_phone = db.Column(db.String(20))
-    specializations = db.Column(db.Text)  # JSON string
+    specializations = db.Column(JSONDocument)  # list of specializations
     verification_score = db.Column(db.Float, default=10.0)
     last_verified = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_advisor_status', 'status'),
+    )
+
 class NetworkConnection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     source_entity = db.Column(db.String(100), nullable=False)
@@ -76,7 +98,14 @@ class NetworkConnection(db.Model):
     strength = db.Column(db.Float, nullable=False)  # 0.0-1.0
     suspicious_score = db.Column(db.Float, nullable=False)  # 1-10 scale
     detected_at = db.Column(db.DateTime, default=datetime.utcnow)
-    evidence = db.Column(db.Text)  # JSON string of supporting evidence
+    evidence = db.Column(JSONDocument)  # supporting evidence
+
+    __table_args__ = (
+        db.Index('ix_network_connection_source_entity', 'source_entity'),
+        db.Index('ix_network_connection_target_entity', 'target_entity'),
+        db.Index('ix_network_connection_suspicious_score', 'suspicious_score'),
+        db.Index('ix_network_connection_detected_at_score', 'detected_at', 'suspicious_score'),
+    )
 
 class UserReport(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -90,15 +119,37 @@ class UserReport(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     investigated_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_user_report_created_at_id', 'created_at', 'id'),
+        db.Index('ix_user_report_status_created_at', 'status', 'created_at'),
+    )
+
 class AnalysisHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content_hash = db.Column(db.String(64), nullable=False)
     analysis_type = db.Column(db.String(50), nullable=False)
     risk_score = db.Column(db.Float, nullable=False)
-    analysis_result = db.Column(db.Text)  # JSON string of detailed results
+    analysis_result = db.Column(JSONDocument)  # detailed results
     processing_time = db.Column(db.Float)  # seconds
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_analysis_history_content_hash_type', 'content_hash', 'analysis_type'),
+    )
+
+class AnalysisJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, handed to the client
+    user_id = db.Column(db.Integer, db.ForeignKey(User.id))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    content = db.Column(db.Text, nullable=False)
+    content_type = db.Column(db.String(50), nullable=False)
+    language = db.Column(db.String(20), nullable=False)
+    result = db.Column(JSONDocument)  # the handler's result
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
 
 def init_sample_data():
     """Initialize sample data for testing"""
@@ -108,7 +159,7 @@ def init_sample_data():
                 content_type='text',
                 content='🚀 GUARANTEED 50% RETURNS in just 30 days! Join our exclusive WhatsApp group now! Only 100 spots left! Call +91-9999888777 immediately!',
                 risk_score=9.2,
-                fraud_indicators='["guaranteed_returns", "urgency_language", "limited_spots", "contact_pressure", "unrealistic_returns"]',
+                fraud_indicators=['guaranteed_returns', 'urgency_language', 'limited_spots', 'contact_pressure', 'unrealistic_returns'],
                 severity='critical',
                 source_platform='whatsapp'
             ),
@@ -116,7 +167,7 @@ def init_sample_data():
                 content_type='text',
                 content='💰 Double your money in 60 days! SEBI approved scheme (fake registration INA999999999). Invest ₹1 lakh, get ₹2 lakh back guaranteed!',
                 risk_score=8.7,
-                fraud_indicators='["double_money_promise", "fake_sebi_registration", "guaranteed_returns", "specific_amounts"]',
+                fraud_indicators=['double_money_promise', 'fake_sebi_registration', 'guaranteed_returns', 'specific_amounts'],
                 severity='critical',
                 source_platform='telegram'
             ),
@@ -124,7 +175,7 @@ def init_sample_data():
                 content_type='url',
                 content='Investment platform offering 25% monthly returns with celebrity endorsements. Website: quick-rich-trading.tk',
                 risk_score=7.8,
-                fraud_indicators='["suspicious_domain", "unrealistic_returns", "celebrity_endorsement", "monthly_returns"]',
+                fraud_indicators=['suspicious_domain', 'unrealistic_returns', 'celebrity_endorsement', 'monthly_returns'],
                 severity='high',
                 source_platform='facebook'
             ),
@@ -132,7 +183,7 @@ def init_sample_data():
                 content_type='text',
                 content='Join our crypto trading group! Learn from professionals. Start with just ₹5000. Call Raj sir: +91-8888777666',
                 risk_score=6.4,
-                fraud_indicators='["crypto_trading", "minimum_investment", "personal_contact", "educational_pretext"]',
+                fraud_indicators=['crypto_trading', 'minimum_investment', 'personal_contact', 'educational_pretext'],
                 severity='medium',
                 source_platform='instagram'
             ),
@@ -140,7 +191,7 @@ def init_sample_data():
                 content_type='text',
                 content='Stock tips that never fail! 90% success rate. WhatsApp group link: wa.me/g/fake-tips-group',
                 risk_score=5.9,
-                fraud_indicators='["stock_tips", "success_rate_claims", "whatsapp_group", "never_fail_promise"]',
+                fraud_indicators=['stock_tips', 'success_rate_claims', 'whatsapp_group', 'never_fail_promise'],
                 severity='medium',
                 source_platform='twitter'
             ),
@@ -148,7 +199,7 @@ def init_sample_data():
                 content_type='url',
                 content='Binary options trading platform with "foolproof" strategy. No KYC required, instant withdrawals.',
                 risk_score=7.2,
-                fraud_indicators='["binary_options", "foolproof_strategy", "no_kyc", "instant_withdrawals"]',
+                fraud_indicators=['binary_options', 'foolproof_strategy', 'no_kyc', 'instant_withdrawals'],
                 severity='high',
                 source_platform='youtube'
             )
@@ -167,7 +218,7 @@ def init_sample_data():
                 firm_name='Kumar Investment Advisory Services',
                 contact_email='rajesh@kumaradvisory.com',
                 contact_phone='+91-9876543210',
-                specializations='["Mutual Funds", "Portfolio Management", "Retirement Planning"]',
+                specializations=['Mutual Funds', 'Portfolio Management', 'Retirement Planning'],
                 risk_score=1.2
             ),
             Advisor(
@@ -178,7 +229,7 @@ def init_sample_data():
                 firm_name='Sharma Financial Consultants',
                 contact_email='priya@sharmafc.in',
                 contact_phone='+91-9876543211',
-                specializations='["Equity Research", "Tax Planning", "Insurance Advisory"]',
+                specializations=['Equity Research', 'Tax Planning', 'Insurance Advisory'],
                 risk_score=1.8
             ),
             Advisor(
@@ -189,7 +240,7 @@ def init_sample_data():
                 firm_name='Patel Wealth Management',
                 contact_email='amit@patelwealth.com',
                 contact_phone='+91-9876543212',
-                specializations='["Wealth Management", "Estate Planning", "Alternative Investments"]',
+                specializations=['Wealth Management', 'Estate Planning', 'Alternative Investments'],
                 risk_score=0.9
             ),
             Advisor(
@@ -200,7 +251,7 @@ def init_sample_data():
                 firm_name='Mehta Financial Solutions',
                 contact_email='sunita@mehtafs.com',
                 contact_phone='+91-9876543213',
-                specializations='["Personal Finance", "Mutual Funds"]',
+                specializations=['Personal Finance', 'Mutual Funds'],
                 risk_score=6.7
             ),
             Advisor(
@@ -211,7 +262,7 @@ def init_sample_data():
                 firm_name='Singh Investment Group',
                 contact_email='vikram@singhinvest.com',
                 contact_phone='+91-9876543214',
-                specializations='["Stock Trading", "Derivatives"]',
+                specializations=['Stock Trading', 'Derivatives'],
                 risk_score=9.1
             )
         ]
@@ -317,21 +368,21 @@ def init_sample_data():
                 content_hash='a1b2c3d4e5f6',
                 analysis_type='text',
                 risk_score=8.5,
-                analysis_result='{"risk_score": 8.5, "indicators": ["guaranteed_returns", "urgency_language"], "recommendation": "block_immediately"}',
+                analysis_result={'risk_score': 8.5, 'indicators': ['guaranteed_returns', 'urgency_language'], 'recommendation': 'block_immediately'},
                 processing_time=0.45
             ),
             AnalysisHistory(
                 content_hash='f6e5d4c3b2a1',
                 analysis_type='url',
                 risk_score=6.2,
-                analysis_result='{"risk_score": 6.2, "indicators": ["suspicious_domain"], "recommendation": "high_caution"}',
+                analysis_result={'risk_score': 6.2, 'indicators': ['suspicious_domain'], 'recommendation': 'high_caution'},
                 processing_time=0.32
             ),
             AnalysisHistory(
                 content_hash='1a2b3c4d5e6f',
                 analysis_type='text',
                 risk_score=3.1,
-                analysis_result='{"risk_score": 3.1, "indicators": [], "recommendation": "safe_to_proceed"}',
+                analysis_result={'risk_score': 3.1, 'indicators': [], 'recommendation': 'safe_to_proceed'},
                 processing_time=0.28
             )
         ]
@@ -1,13 +1,19 @@
-from models import NetworkConnection, FraudAlert
+from models import NetworkConnection
 from app import db
-from datetime import datetime, timedelta
-import random
-import json
+from network_index import NetworkIndex
+from coordination_window import CoordinationWindow
+
+# Weight of a connection one hop farther out in neighborhood risk
+HOP_DECAY = 0.5
 
 class NetworkAnalyzer:
     def __init__(self):
         # Initialize with some mock network data
         self._initialize_mock_network_data()
+        # Connection graph, loaded on first use and kept current
+        self.index = NetworkIndex(suspicious_score=5.0, high_risk_score=8.0, hub_degree=3)
+        # Recent alerts and connections for coordination checks, read incrementally
+        self.activity = CoordinationWindow(min_alert_risk=6.0, min_connection_score=6.0)
     
     def _initialize_mock_network_data(self):
         """Initialize mock network connection data"""
@@ -23,7 +29,7 @@ class NetworkAnalyzer:
                 'connection_type': 'financial',
                 'strength': 0.9,
                 'suspicious_score': 8.5,
-                'evidence': '{"shared_bank_accounts": true, "same_ip_addresses": true, "coordinated_messaging": true}'
+                'evidence': {'shared_bank_accounts': True, 'same_ip_addresses': True, 'coordinated_messaging': True}
             },
             {
                 'source_entity': 'fake_company_A',
@@ -31,7 +37,7 @@ class NetworkAnalyzer:
                 'connection_type': 'ownership',
                 'strength': 0.95,
                 'suspicious_score': 9.2,
-                'evidence': '{"same_directors": true, "shared_office_address": true, "identical_website_templates": true}'
+                'evidence': {'same_directors': True, 'shared_office_address': True, 'identical_website_templates': True}
             },
             {
                 'source_entity': 'fake_advisor_2@email.com',
@@ -39,7 +45,7 @@ class NetworkAnalyzer:
                 'connection_type': 'communication',
                 'strength': 0.8,
                 'suspicious_score': 7.8,
-                'evidence': '{"frequent_communication": true, "coordinated_posts": true, "shared_content": true}'
+                'evidence': {'frequent_communication': True, 'coordinated_posts': True, 'shared_content': True}
             },
             {
                 'source_entity': 'suspicious_whatsapp_group_1',
@@ -47,7 +53,7 @@ class NetworkAnalyzer:
                 'connection_type': 'communication',
                 'strength': 0.85,
                 'suspicious_score': 8.0,
-                'evidence': '{"admin_role": true, "mass_messaging": true, "investment_promotions": true}'
+                'evidence': {'admin_role': True, 'mass_messaging': True, 'investment_promotions': True}
             },
             {
                 'source_entity': 'suspicious_whatsapp_group_1',
@@ -55,7 +61,7 @@ class NetworkAnalyzer:
                 'connection_type': 'communication',
                 'strength': 0.7,
                 'suspicious_score': 7.2,
-                'evidence': '{"member_role": true, "content_sharing": true, "referral_activities": true}'
+                'evidence': {'member_role': True, 'content_sharing': True, 'referral_activities': True}
             },
             {
                 'source_entity': 'fake_company_C',
@@ -63,7 +69,7 @@ class NetworkAnalyzer:
                 'connection_type': 'financial',
                 'strength': 0.9,
                 'suspicious_score': 9.5,
-                'evidence': '{"large_transfers": true, "frequent_transactions": true, "tax_haven_location": true}'
+                'evidence': {'large_transfers': True, 'frequent_transactions': True, 'tax_haven_location': True}
             },
             {
                 'source_entity': 'fake_advisor_3@email.com',
@@ -71,7 +77,7 @@ class NetworkAnalyzer:
                 'connection_type': 'financial',
                 'strength': 0.75,
                 'suspicious_score': 8.3,
-                'evidence': '{"commission_payments": true, "undisclosed_relationship": true, "conflict_of_interest": true}'
+                'evidence': {'commission_payments': True, 'undisclosed_relationship': True, 'conflict_of_interest': True}
             }
         ]
         
@@ -87,6 +93,8 @@ class NetworkAnalyzer:
         """
         analysis_result = {
             'clusters_found': 0,
+            'clusters': [],
+            'entity_rankings': [],
             'suspicious_entities': [],
             'connection_strength': 0.0,
             'risk_assessment': 'low',
@@ -103,30 +111,27 @@ class NetworkAnalyzer:
     
     def _analyze_entity_network(self, entity_id, result):
         """Analyze network for a specific entity"""
-        # Find all connections for this entity
-        connections = NetworkConnection.query.filter(
-            (NetworkConnection.source_entity == entity_id) |
-            (NetworkConnection.target_entity == entity_id)
-        ).all()
+        # Find all connections for this entity: (source, target, strength, suspicious score)
+        connections = self.index.entity_connections(entity_id)
         
         if not connections:
             result['network_insights'].append(f'No network connections found for {entity_id}')
             return result
         
         # Calculate average connection strength and suspicious score
-        total_strength = sum(conn.strength for conn in connections)
-        total_suspicious = sum(conn.suspicious_score for conn in connections)
+        total_strength = sum(strength for _, _, strength, _ in connections)
+        total_suspicious = sum(score for _, _, _, score in connections)
         
         result['connection_strength'] = total_strength / len(connections)
         avg_suspicious_score = total_suspicious / len(connections)
         
         # Identify connected entities
         connected_entities = set()
-        for conn in connections:
-            if conn.source_entity != entity_id:
-                connected_entities.add(conn.source_entity)
-            if conn.target_entity != entity_id:
-                connected_entities.add(conn.target_entity)
+        for source, target, _, _ in connections:
+            if source != entity_id:
+                connected_entities.add(source)
+            if target != entity_id:
+                connected_entities.add(target)
         
         result['suspicious_entities'] = list(connected_entities)
         
@@ -150,40 +155,99 @@ class NetworkAnalyzer:
         
         return result
     
+    def analyze_entity_neighborhood(self, entity_id, max_depth=2, max_fanout=50, connection_types=None, min_score=0.0):
+        """
+        Analyze everything within max_depth hops of an entity, where rings sit
+        behind shell companies and groups; risk from farther hops counts for less
+        """
+        result = {
+            'entity': entity_id,
+            'max_depth': max_depth,
+            'entities': [],
+            'entities_by_hop': {},
+            'connections_followed': 0,
+            'decayed_risk': 0.0,
+            'max_risk': 0.0,
+            'truncated': False,
+            'risk_assessment': 'low',
+            'network_insights': [],
+            'recommended_actions': []
+        }
+
+        neighborhood = self.index.neighborhood(
+            entity_id, max_depth=max_depth, max_fanout=max_fanout, connection_types=connection_types,
+            min_score=min_score, decay=HOP_DECAY
+        )
+        if not neighborhood or not neighborhood['entities']:
+            result['network_insights'].append(f'No network connections found for {entity_id}')
+            return result
+
+        entities = neighborhood['entities']
+        by_hop = {}
+        for item in entities:
+            by_hop[item['hops']] = by_hop.get(item['hops'], 0) + 1
+        high_risk = [item['entity'] for item in entities if item['suspicious_score'] >= 8.0]
+        decayed_risk = neighborhood['decayed_risk']
+
+        result.update({
+            'entities': entities,
+            'entities_by_hop': by_hop,
+            'connections_followed': neighborhood['connections'],
+            'decayed_risk': decayed_risk,
+            'max_risk': neighborhood['max_risk'],
+            'truncated': neighborhood['truncated']
+        })
+
+        if decayed_risk >= 8.0 and len(entities) >= 3:
+            result['risk_assessment'] = 'critical'
+            result['recommended_actions'].append('Immediate investigation of the whole ring required')
+            result['recommended_actions'].append('Block all associated accounts')
+        elif decayed_risk >= 6.0 or len(high_risk) >= 3:
+            result['risk_assessment'] = 'high'
+            result['recommended_actions'].append('Investigate high-risk entities in the neighborhood')
+        elif decayed_risk >= 4.0:
+            result['risk_assessment'] = 'medium'
+            result['recommended_actions'].append('Regular monitoring advised')
+
+        for hops in sorted(by_hop):
+            result['network_insights'].append(f'{by_hop[hops]} entities at {hops} hop{"s" if hops > 1 else ""}')
+        result['network_insights'].append(f'{len(high_risk)} entities reached through connections scoring 8+')
+        result['network_insights'].append(f'Hop-weighted suspicious score: {decayed_risk:.2f}')
+        if neighborhood['truncated']:
+            result['network_insights'].append('Fan-out limit reached; only the most suspicious connections were followed')
+
+        return result
+    
+    def rank_entities(self, limit=20, order_by='pagerank'):
+        """
+        Entities ranked by PageRank, degree or betweenness over connections
+        weighted by strength x suspicious score
+        """
+        return self.index.centrality(limit=limit, order_by=order_by)
+    
     def _analyze_global_network(self, result):
         """Analyze the entire network for suspicious patterns"""
-        all_connections = NetworkConnection.query.filter(
-            NetworkConnection.suspicious_score >= 5.0
-        ).all()
+        # Suspicious (score >= 5) connection counts, kept by the index
+        summary = self.index.suspicious_summary()
         
-        if not all_connections:
+        if not summary['connections']:
             result['network_insights'].append('No suspicious connections found in network')
             return result
         
-        # Build entity frequency map
-        entity_frequency = {}
-        high_risk_entities = []
-        
-        for conn in all_connections:
-            # Count how often each entity appears in suspicious connections
-            entity_frequency[conn.source_entity] = entity_frequency.get(conn.source_entity, 0) + 1
-            entity_frequency[conn.target_entity] = entity_frequency.get(conn.target_entity, 0) + 1
-            
-            # Identify high-risk entities
-            if conn.suspicious_score >= 8.0:
-                if conn.source_entity not in high_risk_entities:
-                    high_risk_entities.append(conn.source_entity)
-                if conn.target_entity not in high_risk_entities:
-                    high_risk_entities.append(conn.target_entity)
+        # Entities in connections scoring 8+, and entities in 3+ suspicious connections (potential hubs)
+        high_risk_entities = summary['high_risk_entities']
+        hub_count = summary['hubs']
         
-        # Find entities that appear in multiple suspicious connections (potential hubs)
-        suspicious_hubs = [entity for entity, count in entity_frequency.items() if count >= 3]
+        # Groups of entities linked by suspicious connections
+        result['clusters_found'] = summary['clusters']
+        result['clusters'] = self.index.clusters(limit=10)
         
-        result['clusters_found'] = len(suspicious_hubs)
-        result['suspicious_entities'] = high_risk_entities
+        # The most central entities first, rather than every endpoint of an 8+ connection
+        result['entity_rankings'] = self.index.centrality(limit=10)
+        result['suspicious_entities'] = [ranking['entity'] for ranking in result['entity_rankings']]
         
         # Calculate overall network risk
-        avg_suspicious_score = sum(conn.suspicious_score for conn in all_connections) / len(all_connections)
+        avg_suspicious_score = summary['score_sum'] / summary['connections']
         
         if avg_suspicious_score >= 8.0:
             result['risk_assessment'] = 'critical'
@@ -193,13 +257,21 @@ class NetworkAnalyzer:
             result['risk_assessment'] = 'medium'
         
         # Generate insights
-        result['network_insights'].append(f'Analyzed {len(all_connections)} suspicious connections')
-        result['network_insights'].append(f'Found {len(suspicious_hubs)} potential fraud hubs')
+        result['network_insights'].append(f'Analyzed {summary["connections"]} suspicious connections')
+        result['network_insights'].append(f'Found {summary["clusters"]} connected clusters')
+        if result['clusters']:
+            largest = result['clusters'][0]
+            result['network_insights'].append(
+                f'Largest cluster: {largest["size"]} entities, average suspicious score {largest["average_score"]:.2f}'
+            )
+        result['network_insights'].append(f'Found {hub_count} potential fraud hubs')
         result['network_insights'].append(f'Identified {len(high_risk_entities)} high-risk entities')
+        if result['entity_rankings']:
+            result['network_insights'].append(f'Most central entity: {result["entity_rankings"][0]["entity"]}')
         result['network_insights'].append(f'Overall network risk score: {avg_suspicious_score:.2f}')
         
         # Generate recommendations
-        if len(suspicious_hubs) > 0:
+        if hub_count > 0:
             result['recommended_actions'].append('Investigate identified fraud hubs immediately')
             result['recommended_actions'].append('Monitor all entities connected to hubs')
         
@@ -213,63 +285,4 @@ class NetworkAnalyzer:
         """
         Detect coordinated fraudulent activity within a time window
         """
-        time_threshold = datetime.utcnow() - timedelta(hours=time_window_hours)
-        
-        # Get recent fraud alerts
-        recent_alerts = FraudAlert.query.filter(
-            FraudAlert.created_at >= time_threshold,
-            FraudAlert.risk_score >= 6.0
-        ).all()
-        
-        # Get recent network connections
-        recent_connections = NetworkConnection.query.filter(
-            NetworkConnection.detected_at >= time_threshold,
-            NetworkConnection.suspicious_score >= 6.0
-        ).all()
-        
-        coordination_indicators = {
-            'simultaneous_alerts': len(recent_alerts),
-            'new_connections': len(recent_connections),
-            'coordination_score': 0.0,
-            'risk_level': 'low',
-            'evidence': []
-        }
-        
-        # Calculate coordination score
-        if len(recent_alerts) >= 3:
-            coordination_indicators['coordination_score'] += 3.0
-            coordination_indicators['evidence'].append(f'{len(recent_alerts)} fraud alerts in {time_window_hours} hours')
-        
-        if len(recent_connections) >= 2:
-            coordination_indicators['coordination_score'] += 2.0
-            coordination_indicators['evidence'].append(f'{len(recent_connections)} new suspicious connections detected')
-        
-        # Check for entities appearing in both alerts and connections
-        alert_entities = set()
-        for alert in recent_alerts:
-            # Extract potential entity identifiers from alert content
-            import re
-            emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', alert.content)
-            phones = re.findall(r'\b\d{10}\b', alert.content)
-            alert_entities.update(emails)
-            alert_entities.update(phones)
-        
-        connection_entities = set()
-        for conn in recent_connections:
-            connection_entities.add(conn.source_entity)
-            connection_entities.add(conn.target_entity)
-        
-        overlap = alert_entities.intersection(connection_entities)
-        if overlap:
-            coordination_indicators['coordination_score'] += len(overlap) * 2.0
-            coordination_indicators['evidence'].append(f'Entities appear in both alerts and network connections: {list(overlap)}')
-        
-        # Determine risk level
-        if coordination_indicators['coordination_score'] >= 7.0:
-            coordination_indicators['risk_level'] = 'critical'
-        elif coordination_indicators['coordination_score'] >= 4.0:
-            coordination_indicators['risk_level'] = 'high'
-        elif coordination_indicators['coordination_score'] >= 2.0:
-            coordination_indicators['risk_level'] = 'medium'
-        
-        return coordination_indicators
+        return self.activity.detect(time_window_hours)
@@ -0,0 +1,605 @@
+from models import NetworkConnection
+from app import db
+from response_cache import call_on_commit
+from array import array
+from sqlalchemy import event
+import logging
+import numpy as np
+import threading
+import time
+
+
+class NetworkIndex:
+    """
+    In-memory adjacency index of NetworkConnection, built once per process on
+    first use and kept current, so network analyses do not query the table on
+    every call.
+
+    Entities and connection types are interned to dense integer ids. Edge
+    attributes live in parallel arrays indexed by edge number, and every
+    entity keeps the numbers of the edges it touches, re-sorted by suspicious
+    score (highest first) when a traversal needs them after new edges. The
+    suspicious-connection counts the global analysis reports, and a union-find
+    of the clusters suspicious connections form, are maintained as edges are
+    added.
+
+    Connections this process inserts are read in (by id) on the first call
+    after their transaction commits; a local update or delete rebuilds the
+    index on the next call. Rows other processes insert are picked up once the
+    index is max_age seconds old, their updates and deletes by invalidate().
+    New rows are found by id, so a row committed after one with a higher id
+    waits for the next rebuild.
+    """
+
+    # Growth in connections (as a share) before centrality() re-estimates betweenness
+    BETWEENNESS_REUSE = 0.05
+
+    def __init__(self, suspicious_score=5.0, high_risk_score=8.0, hub_degree=3, max_age=30.0):
+        self.suspicious_score = suspicious_score
+        self.high_risk_score = high_risk_score
+        self.hub_degree = hub_degree
+        self.max_age = max_age
+
+        self._lock = threading.RLock()
+        self._built = False
+        self._stale = False  # rebuild on the next call
+        self._new_rows = False  # read rows after _last_id on the next call
+        self._synced_at = 0.0
+        self._last_id = 0
+        self._reset()
+
+        self.rebuilds = 0
+        self.syncs = 0
+
+        # Last PageRank vector, the warm start while only new edges arrive
+        self._pagerank = None  # (rebuild count, edge count, scores per entity id)
+        self._betweenness = None  # (rebuild count, edge count, samples, seed, scores per entity id)
+
+        event.listen(NetworkConnection, 'after_insert', self._row_inserted)
+        event.listen(NetworkConnection, 'after_update', self._row_changed)
+        event.listen(NetworkConnection, 'after_delete', self._row_changed)
+
+    def entity_connections(self, entity):
+        """[(source, target, strength, suspicious score)] of entity's connections, oldest first"""
+        with self._lock:
+            self._ensure_current()
+            entity_id = self._entity_ids.get(entity)
+            if entity_id is None:
+                return []
+            names = self._entities
+            return [
+                (names[self._sources[edge]], names[self._targets[edge]], self._strengths[edge], self._scores[edge])
+                for edge in sorted(self._edges[entity_id])
+            ]
+
+    def neighborhood(self, entity, max_depth=2, max_fanout=50, connection_types=None, min_score=0.0,
+                     decay=0.5, max_entities=5000):
+        """
+        Entities within max_depth hops of entity, breadth first, over
+        connections of the given types (any when None) scoring at least
+        min_score. Each entity follows at most its max_fanout highest-scoring
+        such connections, and the walk stops adding entities at max_entities.
+
+        A connection first reached at hop h weighs decay ** (h - 1). Returns
+        None for an unknown entity, else a dict with 'entities' (entity, hops,
+        via, connection_type, suspicious_score and risk, the best decayed score
+        of a connection reaching it, nearest first), 'connections' followed,
+        'decayed_risk' (their weighted mean score), 'max_risk' and 'truncated'
+        (whether a fan-out or entity limit cut the walk short).
+        """
+        with self._lock:
+            self._ensure_current()
+            start = self._entity_ids.get(entity)
+            if start is None:
+                return None
+            type_ids = None
+            if connection_types is not None:
+                type_ids = {self._type_ids[name] for name in connection_types if name in self._type_ids}
+
+            hops = {start: 0}
+            reached = {}  # entity id -> (via entity id, edge, risk)
+            followed = set()
+            weighted_sum = weight_total = max_risk = 0.0
+            truncated = False
+            frontier = [start]
+            for depth in range(1, max_depth + 1):
+                weight = decay ** (depth - 1)
+                next_frontier = []
+                for node in frontier:
+                    taken = 0
+                    for edge in self._ranked_edges(node):
+                        score = self._scores[edge]
+                        if score < min_score:
+                            break
+                        if type_ids is not None and self._types[edge] not in type_ids:
+                            continue
+                        if taken == max_fanout:
+                            truncated = True
+                            break
+                        taken += 1
+
+                        if edge not in followed:
+                            followed.add(edge)
+                            weighted_sum += score * weight
+                            weight_total += weight
+                        other = self._targets[edge] if self._sources[edge] == node else self._sources[edge]
+                        if other == node:
+                            continue
+                        risk = score * weight
+                        max_risk = max(max_risk, risk)
+                        if other not in hops:
+                            if len(reached) >= max_entities:
+                                truncated = True
+                                continue
+                            hops[other] = depth
+                            reached[other] = (node, edge, risk)
+                            next_frontier.append(other)
+                        elif other in reached and hops[other] == depth and risk > reached[other][2]:
+                            reached[other] = (node, edge, risk)
+                frontier = next_frontier
+                if not frontier:
+                    break
+
+            names = self._entities
+            entities = [{
+                'entity': names[entity_id],
+                'hops': hops[entity_id],
+                'via': names[via],
+                'connection_type': self._type_names[self._types[edge]],
+                'suspicious_score': self._scores[edge],
+                'risk': risk
+            } for entity_id, (via, edge, risk) in reached.items()]
+            entities.sort(key=lambda item: (item['hops'], -item['risk']))
+            return {
+                'entity': entity,
+                'entities': entities,
+                'connections': len(followed),
+                'decayed_risk': weighted_sum / weight_total if weight_total else 0.0,
+                'max_risk': max_risk,
+                'truncated': truncated
+            }
+
+    def suspicious_summary(self):
+        """
+        Counts over connections scoring at least suspicious_score: connections,
+        score_sum, hubs (entities in hub_degree or more of them) and
+        high_risk_entities (endpoints of connections scoring at least
+        high_risk_score, in the order they appeared)
+        """
+        with self._lock:
+            self._ensure_current()
+            return {
+                'connections': self._suspicious_count,
+                'score_sum': self._suspicious_score_sum,
+                'hubs': self._hub_count,
+                'clusters': self._cluster_count,
+                'high_risk_entities': [self._entities[entity_id] for entity_id in self._high_risk]
+            }
+
+    def clusters(self, min_size=2, limit=None, sample=10):
+        """
+        Connected components of the suspicious connections with at least
+        min_size entities, largest first: size, connections, density (share of
+        possible entity pairs connected), average_score and up to sample
+        entities, most connected first
+        """
+        with self._lock:
+            self._ensure_current()
+            if self._components is None:
+                members = {}
+                for entity_id in range(len(self._entities)):
+                    root = self._find(entity_id)
+                    if self._component_size[root] > 1:
+                        members.setdefault(root, []).append(entity_id)
+                self._components = sorted(
+                    members.items(), key=lambda item: (-len(item[1]), -self._component_edges[item[0]], item[0])
+                )
+
+            clusters = []
+            for root, entity_ids in self._components:
+                if len(entity_ids) < min_size or (limit is not None and len(clusters) == limit):
+                    break
+                entity_ids = sorted(entity_ids, key=lambda entity_id: -self._suspicious_degree[entity_id])
+                clusters.append(self._cluster_stats(
+                    len(entity_ids), self._component_edges[root], self._component_score[root],
+                    [self._entities[entity_id] for entity_id in entity_ids[:sample]]
+                ))
+            return clusters
+
+    def communities(self, min_score=None, min_size=2, limit=None, sample=10, max_iterations=20, seed=0):
+        """
+        Communities within the connections scoring at least min_score (default
+        suspicious_score), found by label propagation weighted by connection
+        strength, so one cluster can split into tightly-knit rings. Each round
+        every entity takes the label with the most strength among its
+        neighbours (smallest label on ties), half of them at random per round
+        so labels settle instead of oscillating. Returns the same per-community
+        statistics as clusters(), plus 'iterations' and 'converged'.
+        """
+        min_score = self.suspicious_score if min_score is None else min_score
+        with self._lock:
+            self._ensure_current()
+            sources = np.array(self._sources, dtype=np.int64)
+            targets = np.array(self._targets, dtype=np.int64)
+            strengths = np.array(self._strengths, dtype=np.float64)
+            scores = np.array(self._scores, dtype=np.float64)
+            names = list(self._entities)
+
+        keep = (scores >= min_score) & (sources != targets)
+        sources, targets, strengths, scores = sources[keep], targets[keep], strengths[keep], scores[keep]
+        entity_ids = np.unique(np.concatenate((sources, targets)))
+        size = len(entity_ids)
+        # Dense 0..size-1 node numbers for the entities these connections touch
+        sources = np.searchsorted(entity_ids, sources)
+        targets = np.searchsorted(entity_ids, targets)
+
+        nodes = np.concatenate((sources, targets))
+        neighbours = np.concatenate((targets, sources))
+        weights = np.concatenate((strengths, strengths))
+        labels = np.arange(size, dtype=np.int64)
+        random = np.random.default_rng(seed)
+        iterations = 0
+        converged = size == 0
+        while not converged and iterations < max_iterations:
+            iterations += 1
+            # Strength per (node, neighbour label), sorted by node then label
+            keys = nodes * size + labels[neighbours]
+            order = np.argsort(keys)
+            keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            totals = np.add.reduceat(weights[order], starts)
+            keys = keys[starts]
+            key_nodes, key_labels = keys // size, keys % size
+
+            # The heaviest label per node, the smallest of equal ones
+            node_starts = np.flatnonzero(np.r_[True, key_nodes[1:] != key_nodes[:-1]])
+            heaviest = np.maximum.reduceat(totals, node_starts)
+            candidates = np.flatnonzero(totals == np.repeat(heaviest, np.diff(np.r_[node_starts, len(keys)])))
+            first = candidates[np.r_[True, key_nodes[candidates][1:] != key_nodes[candidates][:-1]]]
+            best = labels.copy()
+            best[key_nodes[first]] = key_labels[first]
+
+            changed = best != labels
+            if not changed.any():
+                converged = True
+                break
+            changed &= random.random(size) < 0.5
+            labels[changed] = best[changed]
+
+        internal = labels[sources] == labels[targets]
+        sizes = np.bincount(labels, minlength=size)
+        edges = np.bincount(labels[sources][internal], minlength=size)
+        score_sums = np.bincount(labels[sources][internal], weights=scores[internal], minlength=size)
+        order = sorted((label for label in np.nonzero(sizes >= min_size)[0]),
+                       key=lambda label: (-sizes[label], -edges[label], label))
+        if limit is not None:
+            order = order[:limit]
+
+        degrees = np.bincount(np.concatenate((sources, targets))[np.concatenate((internal, internal))], minlength=size)
+        communities = []
+        for label in order:
+            members = np.nonzero(labels == label)[0]
+            members = members[np.argsort(-degrees[members], kind='stable')][:sample]
+            communities.append(self._cluster_stats(
+                int(sizes[label]), int(edges[label]), float(score_sums[label]),
+                [names[entity_ids[member]] for member in members]
+            ))
+        return {'communities': communities, 'iterations': iterations, 'converged': converged}
+
+    def centrality(self, limit=20, order_by='pagerank', damping=0.85, tolerance=1e-6, max_iterations=100,
+                   samples=16, seed=0):
+        """
+        Rank entities over all connections, each weighted strength x
+        suspicious score and treated as undirected. Per entity: pagerank
+        (weighted, summing to 1), degree, weighted_degree and betweenness, a
+        sampled estimate from samples source entities (exact when samples
+        covers every entity), normalised to [0, 1]. Returns the top limit
+        entities by order_by.
+
+        PageRank iterates sparse products over the edge arrays and starts from
+        the previous result while the index has only grown, so a refresh after
+        a few new connections takes a few iterations. The betweenness estimate
+        is reused until connections grow by BETWEENNESS_REUSE.
+        """
+        with self._lock:
+            self._ensure_current()
+            sources = np.array(self._sources, dtype=np.int64)
+            targets = np.array(self._targets, dtype=np.int64)
+            weights = np.array(self._strengths, dtype=np.float64) * np.array(self._scores, dtype=np.float64)
+            names = list(self._entities)
+            state = (self.rebuilds, len(sources))
+            previous = self._pagerank
+            cached_betweenness = self._betweenness
+
+        size = len(names)
+        keep = sources != targets
+        nodes = np.concatenate((sources[keep], targets[keep]))
+        neighbours = np.concatenate((targets[keep], sources[keep]))
+        weights = np.concatenate((weights[keep], weights[keep]))
+
+        degree = np.bincount(nodes, minlength=size)
+        weighted_degree = np.bincount(nodes, weights=weights, minlength=size)
+
+        if previous is not None and previous[:2] == state:
+            pagerank = previous[2]
+        else:
+            start = None
+            if previous is not None and previous[0] == state[0]:
+                # Same rebuild, so entity ids are unchanged; new entities start at the mean
+                start = np.concatenate((previous[2], np.full(size - len(previous[2]), 1.0 / max(size, 1))))
+            pagerank = _pagerank(nodes, neighbours, weights, weighted_degree, size, damping, tolerance,
+                                 max_iterations, start)
+
+        if (cached_betweenness is not None and cached_betweenness[0] == state[0]
+                and cached_betweenness[2:4] == (samples, seed)
+                and state[1] <= cached_betweenness[1] * (1 + self.BETWEENNESS_REUSE)):
+            # An estimate already; a few more connections do not warrant new BFS passes
+            betweenness = cached_betweenness[4]
+            betweenness = np.concatenate((betweenness, np.zeros(size - len(betweenness))))
+        else:
+            betweenness = _sampled_betweenness(nodes, neighbours, size, samples, seed)
+            cached_betweenness = state + (samples, seed, betweenness)
+
+        with self._lock:
+            if (self.rebuilds, len(self._sources)) == state:
+                self._pagerank = state + (pagerank,)
+                self._betweenness = cached_betweenness
+
+        key = {'pagerank': pagerank, 'degree': degree, 'weighted_degree': weighted_degree,
+               'betweenness': betweenness}[order_by]
+        top = np.argsort(-key, kind='stable')[:limit]
+        return [{
+            'entity': names[entity_id],
+            'pagerank': float(pagerank[entity_id]),
+            'degree': int(degree[entity_id]),
+            'weighted_degree': float(weighted_degree[entity_id]),
+            'betweenness': float(betweenness[entity_id])
+        } for entity_id in top]
+
+    def invalidate(self):
+        """Rebuild from the database on the next call"""
+        self._stale = True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'built': self._built,
+                'entities': len(self._entities),
+                'connections': len(self._sources),
+                'last_id': self._last_id,
+                'rebuilds': self.rebuilds,
+                'syncs': self.syncs
+            }
+
+    def _reset(self):
+        self._entity_ids = {}  # entity -> id
+        self._entities = []  # id -> entity
+        self._edges = []  # id -> array of edge numbers
+        self._unranked = bytearray()  # id -> 1 when _edges gained edges since it was sorted by score
+        self._type_ids = {}  # connection type -> id
+        self._type_names = []  # id -> connection type
+
+        self._sources = array('i')
+        self._targets = array('i')
+        self._strengths = array('d')
+        self._scores = array('d')
+        self._types = array('H')
+
+        self._suspicious_degree = array('i')  # per entity id
+        self._suspicious_count = 0
+        self._suspicious_score_sum = 0.0
+        self._hub_count = 0
+        self._high_risk = array('i')
+        self._is_high_risk = bytearray()
+
+        # Union-find over suspicious connections; the component_* arrays are valid at roots
+        self._parent = array('i')
+        self._component_size = array('i')
+        self._component_edges = array('i')
+        self._component_score = array('d')
+        self._cluster_count = 0  # components of two or more entities
+        self._components = None  # clusters() grouping, until the next suspicious connection
+
+    def _ensure_current(self):
+        """Caller holds _lock"""
+        if not self._built or self._stale:
+            self._rebuild()
+        elif self._new_rows or time.monotonic() - self._synced_at > self.max_age:
+            self._load_new_rows()
+
+    def _rebuild(self):
+        self._stale = False
+        self._reset()
+        self._last_id = 0
+        self._load_new_rows()
+        self._built = True
+        self.rebuilds += 1
+        logging.debug(f"Network index built: {len(self._entities)} entities, {len(self._sources)} connections")
+
+    def _load_new_rows(self):
+        self._new_rows = False
+        rows = db.session.query(
+            NetworkConnection.id, NetworkConnection.source_entity, NetworkConnection.target_entity,
+            NetworkConnection.connection_type, NetworkConnection.strength, NetworkConnection.suspicious_score
+        ).filter(NetworkConnection.id > self._last_id).order_by(NetworkConnection.id).all()
+        for row_id, source, target, connection_type, strength, score in rows:
+            self._add_edge(source, target, connection_type, strength, score)
+            self._last_id = row_id
+        self._synced_at = time.monotonic()
+        self.syncs += 1
+
+    def _intern(self, entity):
+        entity_id = self._entity_ids.get(entity)
+        if entity_id is None:
+            entity_id = len(self._entities)
+            self._entity_ids[entity] = entity_id
+            self._entities.append(entity)
+            self._edges.append(array('i'))
+            self._unranked.append(0)
+            self._suspicious_degree.append(0)
+            self._is_high_risk.append(0)
+            self._parent.append(entity_id)
+            self._component_size.append(1)
+            self._component_edges.append(0)
+            self._component_score.append(0.0)
+        return entity_id
+
+    def _add_edge(self, source, target, connection_type, strength, score):
+        source_id = self._intern(source)
+        target_id = self._intern(target)
+        type_id = self._type_ids.get(connection_type)
+        if type_id is None:
+            type_id = self._type_ids[connection_type] = len(self._type_names)
+            self._type_names.append(connection_type)
+        edge = len(self._sources)
+        self._sources.append(source_id)
+        self._targets.append(target_id)
+        self._types.append(type_id)
+        self._strengths.append(strength)
+        self._scores.append(score)
+        self._edges[source_id].append(edge)
+        self._unranked[source_id] = 1
+        if target_id != source_id:
+            self._edges[target_id].append(edge)
+            self._unranked[target_id] = 1
+
+        if score < self.suspicious_score:
+            return
+        self._suspicious_count += 1
+        self._suspicious_score_sum += score
+        self._union(source_id, target_id, score)
+        # A self-loop counts once for each end, as both ends are the entity
+        for entity_id in (source_id, target_id):
+            self._suspicious_degree[entity_id] += 1
+            if self._suspicious_degree[entity_id] == self.hub_degree:
+                self._hub_count += 1
+            if score >= self.high_risk_score and not self._is_high_risk[entity_id]:
+                self._is_high_risk[entity_id] = 1
+                self._high_risk.append(entity_id)
+
+    def _find(self, entity_id):
+        parent = self._parent
+        while parent[entity_id] != entity_id:
+            # Path halving
+            parent[entity_id] = parent[parent[entity_id]]
+            entity_id = parent[entity_id]
+        return entity_id
+
+    def _union(self, source_id, target_id, score):
+        """Merge the components a suspicious connection joins and count it in the result"""
+        root = self._find(source_id)
+        other = self._find(target_id)
+        if root != other:
+            size = self._component_size
+            if size[root] < size[other]:
+                root, other = other, root
+            self._cluster_count += 1 - (size[root] > 1) - (size[other] > 1)
+            self._parent[other] = root
+            size[root] += size[other]
+            self._component_edges[root] += self._component_edges[other]
+            self._component_score[root] += self._component_score[other]
+        self._component_edges[root] += 1
+        self._component_score[root] += score
+        self._components = None
+
+    @staticmethod
+    def _cluster_stats(size, connections, score_sum, entities):
+        pairs = size * (size - 1) / 2
+        return {
+            'size': size,
+            'connections': connections,
+            # Repeated connections between a pair can exceed one per pair
+            'density': min(1.0, connections / pairs) if pairs else 0.0,
+            'average_score': score_sum / connections if connections else 0.0,
+            'entities': entities
+        }
+
+    def _ranked_edges(self, entity_id):
+        """entity_id's edge numbers, highest suspicious score first; caller holds _lock"""
+        if self._unranked[entity_id]:
+            self._edges[entity_id] = array('i', sorted(self._edges[entity_id], key=self._scores.__getitem__, reverse=True))
+            self._unranked[entity_id] = 0
+        return self._edges[entity_id]
+
+    def _mark_new_rows(self):
+        self._new_rows = True
+
+    def _row_inserted(self, mapper, connection, target):
+        call_on_commit(connection, self._mark_new_rows)
+
+    def _row_changed(self, mapper, connection, target):
+        call_on_commit(connection, self.invalidate)
+
+
+def _pagerank(nodes, neighbours, weights, weighted_degree, size, damping, tolerance, max_iterations, start=None):
+    """Weighted PageRank by power iteration; (nodes[i], neighbours[i], weights[i]) are directed edges"""
+    if size == 0:
+        return np.zeros(0)
+    ranks = np.full(size, 1.0 / size) if start is None else start / start.sum()
+    # Share of each edge in its node's outgoing weight
+    shares = np.divide(weights, weighted_degree[nodes], out=np.zeros_like(weights), where=weights > 0)
+    dangling = weighted_degree == 0
+    for _ in range(max_iterations):
+        spread = np.bincount(neighbours, weights=ranks[nodes] * shares, minlength=size)
+        updated = (1.0 - damping) / size + damping * (spread + ranks[dangling].sum() / size)
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if change < tolerance:
+            break
+    return ranks
+
+
+def _sampled_betweenness(nodes, neighbours, size, samples, seed):
+    """
+    Brandes betweenness from up to samples random source entities, scaled to
+    all entities and normalised to [0, 1]; each BFS level is one set of array
+    operations over the level's edges
+    """
+    betweenness = np.zeros(size)
+    if size < 3:
+        return betweenness
+    order = np.argsort(nodes, kind='stable')
+    adjacency = neighbours[order]
+    offsets = np.r_[0, np.cumsum(np.bincount(nodes, minlength=size))]
+
+    random = np.random.default_rng(seed)
+    sources = np.arange(size) if samples >= size else random.choice(size, samples, replace=False)
+    claimed = np.zeros(size, dtype=np.int64)
+    for source in sources:
+        distance = np.full(size, -1)
+        paths = np.zeros(size)
+        distance[source] = 0
+        paths[source] = 1.0
+        frontier = np.array([source])
+        levels = []
+        depth = 0
+        while len(frontier):
+            depth += 1
+            counts = offsets[frontier + 1] - offsets[frontier]
+            if not counts.sum():
+                break
+            # Every edge out of the frontier: (tail, head)
+            tails = np.repeat(frontier, counts)
+            positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) \
+                + np.repeat(offsets[frontier], counts)
+            heads = adjacency[positions]
+            reached = heads[distance[heads] == -1]
+            distance[reached] = depth
+            onward = distance[heads] == depth
+            tails, heads = tails[onward], heads[onward]
+            np.add.at(paths, heads, paths[tails])
+            levels.append((tails, heads))
+            # The next frontier is every entity reached, once: keep the first slot claiming each
+            slots = np.arange(len(reached))
+            claimed[reached] = slots
+            frontier = reached[claimed[reached] == slots]
+
+        dependency = np.zeros(size)
+        for tails, heads in reversed(levels):
+            np.add.at(dependency, tails, paths[tails] / paths[heads] * (1.0 + dependency[heads]))
+        dependency[source] = 0.0
+        betweenness += dependency
+
+    # Scale the sample up, then to the (n - 1)(n - 2) ordered pairs a node can sit between
+    betweenness *= size / len(sources)
+    return betweenness / ((size - 1) * (size - 2))
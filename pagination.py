@@ -0,0 +1,76 @@
+from app import db
+from datetime import datetime
+import base64
+import json
+
+# Page size bounds for the list APIs
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor for the position after a row, newest-first"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor; raises ValueError for anything else"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    if value in (None, ''):
+        return default
+    size = int(value)
+    if size < 1:
+        raise ValueError('limit must be at least 1')
+    return min(size, MAX_PAGE_SIZE)
+
+
+def parse_datetime(value):
+    """ISO date or datetime from a query parameter, or None when empty"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid date '{value}'; expected YYYY-MM-DD or an ISO datetime") from e
+
+
+def text_preview(column, length=100):
+    """
+    SQL expression for the first length characters of a text column, with
+    '...' when it is longer, so list queries never fetch the whole text
+    """
+    return db.case(
+        (db.func.length(column) > length, db.func.substr(column, 1, length).concat('...')),
+        else_=column
+    )
+
+
+def keyset_page(query, model, limit, cursor=None):
+    """
+    One newest-first page of query, ordered by (created_at, id), and the
+    cursor for the next page (None on the last page).
+
+    The page starts strictly after the cursor's row, found with a row-value
+    comparison the (..., created_at) indexes can seek to, so a deep page costs
+    the same as the first one, unlike OFFSET. Rows inserted while paging never
+    shift or repeat the pages that follow. query may select model's columns
+    instead of whole instances, as long as they include created_at and id.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(model.created_at, model.id) < (created_at, row_id))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
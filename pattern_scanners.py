@@ -0,0 +1,65 @@
+import re
+
+# Suspicious patterns of the form "<word>.*<tail>" with a linear-time
+# equivalent. Run through re, each of them backtracks over the rest of the
+# line for every occurrence of the word, which is quadratic on a long line full
+# of the word and no tail.
+LINE_PAIR_PATTERNS = {
+    r'whatsapp.*\+\d+': ('whatsapp', r'\+\d+'),
+    r'telegram.*@\w+': ('telegram', r'@\w+')
+}
+
+# Used to turn a known (start, end) span back into a re.Match
+_SPAN = re.compile(r'.*', re.DOTALL)
+
+
+class LinePairScanner:
+    """
+    Linear-time stand-in for a compiled "<word>.*<tail>" pattern.
+
+    Since '.' stops at newlines, such a pattern matches at most once per line:
+    from the first occurrence of the word to the end of the last tail match
+    after it on the same line. This scanner finds exactly that span with one
+    pass for the word and one for the tails of each line, and offers the
+    subset of the re.Pattern interface the detector uses.
+    """
+
+    groups = 0
+
+    def __init__(self, pattern, flags=0):
+        head, tail = LINE_PAIR_PATTERNS[pattern]
+        self.pattern = pattern
+        self.flags = flags
+        self._head = re.compile(re.escape(head), flags)
+        self._tail = re.compile(tail, flags)
+
+    def finditer(self, text, pos=0):
+        line_end = pos - 1
+        for head in self._head.finditer(text, pos):
+            # A later word on a line that already had its one chance cannot match
+            if head.start() <= line_end:
+                continue
+            line_end = text.find('\n', head.end())
+            if line_end == -1:
+                line_end = len(text)
+
+            last_tail = None
+            for last_tail in self._tail.finditer(text, head.end(), line_end):
+                pass
+            if last_tail is not None:
+                yield _SPAN.match(text, head.start(), last_tail.end())
+
+    def head_position(self, text, start, stop):
+        """Offset of the first occurrence of the word starting in text[start:stop], or -1"""
+        head = self._head.search(text, start)
+        return head.start() if head is not None and head.start() < stop else -1
+
+    def findall(self, text):
+        return [match.group() for match in self.finditer(text)]
+
+
+def compile_pattern(pattern, flags=0):
+    """Compile a suspicious pattern, using a linear-time scanner where one exists"""
+    if pattern in LINE_PAIR_PATTERNS:
+        return LinePairScanner(pattern, flags)
+    return re.compile(pattern, flags)
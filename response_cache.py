@@ -0,0 +1,196 @@
+from app import app
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from email.utils import formatdate
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import json
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Short-TTL cache of JSON API responses shared by every request in the
+    process, with ETag and Last-Modified validators.
+
+    Entries are keyed on the view and the query parameters it reads, so
+    unrelated parameters do not add entries. At most max_entries are kept,
+    least recently used dropped first, and expired entries are purged as new
+    ones are stored.
+
+    A cached view is computed at most once per ttl seconds (and once at a time)
+    however many tabs poll it. Responses carry "Cache-Control: private,
+    no-cache", so browsers revalidate each poll and get a 304 while the
+    payload is unchanged. invalidate() drops every entry; invalidate_on_commit()
+    does so once the given connection's transaction has committed, and a
+    response computed across an invalidation is not kept. Writes made by other
+    processes show up once the TTL expires.
+    """
+
+    # Keys hash onto a fixed set of locks, held while an entry is computed
+    LOCK_STRIPES = 32
+
+    def __init__(self, ttl=5.0, max_entries=512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (body, etag, last modified, expires at, headers), oldest use first
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def cached(self, timestamp_field=None, params=()):
+        """
+        Decorator for views returning JSON-serializable data, or (data, headers)
+        to add response headers such as Link. params names the query parameters
+        the view reads; requests differing only in other parameters share an
+        entry. timestamp_field, if given, is set on dict payloads to when the
+        payload last changed (it is left out of the ETag, so an unchanged
+        payload keeps its validators). A Response
+        returned by the view, such as a 400 for bad parameters, is passed
+        through uncached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (view.__name__,) + tuple(request.args.get(name) for name in params)
+                entry = self._fresh_entry(key)
+                if entry is None:
+                    entry = self._compute(key, view, args, kwargs, timestamp_field)
+                    if isinstance(entry, app.response_class):
+                        return entry
+                else:
+                    with self._lock:
+                        self.hits += 1
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def invalidate_on_commit(self, connection):
+        """Invalidate once connection's current transaction commits (nothing on rollback)"""
+        call_on_commit(connection, self.invalidate)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'invalidations': self.invalidations
+            }
+
+    def _fresh_entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and entry[3] > time.monotonic():
+            return entry
+        return None
+
+    def _compute(self, key, view, args, kwargs, timestamp_field):
+        with self._locks[hash(key) % self.LOCK_STRIPES]:
+            # Another request may have filled it while this one waited
+            entry = self._fresh_entry(key)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                return entry
+
+            with self._lock:
+                self.misses += 1
+                generation = self._generation
+                previous = self._entries.get(key)
+
+            data = view(*args, **kwargs)
+            if isinstance(data, app.response_class):
+                return data
+            headers = {}
+            if isinstance(data, tuple):
+                data, headers = data
+            if timestamp_field and isinstance(data, dict):
+                data.pop(timestamp_field, None)
+            validated = json.dumps([data, headers], sort_keys=True, default=str)
+            etag = hashlib.sha256(validated.encode('utf-8')).hexdigest()[:32]
+
+            # An unchanged payload keeps the time it last changed
+            last_modified = previous[2] if previous is not None and previous[1] == etag else time.time()
+            if timestamp_field and isinstance(data, dict):
+                data[timestamp_field] = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(last_modified))
+            body = json.dumps(data, ensure_ascii=False)
+
+            entry = (body, etag, last_modified, time.monotonic() + self.ttl, headers)
+            with self._lock:
+                # Computed while a write committed: serve it once, do not keep it
+                if generation == self._generation:
+                    self._store(key, entry)
+            return entry
+
+    def _store(self, key, entry):
+        """Keep entry as the most recently used, purging expired and excess entries; caller holds _lock"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        now = time.monotonic()
+        for stale in [stale for stale, kept in self._entries.items() if kept[3] <= now]:
+            del self._entries[stale]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _respond(self, entry):
+        body, etag, last_modified, _, headers = entry
+        response = app.response_class(body, mimetype='application/json', headers=headers)
+        response.set_etag(etag)
+        # Whole seconds, as the header has no finer resolution
+        response.headers['Last-Modified'] = formatdate(int(last_modified), usegmt=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.make_conditional(request)
+        if response.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+        return response
+
+
+def call_on_commit(connection, callback):
+    """
+    Call callback() once connection's current transaction has committed (at
+    most once per transaction, never on rollback), so whatever it triggers
+    reads the committed data.
+    """
+    connection.info.setdefault('on_commit', set()).add(callback)
+
+
+# The commit event fires just before the database commits; the callbacks run
+# when the connection goes back to the pool, after the commit
+@event.listens_for(Engine, 'commit')
+def _commit_callbacks_due(connection):
+    pending = connection.info.pop('on_commit', None)
+    if pending:
+        connection.info.setdefault('committed', set()).update(pending)
+
+
+@event.listens_for(Engine, 'rollback')
+def _discard_commit_callbacks(connection):
+    connection.info.pop('on_commit', None)
+
+
+@event.listens_for(Pool, 'checkin')
+def _run_commit_callbacks(dbapi_connection, connection_record):
+    for callback in connection_record.info.pop('committed', ()):
+        callback()
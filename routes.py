@@ -4,9 +4,19 @@ from models import FraudAlert, Advisor, NetworkConnection, UserReport, AnalysisH
 from fraud_detector import FraudDetector
 from advisor_verifier import AdvisorVerifier
 from network_analyzer import NetworkAnalyzer
+from analysis_cache import AnalysisCache
+from analysis_jobs import AnalysisJobQueue
+from bulk_writer import BulkWriter
+from alert_rollups import alert_totals, daily_alert_counts, count_alert_rows
+from response_cache import ResponseCache, call_on_commit
+from event_stream import EventStream
+from pagination import keyset_page, parse_page_size, parse_datetime, text_preview
+from json_columns import json_array_contains
+from sqlalchemy import event
 from auth import auth_bp
 from flask_login import current_user, login_required
 import hashlib
+import os
 import time
 import json
 from datetime import datetime, timedelta
@@ -34,48 +44,161 @@ def require_login(f):
 fraud_detector = FraudDetector()
 advisor_verifier = AdvisorVerifier()
 network_analyzer = NetworkAnalyzer()
+analysis_cache = AnalysisCache(fraud_detector)
+
+# Polled stats endpoints, recomputed at most once per TTL for all open tabs
+stats_cache = ResponseCache(
+    ttl=float(os.environ.get('STATS_CACHE_TTL', 5.0)),
+    max_entries=int(os.environ.get('STATS_CACHE_MAX_ENTRIES', 512))
+)
+
+# New alerts and stat changes pushed to open dashboards over /api/stream
+# Each open stream holds a worker thread; under gunicorn the cap is derived from
+# the thread count (gunicorn.conf.py), the default here is for the dev server
+event_stream = EventStream(
+    poll_interval=float(os.environ.get('EVENT_STREAM_POLL_INTERVAL', 1.0)),
+    max_subscribers=int(os.environ.get('EVENT_STREAM_MAX_SUBSCRIBERS', 16))
+)
+
+def _alert_rows_written(connection, rows):
+    """Bookkeeping for FraudAlert rows written with a Core INSERT"""
+    count_alert_rows(connection, rows)
+    stats_cache.invalidate_on_commit(connection)
+    call_on_commit(connection, event_stream.wake)
+
+def _stats_rows_changed(mapper, connection, target):
+    stats_cache.invalidate_on_commit(connection)
+    call_on_commit(connection, event_stream.wake)
+
+for _model in (FraudAlert, UserReport):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _stats_rows_changed)
+
+# History and alert rows from /analyzer. Committed before the request returns
+# by default; ANALYSIS_WRITE_DURABILITY=journal (journaled to
+# ANALYSIS_WRITE_JOURNAL.<pid>) or memory opts in to writing them behind, in bulk
+analysis_writer = BulkWriter(
+    (AnalysisHistory, FraudAlert),
+    max_rows=int(os.environ.get('ANALYSIS_WRITE_MAX_ROWS', 500)),
+    max_delay=float(os.environ.get('ANALYSIS_WRITE_MAX_DELAY', 1.0)),
+    durability=os.environ.get('ANALYSIS_WRITE_DURABILITY', 'sync'),
+    journal_path=os.environ.get('ANALYSIS_WRITE_JOURNAL'),
+    after_insert={FraudAlert: _alert_rows_written}
+)
+
+# Analyses at or above this score raise a FraudAlert
+ALERT_RISK_THRESHOLD = 5.0
+
+# Upper bound on messages accepted by one batch analysis request
+MAX_BATCH_ITEMS = 5000
+
+# Query parameters read by the paginated list endpoints
+ALERT_LIST_PARAMS = ('status', 'severity', 'platform', 'content_type', 'min_risk', 'indicator', 'since', 'until',
+                     'limit', 'cursor')
+REPORT_LIST_PARAMS = ('status', 'platform', 'fraud_type', 'since', 'until', 'limit', 'cursor')
+
+# Bounds on /api/network/neighborhood walks
+MAX_NEIGHBORHOOD_DEPTH = 4
+MAX_NEIGHBORHOOD_FANOUT = 500
+
+# Request/response mimetypes treated as one JSON document per line
+JSONL_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+# Analyzer form language codes -> FraudDetector language labels
+ANALYSIS_LANGUAGES = {
+    'auto': 'auto',
+    'en': 'english',
+    'hi': 'hindi',
+    'ta': 'tamil',
+    'te': 'telugu',
+    'mr': 'marathi',
+    'gu': 'gujarati',
+    'bn': 'bengali'
+}
+
+def alert_severity(risk_score):
+    """Map a risk score to the severity stored on a FraudAlert"""
+    if risk_score >= 8.0:
+        return 'critical'
+    elif risk_score >= 7.0:
+        return 'high'
+    return 'medium'
+
+def analyze_and_record(content, content_type, language):
+    """
+    Analyze submitted content, store it in AnalysisHistory and raise a
+    FraudAlert when the risk is significant. Runs on the request thread for
+    /analyzer and on a job worker for queued analyses; the rows go through
+    analysis_writer, committed at once unless it is set to write behind.
+    """
+    start_time = time.time()
+
+    # Analyze content for fraud, reusing earlier results for identical content
+    analysis_result, content_hash, _ = analysis_cache.analyze(content, content_type, language)
+
+    processing_time = time.time() - start_time
+
+    # Ensure content is properly handled for database storage
+    safe_content = content
+
+    rows = [(AnalysisHistory, {
+        'content_hash': content_hash,
+        'analysis_type': content_type,
+        'risk_score': analysis_result['risk_score'],
+        'analysis_result': analysis_result,
+        'processing_time': processing_time
+    })]
+
+    # Create fraud alert if risk is significant
+    if analysis_result['risk_score'] >= ALERT_RISK_THRESHOLD:
+        rows.append((FraudAlert, {
+            'content_type': content_type,
+            'content': safe_content[:1000],  # Truncate for storage with safe Unicode
+            'risk_score': analysis_result['risk_score'],
+            'fraud_indicators': analysis_result['indicators'],
+            'severity': alert_severity(analysis_result['risk_score']),
+            'source_platform': 'manual_submission'
+        }))
+
+    # History and alert are written in one transaction
+    analysis_writer.add_rows(rows)
+
+    return {
+        'analysis_result': analysis_result,
+        'content_hash': content_hash,
+        'processing_time': processing_time
+    }
+
+# Background analysis for /analyzer submissions that ask for it
+analysis_jobs = AnalysisJobQueue(analyze_and_record, workers=int(os.environ.get('ANALYSIS_JOB_WORKERS', 2)))
+
+def _wants_async():
+    flag = request.form.get('async', request.args.get('async', ''))
+    return flag.lower() in ('1', 'true', 'yes', 'on')
 
 @app.route('/')
 def index():
     # Get recent fraud statistics
-    total_alerts = FraudAlert.query.count()
-    high_risk_alerts = FraudAlert.query.filter(FraudAlert.risk_score >= 7.0).count()
-    active_alerts = FraudAlert.query.filter(FraudAlert.status == 'active').count()
+    totals = alert_totals()
 
     # Get recent alerts for ticker
     recent_alerts = FraudAlert.query.filter(FraudAlert.status == 'active').order_by(FraudAlert.created_at.desc()).limit(5).all()
 
     return render_template('index.html', 
-                         total_alerts=total_alerts,
-                         high_risk_alerts=high_risk_alerts,
-                         active_alerts=active_alerts,
+                         total_alerts=totals['total'],
+                         high_risk_alerts=totals['high_risk'],
+                         active_alerts=totals['active'],
                          recent_alerts=recent_alerts)
 
 @app.route('/dashboard')
 @require_login
 def dashboard():
-    # Get dashboard statistics
-    today = datetime.utcnow().date()
-    week_ago = today - timedelta(days=7)
-
     # Recent alerts
     recent_alerts = FraudAlert.query.order_by(FraudAlert.created_at.desc()).limit(10).all()
 
-    # Risk distribution
-    risk_distribution = {
-        'low': FraudAlert.query.filter(FraudAlert.risk_score < 4.0).count(),
-        'medium': FraudAlert.query.filter(FraudAlert.risk_score.between(4.0, 6.9)).count(),
-        'high': FraudAlert.query.filter(FraudAlert.risk_score >= 7.0).count()
-    }
-
-    # Daily trend data for the last 7 days
-    daily_alerts = []
-    for i in range(7):
-        day = today - timedelta(days=i)
-        count = FraudAlert.query.filter(db.func.date(FraudAlert.created_at) == day).count()
-        daily_alerts.append({'date': day.strftime('%Y-%m-%d'), 'count': count})
-
-    daily_alerts.reverse()
+    # Risk distribution and daily trend for the last 7 days, from the rollup table
+    risk_distribution = alert_totals()['risk_distribution']
+    daily_alerts = daily_alert_counts(7)
 
     return render_template('dashboard.html',
                          recent_alerts=recent_alerts,
@@ -85,26 +208,57 @@ def dashboard():
 # Real-time API endpoints for dashboard
 @app.route('/api/dashboard/stats')
 @require_login  
+@stats_cache.cached(timestamp_field='timestamp')
 def api_dashboard_stats():
     """API endpoint for real-time dashboard statistics"""
-    total_alerts = FraudAlert.query.count()
-    high_risk_alerts = FraudAlert.query.filter(FraudAlert.risk_score >= 7.0).count()
-    active_alerts = FraudAlert.query.filter(FraudAlert.status == 'active').count()
+    totals = alert_totals()
     pending_reports = UserReport.query.filter(UserReport.status == 'pending').count()
 
-    return jsonify({
-        'total_alerts': total_alerts,
-        'high_risk_alerts': high_risk_alerts, 
-        'active_alerts': active_alerts,
-        'pending_reports': pending_reports,
-        'timestamp': datetime.utcnow().isoformat()
-    })
+    return {
+        'total_alerts': totals['total'],
+        'high_risk_alerts': totals['high_risk'], 
+        'active_alerts': totals['active'],
+        'pending_reports': pending_reports
+    }
+
+@app.route('/api/stream')
+@require_login
+def api_stream():
+    """Server-Sent Events: 'alert' for each new FraudAlert, 'stats' when dashboard counts change"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscriber = event_stream.subscribe(last_event_id)
+    if subscriber is None:
+        # EventSource gives up on a non-200 response and the dashboard polls instead
+        response = jsonify({'error': 'too many open event streams, poll /api/dashboard/stats instead'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    response = app.response_class(event_stream.messages(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/stream/stats')
+@require_login
+def api_stream_stats():
+    """API endpoint for event stream subscriber and publish counters"""
+    return jsonify(event_stream.stats())
 
 @app.route('/api/dashboard/recent-alerts')
 @require_login
+@stats_cache.cached()
 def api_recent_alerts():
     """API endpoint for recent alerts"""
-    recent_alerts = FraudAlert.query.order_by(FraudAlert.created_at.desc()).limit(5).all()
+    recent_alerts = db.session.query(
+        FraudAlert.id, FraudAlert.risk_score, FraudAlert.severity, FraudAlert.status, FraudAlert.created_at,
+        text_preview(FraudAlert.content).label('content_preview')
+    ).order_by(FraudAlert.created_at.desc()).limit(5).all()
 
     alerts_data = []
     for alert in recent_alerts:
@@ -112,12 +266,12 @@ def api_recent_alerts():
             'id': alert.id,
             'risk_score': alert.risk_score,
             'severity': alert.severity,
-            'content': alert.content[:100] + ('...' if len(alert.content) > 100 else ''),
+            'content': alert.content_preview,
             'created_at': alert.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'status': alert.status
         })
 
-    return jsonify(alerts_data)
+    return alerts_data
 
 @app.route('/analyzer', methods=['GET', 'POST'])
 @require_login
@@ -125,58 +279,184 @@ def analyzer():
     if request.method == 'POST':
         content = request.form.get('content', '').strip()
         content_type = request.form.get('content_type', 'text')
+        language = ANALYSIS_LANGUAGES.get(request.form.get('analysis_language', 'auto'), 'auto')
 
         if not content:
+            if _wants_async():
+                return jsonify({'error': 'No content to analyze'}), 400
             flash('Please provide content to analyze.', 'warning')
             return redirect(url_for('analyzer'))
 
-        start_time = time.time()
+        # Queue the analysis and answer with the job id right away
+        if _wants_async():
+            job_id = analysis_jobs.enqueue(content, content_type, language, user_id=current_user.id)
+            return jsonify({
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': url_for('api_job_status', job_id=job_id)
+            }), 202
 
-        # Analyze content for fraud
-        analysis_result = fraud_detector.analyze_content(content, content_type)
+        recorded = analyze_and_record(content, content_type, language)
 
-        processing_time = time.time() - start_time
+        return render_template('analyzer.html',
+                             analysis_result=recorded['analysis_result'],
+                             content=content,
+                             processing_time=recorded['processing_time'],
+                             content_hash=recorded['content_hash'])
 
-        # Store analysis in history with proper Unicode handling
-        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return render_template('analyzer.html')
 
-        # Ensure content is properly handled for database storage
-        safe_content = content
+def _parse_batch_items():
+    """Read batch items from a JSON array/object or a JSONL request body"""
+    if request.mimetype in JSONL_MIMETYPES:
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            line = line.strip()
+            if line:
+                items.append(json.loads(line))
+        return items
 
-        history_entry = AnalysisHistory(
-            content_hash=content_hash,
-            analysis_type=content_type,
-            risk_score=analysis_result['risk_score'],
-            analysis_result=json.dumps(analysis_result, ensure_ascii=False),
-            processing_time=processing_time
-        )
-        db.session.add(history_entry)
-
-        # Create fraud alert if risk is significant
-        if analysis_result['risk_score'] >= 5.0:
-            severity = 'critical' if analysis_result['risk_score'] >= 8.0 else \
-                      'high' if analysis_result['risk_score'] >= 7.0 else \
-                      'medium'
-
-            alert = FraudAlert(
-                content_type=content_type,
-                content=safe_content[:1000],  # Truncate for storage with safe Unicode
-                risk_score=analysis_result['risk_score'],
-                fraud_indicators=json.dumps(analysis_result['indicators'], ensure_ascii=False),
-                severity=severity,
-                source_platform='manual_submission'
-            )
-            db.session.add(alert)
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of items or an object with an "items" array')
+    return data
 
-        db.session.commit()
+@app.route('/api/analyze/batch', methods=['POST'])
+@require_login
+def api_analyze_batch():
+    """API endpoint for scoring a batch of messages in one request"""
+    try:
+        raw_items = _parse_batch_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        return render_template('analyzer.html',
-                             analysis_result=analysis_result,
-                             content=content,
-                             processing_time=processing_time,
-                             content_hash=content_hash)
+    if not raw_items:
+        return jsonify({'error': 'No items provided'}), 400
+    if len(raw_items) > MAX_BATCH_ITEMS:
+        return jsonify({'error': f'Batch exceeds the limit of {MAX_BATCH_ITEMS} items'}), 413
 
-    return render_template('analyzer.html')
+    default_type = request.args.get('content_type', 'text')
+    default_language = request.args.get('language', 'english')
+
+    items = []
+    for index, raw in enumerate(raw_items):
+        item = {'content': raw} if isinstance(raw, str) else raw
+        if not isinstance(item, dict) or not isinstance(item.get('content'), str) or not item['content'].strip():
+            return jsonify({'error': f'Item {index} has no content to analyze'}), 400
+        for field in ('content_type', 'language', 'platform'):
+            if item.get(field) is not None and not isinstance(item[field], str):
+                return jsonify({'error': f'Item {index} has a non-string {field}'}), 400
+        items.append({
+            'id': item.get('id', index),
+            'content': item['content'].strip(),
+            'content_type': item.get('content_type', default_type),
+            'language': item.get('language', default_language),
+            'platform': item.get('platform')
+        })
+
+    start_time = time.time()
+    results = analysis_cache.analyze_many(items)
+    # Time is amortized over the batch; individual items are not timed
+    processing_time = (time.time() - start_time) / len(items)
+
+    history_rows = []
+    alert_rows = []
+    response_items = []
+    created_at = datetime.utcnow()
+    for item, (analysis_result, content_hash, _) in zip(items, results):
+        history_rows.append({
+            'content_hash': content_hash,
+            'analysis_type': item['content_type'],
+            'risk_score': analysis_result['risk_score'],
+            'analysis_result': analysis_result,
+            'processing_time': processing_time
+        })
+
+        if analysis_result['risk_score'] >= ALERT_RISK_THRESHOLD:
+            alert_rows.append({
+                'content_type': item['content_type'],
+                'content': item['content'][:1000],
+                'risk_score': analysis_result['risk_score'],
+                'fraud_indicators': analysis_result['indicators'],
+                'severity': alert_severity(analysis_result['risk_score']),
+                'source_platform': item['platform'] or 'batch_api',
+                'created_at': created_at
+            })
+
+        response_items.append(dict(analysis_result, id=item['id'], content_hash=content_hash))
+
+    # One multi-row INSERT per table and a single commit for the whole batch
+    db.session.execute(db.insert(AnalysisHistory), history_rows)
+    if alert_rows:
+        db.session.execute(db.insert(FraudAlert), alert_rows)
+        _alert_rows_written(db.session.connection(), alert_rows)
+    db.session.commit()
+
+    if request.mimetype in JSONL_MIMETYPES:
+        body = '\n'.join(json.dumps(entry, ensure_ascii=False) for entry in response_items) + '\n'
+        return app.response_class(body, mimetype='application/x-ndjson')
+
+    return jsonify({
+        'count': len(response_items),
+        'alerts_created': len(alert_rows),
+        'processing_time': processing_time * len(items),
+        'results': response_items
+    })
+
+@app.route('/api/jobs/<job_id>')
+@require_login
+def api_job_status(job_id):
+    """API endpoint reporting the status and, once done, the result of a queued analysis"""
+    job = analysis_jobs.get(job_id, user_id=current_user.id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/stats')
+@require_login
+def api_job_stats():
+    """API endpoint for analysis job queue depth"""
+    return jsonify(analysis_jobs.stats())
+
+@app.route('/api/analysis-writer/stats')
+@require_login
+def api_analysis_writer_stats():
+    """API endpoint for the buffered history/alert writer"""
+    return jsonify(analysis_writer.stats())
+
+@app.route('/api/stats-cache/stats')
+@require_login
+def api_stats_cache_stats():
+    """API endpoint for the polled-stats response cache counters"""
+    return jsonify(stats_cache.stats())
+
+@app.route('/api/analysis-cache/stats')
+@require_login
+def api_analysis_cache_stats():
+    """API endpoint for analysis result cache hit/miss counters"""
+    return jsonify(analysis_cache.stats())
+
+@app.route('/api/ruleset')
+@require_login
+def api_ruleset():
+    """API endpoint describing the active fraud scoring ruleset"""
+    description = fraud_detector.ruleset.describe()
+    description['ruleset_version'] = fraud_detector.ruleset_version
+    return jsonify(description)
+
+@app.route('/api/ruleset/reload', methods=['POST'])
+@require_login
+def api_ruleset_reload():
+    """Reload the rules file now instead of waiting for the periodic check"""
+    previous_version = fraud_detector.ruleset_version
+    reloaded = fraud_detector.reload_ruleset(force=True)
+    return jsonify({
+        'reloaded': reloaded,
+        'previous_version': previous_version,
+        'ruleset_version': fraud_detector.ruleset_version
+    })
 
 @app.route('/advisor', methods=['GET', 'POST'])
 @require_login
@@ -231,6 +511,90 @@ def network():
                          network_data=network_data,
                          connections=connections)
 
+@app.route('/api/network/analysis')
+@require_login
+def api_network_analysis():
+    """Network risk analysis: one entity's connections with ?entity=, the whole network without"""
+    return jsonify(network_analyzer.analyze_network_patterns(request.args.get('entity') or None))
+
+@app.route('/api/network/neighborhood')
+@require_login
+def api_network_neighborhood():
+    """
+    Entities within depth hops of ?entity=, following at most fanout connections
+    per entity; filter with type= (repeatable) and min_score=
+    """
+    entity = request.args.get('entity')
+    if not entity:
+        return jsonify({'error': 'entity is required'}), 400
+    try:
+        max_depth = int(request.args.get('depth', 2))
+        max_fanout = int(request.args.get('fanout', 50))
+        min_score = float(request.args.get('min_score', 0))
+    except ValueError:
+        return jsonify({'error': 'depth and fanout must be integers, min_score a number'}), 400
+    if not 1 <= max_depth <= MAX_NEIGHBORHOOD_DEPTH or not 1 <= max_fanout <= MAX_NEIGHBORHOOD_FANOUT:
+        return jsonify({'error': f'depth must be 1-{MAX_NEIGHBORHOOD_DEPTH} and fanout 1-{MAX_NEIGHBORHOOD_FANOUT}'}), 400
+
+    return jsonify(network_analyzer.analyze_entity_neighborhood(
+        entity, max_depth=max_depth, max_fanout=max_fanout,
+        connection_types=request.args.getlist('type') or None, min_score=min_score
+    ))
+
+@app.route('/api/network/clusters')
+@require_login
+def api_network_clusters():
+    """
+    Clusters of entities linked by suspicious connections, largest first;
+    communities=1 adds label-propagation communities within them
+    """
+    try:
+        min_size = int(request.args.get('min_size', 2))
+        limit = parse_page_size(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'min_size and limit must be positive integers'}), 400
+
+    data = {'clusters': network_analyzer.index.clusters(min_size=min_size, limit=limit)}
+    if request.args.get('communities') == '1':
+        data.update(network_analyzer.index.communities(min_size=min_size, limit=limit))
+    return jsonify(data)
+
+@app.route('/api/network/rankings')
+@require_login
+def api_network_rankings():
+    """Entities ranked by ?order_by=pagerank (default), degree, weighted_degree or betweenness"""
+    order_by = request.args.get('order_by', 'pagerank')
+    if order_by not in ('pagerank', 'degree', 'weighted_degree', 'betweenness'):
+        return jsonify({'error': 'order_by must be pagerank, degree, weighted_degree or betweenness'}), 400
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    return jsonify(network_analyzer.rank_entities(limit=limit, order_by=order_by))
+
+@app.route('/api/network/coordination')
+@require_login
+def api_network_coordination():
+    """Coordinated-activity indicators over the last ?hours= (default 24)"""
+    try:
+        hours = int(request.args.get('hours', 24))
+        return jsonify(network_analyzer.detect_coordinated_activity(hours))
+    except ValueError:
+        return jsonify({'error': f'hours must be a whole number from 1 to {network_analyzer.activity.retention_hours}'}), 400
+
+@app.route('/api/network/coordination/stats')
+@require_login
+def api_network_coordination_stats():
+    """API endpoint for the coordination sliding window"""
+    return jsonify(network_analyzer.activity.stats())
+
+@app.route('/api/network/index-stats')
+@require_login
+def api_network_index_stats():
+    """API endpoint for the in-memory connection graph"""
+    return jsonify(network_analyzer.index.stats())
+
 @app.route('/education')
 @require_login
 def education():
@@ -269,15 +633,89 @@ def reports():
         flash('Thank you for your report. We will investigate this matter.', 'success')
         return redirect(url_for('reports'))
 
-    # Get recent reports
-    recent_reports = UserReport.query.order_by(UserReport.created_at.desc()).limit(20).all()
+    # Newest reports first; "Older reports" follows the cursor
+    try:
+        recent_reports, next_cursor = keyset_page(
+            _filtered_reports(UserReport.query, request.args), UserReport, 20, request.args.get('cursor')
+        )
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('reports'))
+
+    older_args = dict(request.args.items(), cursor=next_cursor) if next_cursor else None
+    return render_template('reports.html', recent_reports=recent_reports, older_args=older_args,
+                           is_first_page=not request.args.get('cursor'))
+
+def _filter_created_at(query, model, args):
+    """since (inclusive) and until (exclusive) ISO date/datetime filters on created_at"""
+    since = parse_datetime(args.get('since'))
+    until = parse_datetime(args.get('until'))
+    if since:
+        query = query.filter(model.created_at >= since)
+    if until:
+        query = query.filter(model.created_at < until)
+    return query
+
+def _filtered_alerts(query, args):
+    """Apply the FraudAlert list filters to query; status defaults to active, 'all' for any"""
+    status = args.get('status', 'active')
+    if status != 'all':
+        query = query.filter(FraudAlert.status == status)
+    if args.get('severity'):
+        query = query.filter(FraudAlert.severity == args['severity'])
+    if args.get('platform'):
+        query = query.filter(FraudAlert.source_platform == args['platform'])
+    if args.get('content_type'):
+        query = query.filter(FraudAlert.content_type == args['content_type'])
+    if args.get('min_risk'):
+        query = query.filter(FraudAlert.risk_score >= float(args['min_risk']))
+    if args.get('indicator'):
+        query = query.filter(json_array_contains(FraudAlert.fraud_indicators, args['indicator']))
+    return _filter_created_at(query, FraudAlert, args)
+
+def _filtered_reports(query, args):
+    """Apply the UserReport list filters to query"""
+    if args.get('status'):
+        query = query.filter(UserReport.status == args['status'])
+    if args.get('platform'):
+        query = query.filter(UserReport.platform == args['platform'])
+    if args.get('fraud_type'):
+        query = query.filter(UserReport.fraud_type == args['fraud_type'])
+    return _filter_created_at(query, UserReport, args)
 
-    return render_template('reports.html', recent_reports=recent_reports)
+def _page_headers(endpoint, params, next_cursor):
+    """X-Next-Cursor and Link headers pointing at the next page, if any, carrying the list's params"""
+    if not next_cursor:
+        return {}
+    args = {name: request.args[name] for name in params if name in request.args}
+    next_url = url_for(endpoint, **dict(args, cursor=next_cursor))
+    return {'X-Next-Cursor': next_cursor, 'Link': f'<{next_url}>; rel="next"'}
+
+def _bad_request(message):
+    response = jsonify({'error': message})
+    response.status_code = 400
+    return response
 
 @app.route('/api/alerts')
+@stats_cache.cached(params=ALERT_LIST_PARAMS)
 def api_alerts():
-    """API endpoint for real-time alerts updates"""
-    alerts = FraudAlert.query.filter(FraudAlert.status == 'active').order_by(FraudAlert.created_at.desc()).limit(10).all()
+    """
+    API endpoint for real-time alerts updates, newest first. Filters: status,
+    severity, platform, content_type, min_risk, indicator, since, until; limit
+    (default 10) rows per page, the next page's cursor in X-Next-Cursor and Link.
+    """
+    try:
+        limit = parse_page_size(request.args.get('limit'), default=10)
+        # Only the listed columns, with the preview cut in SQL: no ORM objects, no full content
+        query = db.session.query(
+            FraudAlert.id, FraudAlert.content_type, FraudAlert.risk_score, FraudAlert.severity,
+            FraudAlert.created_at, text_preview(FraudAlert.content).label('content_preview')
+        )
+        alerts, next_cursor = keyset_page(
+            _filtered_alerts(query, request.args), FraudAlert, limit, request.args.get('cursor')
+        )
+    except ValueError as e:
+        return _bad_request(str(e))
 
     alerts_data = []
     for alert in alerts:
@@ -287,23 +725,51 @@ def api_alerts():
             'risk_score': alert.risk_score,
             'severity': alert.severity,
             'created_at': alert.created_at.isoformat(),
-            'content_preview': alert.content[:100] + '...' if len(alert.content) > 100 else alert.content
+            'content_preview': alert.content_preview
         })
 
-    return jsonify(alerts_data)
+    return alerts_data, _page_headers('api_alerts', ALERT_LIST_PARAMS, next_cursor)
+
+@app.route('/api/reports')
+@require_login
+def api_reports():
+    """
+    Community reports, newest first. Filters: status, platform, fraud_type,
+    since, until; limit rows per page, the next page's cursor in X-Next-Cursor
+    and Link.
+    """
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+        reports, next_cursor = keyset_page(
+            _filtered_reports(UserReport.query, request.args), UserReport, limit, request.args.get('cursor')
+        )
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    reports_data = [{
+        'id': report.id,
+        'platform': report.platform,
+        'fraud_type': report.fraud_type,
+        'amount_involved': report.amount_involved,
+        'status': report.status,
+        'content_url': report.content_url,
+        'content_description': report.content_description,
+        'created_at': report.created_at.isoformat()
+    } for report in reports]
+
+    return jsonify(reports_data), 200, _page_headers('api_reports', REPORT_LIST_PARAMS, next_cursor)
 
 @app.route('/api/stats')
+@stats_cache.cached()
 def api_stats():
     """API endpoint for dashboard statistics"""
-    total_alerts = FraudAlert.query.count()
-    active_alerts = FraudAlert.query.filter(FraudAlert.status == 'active').count()
-    high_risk_alerts = FraudAlert.query.filter(FraudAlert.risk_score >= 7.0).count()
+    totals = alert_totals()
 
-    return jsonify({
-        'total_alerts': total_alerts,
-        'active_alerts': active_alerts,
-        'high_risk_alerts': high_risk_alerts
-    })
+    return {
+        'total_alerts': totals['total'],
+        'active_alerts': totals['active'],
+        'high_risk_alerts': totals['high_risk']
+    }
 
 @app.route('/api/education/simulate-risk', methods=['POST'])
 @require_login
@@ -372,14 +838,16 @@ def api_chatbot():
 def export_analysis_pdf(content_hash):
     """Export analysis results as PDF"""
     try:
+        # The analysis may still be waiting in the write buffer
+        analysis_writer.flush()
+
         # Get analysis from history
         analysis = AnalysisHistory.query.filter_by(content_hash=content_hash).first()
         if not analysis:
             flash('Analysis not found', 'error')
             return redirect(url_for('analyzer'))
         
-        # Parse analysis result
-        analysis_data = json.loads(analysis.analysis_result)
+        analysis_data = analysis.analysis_result
         
         # Create PDF buffer
         buffer = io.BytesIO()
@@ -0,0 +1,255 @@
+from keyword_matcher import KeywordMatcher
+from pattern_scanners import LinePairScanner, compile_pattern
+from datetime import datetime
+from types import MappingProxyType
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+# Rules file shipped with the app; FRAUD_RULES_PATH points FraudDetector elsewhere
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fraud_rules.json')
+
+# Canonical forms of the suspicious patterns that have fused scanners. A rules
+# file that changes one of these falls back to a standalone regex for it.
+PHONE_NUMBER_PATTERN = r'\b\d{10}\b'
+PERCENTAGE_RETURN_PATTERN = r'\b\d+%\s*return'
+RUPEE_UNIT_PATTERNS = {
+    'lakh_amount': r'₹\s*\d+\s*lakh',
+    'crore_amount': r'₹\s*\d+\s*crore'
+}
+
+
+# Keyword families FraudDetector scores at their weight per phrase found; the
+# sentiment families only feed the sentiment rule
+WEIGHTED_FAMILIES = ('high_risk', 'medium_risk', 'urgency', 'contact_pressure', 'ai_generated')
+
+# Indic scripts by Unicode block; the blocks are contiguous, 128 code points
+# each, starting at U+0900. Letters outside these blocks count as Latin.
+INDIC_BLOCK_START = 0x0900
+INDIC_SCRIPTS = ('devanagari', 'bengali', 'gurmukhi', 'gujarati', 'oriya', 'tamil', 'telugu')
+INDIC_SCANNER = re.compile('[\u0900-\u0C7F]+')
+
+# Language assumed for text written mostly in a script. Devanagari is also used
+# for Marathi, which the keyword tables do not cover separately.
+SCRIPT_LANGUAGES = {
+    'latin': 'english',
+    'devanagari': 'hindi',
+    'bengali': 'bengali',
+    'gurmukhi': 'punjabi',
+    'gujarati': 'gujarati',
+    'oriya': 'odia',
+    'tamil': 'tamil',
+    'telugu': 'telugu'
+}
+
+
+def count_scripts(text, letter_count):
+    """
+    Return {script: number of characters} for the scripts used in text, given
+    its number of alphabetic characters. Only runs of Indic code points are
+    scanned; ASCII-only text is answered without a scan.
+    """
+    scripts = {}
+    if not text.isascii():
+        for run in INDIC_SCANNER.findall(text):
+            script = INDIC_SCRIPTS[(ord(run[0]) - INDIC_BLOCK_START) >> 7]
+            scripts[script] = scripts.get(script, 0) + len(run)
+            letter_count -= sum(map(str.isalpha, run))
+    if letter_count > 0:
+        scripts['latin'] = letter_count
+    return scripts
+
+
+def normalize_text(text):
+    """NFC-normalize text so composed and decomposed Indic/accented input match the same phrases"""
+    if text.isascii() or unicodedata.is_normalized('NFC', text):
+        return text
+    return unicodedata.normalize('NFC', text)
+
+
+def normalize_phrase(phrase):
+    return normalize_text(phrase).lower()
+
+
+def _freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class Ruleset:
+    """
+    Immutable, versioned scoring rules compiled into matcher structures.
+
+    A Ruleset is built once from the rules data (normally fraud_rules.json) and
+    never modified afterwards; FraudDetector swaps whole rulesets atomically
+    when the file changes. The version combines the declared version with a
+    digest of the rules, so any edit yields a new version even if the declared
+    one was not bumped.
+    """
+
+    def __init__(self, data, source=None):
+        canonical = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        self._set('digest', hashlib.sha256(canonical).hexdigest())
+        self._set('declared_version', str(data.get('version', '0')))
+        self._set('version', f"{self.declared_version}+{self.digest[:12]}")
+        self._set('source', source)
+        self._set('loaded_at', datetime.utcnow())
+        self._set('rules', _freeze(data))
+
+        rules = self.rules
+        self._set('max_score', float(rules['max_score']))
+        limits = rules.get('limits', MappingProxyType({}))
+        self._set('max_text_length', limits.get('max_text_length'))
+        self._set('time_budget', limits.get('time_budget_seconds'))
+        self._set('recommendations', tuple(
+            (float(entry['min_score']), entry['recommendation'])
+            for entry in sorted(rules['recommendations'], key=lambda entry: entry['min_score'], reverse=True)
+        ))
+        self._set('keyword_families', rules['keyword_families'])
+
+        # Non-English fraud phrases, one family per language, matched in the
+        # same pass as the English families so mixed-script text needs one scan
+        regional = rules.get('regional_keywords', MappingProxyType({'languages': MappingProxyType({})}))
+        self._set('regional_weight', float(regional.get('weight', 0.0)))
+        self._set('regional_languages', tuple(
+            (language, entry['script'], 'regional:' + language) for language, entry in regional['languages'].items()
+        ))
+
+        patterns = rules['suspicious_patterns']
+        self._set('suspicious_pattern_names', tuple(entry['name'] for entry in patterns))
+
+        # Literal phrases ride along with the keyword scan
+        self._set('flagged_terms', MappingProxyType({
+            entry['name']: normalize_phrase(entry['phrase']) for entry in patterns if 'phrase' in entry
+        }))
+
+        families = {name: [normalize_phrase(phrase) for phrase in family['phrases']]
+                    for name, family in self.keyword_families.items()}
+        for language, _, family in self.regional_languages:
+            families[family] = [normalize_phrase(phrase) for phrase in regional['languages'][language]['phrases']]
+        families['flagged_terms'] = tuple(self.flagged_terms.values())
+        self._set('keyword_matcher', KeywordMatcher(families))
+
+        # Score each phrase adds through the weighted families it belongs to
+        phrase_weights = {}
+        for name, phrases in families.items():
+            if name in WEIGHTED_FAMILIES:
+                weight = float(self.weight(name))
+            elif name.startswith('regional:'):
+                weight = self.regional_weight
+            else:
+                continue
+            for phrase in phrases:
+                phrase_weights[phrase] = phrase_weights.get(phrase, 0.0) + weight
+        self._set('phrase_weights', MappingProxyType(phrase_weights))
+
+        # Used instead of the keyword scan when lower-casing would shift offsets
+        # or hide a match (dotless i and long s fold under re.IGNORECASE)
+        self._set('term_scanner', re.compile(
+            '|'.join(f'(?P<{name}>{re.escape(term)})' for name, term in self.flagged_terms.items()),
+            re.IGNORECASE
+        ) if self.flagged_terms else None)
+
+        regex_patterns = {entry['name']: entry['pattern'] for entry in patterns if 'pattern' in entry}
+
+        # Phone numbers and percentage returns both start on a digit run, so
+        # they share one scan. The return branch is tried first because both can
+        # start on the same ten digits ("9876543210% return").
+        fuse_numbers = (regex_patterns.get('phone_number') == PHONE_NUMBER_PATTERN and
+                        regex_patterns.get('percentage_return') == PERCENTAGE_RETURN_PATTERN)
+        self._set('number_scanner', re.compile(
+            r'\b(?=\d)(?:(?P<return_digits>\d+)(?P<percentage_return>%\s*return)|(?P<phone_number>\d{10}\b))',
+            re.IGNORECASE
+        ) if fuse_numbers else None)
+
+        # Every rupee amount, with its lakh/crore unit when one follows. This
+        # covers the money rules and the canonical lakh/crore patterns.
+        self._set('rupee_scanner', re.compile(r'₹\s*(?P<amount>\d+(?:,\d+)*)(?:\s*(?P<unit>(?i:lakh|crore)))?'))
+        self._set('rupee_unit_patterns', frozenset(
+            name for name, pattern in RUPEE_UNIT_PATTERNS.items() if regex_patterns.get(name) == pattern
+        ))
+
+        fused = set(self.rupee_unit_patterns)
+        if fuse_numbers:
+            fused.update(('phone_number', 'percentage_return'))
+        self._set('pattern_scanners', tuple(
+            (name, compile_pattern(pattern, re.IGNORECASE))
+            for name, pattern in regex_patterns.items() if name not in fused
+        ))
+        # Patterns whose match runs to the last tail on its line
+        self._set('line_pair_scanners', tuple(
+            (name, scanner) for name, scanner in self.pattern_scanners if isinstance(scanner, LinePairScanner)
+        ))
+
+        # Columns of FraudDetector.extract_features and the weight each one
+        # carries in the risk score
+        sentiment = rules['sentiment']
+        feature_weights = [(family, float(self.weight(family))) for family in WEIGHTED_FAMILIES]
+        feature_weights += [(family, self.regional_weight) for _, _, family in self.regional_languages]
+        feature_weights += [
+            ('suspicious_patterns', float(rules['suspicious_pattern_weight'])),
+            ('unrealistic_success_rates', float(rules['success_rate']['weight'])),
+            ('large_money_amounts', float(rules['money']['weight'])),
+            ('overly_positive', float(sentiment['overly_positive_weight'])),
+            ('cautious', float(sentiment['cautious_weight'])),
+            ('excessive_emoji', float(rules['emoji']['weight'])),
+            ('excessive_caps', float(rules['caps']['weight']))
+        ]
+        self._set('text_feature_count', len(feature_weights))
+        # URL and media columns, set only in rows of that content type
+        url = rules['url']
+        feature_weights += [
+            ('url_suspicious_domains', float(url['suspicious_domains']['weight'])),
+            ('url_long_number', float(url['long_number']['weight'])),
+            ('url_excessive_hyphens', float(url['hyphens']['weight'])),
+            ('url_non_standard_scheme', float(url['non_standard_scheme']['weight'])),
+            ('url_suspicious_params', float(url['suspicious_params']['weight'])),
+            ('url_shortener', float(url['shorteners']['weight'])),
+            ('media_review', float(rules['media_review_score']))
+        ]
+        self._set('feature_columns', tuple(name for name, _ in feature_weights))
+        self._set('feature_weights', tuple(weight for _, weight in feature_weights))
+
+        self._set('success_rate_scanner', re.compile(rules['success_rate']['pattern']))
+        self._set('emoji_scanner', re.compile(rules['emoji']['pattern']))
+        self._set('url_long_number', re.compile(rules['url']['long_number']['pattern']))
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Ruleset is immutable; load a new one instead')
+
+    def __delattr__(self, name):
+        raise AttributeError('Ruleset is immutable; load a new one instead')
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), source=os.path.abspath(path))
+
+    def weight(self, family):
+        return self.keyword_families[family].get('weight', 0.0)
+
+    def recommendation_for(self, risk_score):
+        for min_score, recommendation in self.recommendations:
+            if risk_score >= min_score:
+                return recommendation
+        return self.rules['default_recommendation']
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'declared_version': self.declared_version,
+            'source': self.source,
+            'loaded_at': self.loaded_at.isoformat(),
+            'keyword_phrases': sum(len(family['phrases']) for family in self.keyword_families.values()),
+            'languages': ['english'] + [language for language, _, _ in self.regional_languages],
+            'suspicious_patterns': len(self.suspicious_pattern_names)
+        }
@@ -2,18 +2,46 @@
 
 class Dashboard {
     constructor() {
-        this.refreshInterval = 30000; // 30 seconds
+        this.refreshInterval = 30000; // 30 seconds, only used without the event stream
         this.charts = {};
         this.autoRefreshEnabled = true;
+        this.eventSource = null;
         this.init();
     }
 
     init() {
         this.setupEventListeners();
-        this.startAutoRefresh();
+        if (window.EventSource) {
+            this.connectStream();
+        } else {
+            this.startAutoRefresh();
+        }
         console.log('Dashboard initialized');
     }
 
+    connectStream() {
+        // The server pushes each new alert and stat change once; EventSource
+        // reconnects by itself and resumes from the last event id it saw
+        this.eventSource = new EventSource('/api/stream');
+
+        this.eventSource.addEventListener('stats', (e) => {
+            this.updateStats(JSON.parse(e.data).stats);
+        });
+
+        this.eventSource.addEventListener('alert', (e) => {
+            this.prependAlert(JSON.parse(e.data));
+        });
+
+        this.eventSource.onerror = () => {
+            // CLOSED means the browser gave up (logged out, or the server is at its
+            // stream limit and answered 503); fall back to polling
+            if (this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                this.startAutoRefresh();
+            }
+        };
+    }
+
     setupEventListeners() {
         // Refresh button
         const refreshBtn = document.querySelector('[onclick="refreshDashboard()"]');
@@ -71,6 +99,18 @@ class Dashboard {
         }
     }
 
+    async loadStats() {
+        try {
+            const response = await fetch('/api/dashboard/stats');
+            const stats = await response.json();
+
+            this.updateStats(stats);
+
+        } catch (error) {
+            console.error('Error loading stats:', error);
+        }
+    }
+
     updateStats(stats) {
         // Update statistics cards
         const totalAlertsEl = document.getElementById('total-alerts');
@@ -78,12 +118,27 @@ class Dashboard {
         const mediumRiskEl = document.getElementById('medium-risk-count');
         const lowRiskEl = document.getElementById('low-risk-count');
 
-        if (totalAlertsEl) totalAlertsEl.textContent = stats.active_alerts;
-        if (highRiskEl) highRiskEl.textContent = stats.high_risk_alerts;
-        
         // Animate number changes
         this.animateNumber(totalAlertsEl, stats.active_alerts);
         this.animateNumber(highRiskEl, stats.high_risk_alerts);
+
+        // Streamed stats also carry the per-bucket counts
+        if (stats.risk_distribution) {
+            this.animateNumber(mediumRiskEl, stats.risk_distribution.medium);
+            this.animateNumber(lowRiskEl, stats.risk_distribution.low);
+        }
+    }
+
+    prependAlert(alert) {
+        const tbody = document.querySelector('#alerts-container tbody');
+        if (!tbody || alert.status !== 'active') return;
+
+        tbody.insertAdjacentHTML('afterbegin', this.createAlertRow(alert));
+        // Keep the table at the 10 most recent alerts
+        while (tbody.rows.length > 10) {
+            tbody.deleteRow(-1);
+        }
+        feather.replace();
     }
 
     updateAlertsTable(alerts) {
@@ -150,11 +205,11 @@ class Dashboard {
                 </td>
                 <td>
                     <i data-feather="${contentTypeIcon}" class="me-1"></i>
-                    ${alert.content_type.charAt(0).toUpperCase() + alert.content_type.slice(1)}
+                    ${escapeHtml(alert.content_type.charAt(0).toUpperCase() + alert.content_type.slice(1))}
                 </td>
                 <td>
                     <span class="text-truncate d-inline-block" style="max-width: 300px;">
-                        ${alert.content_preview}
+                        ${escapeHtml(alert.content_preview)}
                     </span>
                 </td>
                 <td>
@@ -303,9 +358,10 @@ class Dashboard {
     }
 
     startAutoRefresh() {
-        if (!this.autoRefreshEnabled) return;
+        if (!this.autoRefreshEnabled || this.refreshTimer) return;
 
         this.refreshTimer = setInterval(() => {
+            this.loadStats();
             this.loadAlerts();
         }, this.refreshInterval);
     }
@@ -318,6 +374,13 @@ class Dashboard {
     }
 }
 
+// Alert content is user-submitted; escape it before it goes into row markup
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+}
+
 // Global functions for inline event handlers
 function refreshDashboard() {
     if (window.dashboard) {
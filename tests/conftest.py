@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+import pytest
+
+# app reads DATABASE_URL when it is imported: point it at a throwaway SQLite file
+_database_dir = tempfile.mkdtemp(prefix='fraudshield-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_database_dir, 'test.db')
+os.environ.setdefault('FRAUD_RULES_RELOAD_INTERVAL', '3600')
+
+# Importing app also migrates the database and registers the routes, which
+# the other modules expect to have happened first
+from app import app as flask_app  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def db(app):
+    from app import db as database
+    with app.app_context():
+        yield database
+        database.session.remove()
+
+
+@pytest.fixture
+def client(app, db):
+    """A test client logged in as a fresh user"""
+    from models import User
+    import uuid
+
+    user = User(email=f'{uuid.uuid4().hex}@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+
+    test_client = app.test_client()
+    with test_client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return test_client
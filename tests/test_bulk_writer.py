@@ -0,0 +1,102 @@
+import fcntl
+
+import pytest
+
+from bulk_writer import BulkWriter
+from models import AnalysisHistory, FraudAlert
+
+
+def history_row(content_hash):
+    return (AnalysisHistory, {'content_hash': content_hash, 'analysis_type': 'text', 'risk_score': 6.0,
+                              'analysis_result': {'risk_score': 6.0}})
+
+
+def alert_row(content):
+    return (FraudAlert, {'content_type': 'text', 'content': content, 'risk_score': 6.0,
+                         'fraud_indicators': ['x'], 'severity': 'medium'})
+
+
+def history_count(db, content_hash):
+    return AnalysisHistory.query.filter_by(content_hash=content_hash).count()
+
+
+def test_sync_writes_rows_together(db):
+    writer = BulkWriter((AnalysisHistory, FraudAlert))
+    writer.add_rows([history_row('sync-together'), alert_row('sync together')])
+    assert history_count(db, 'sync-together') == 1
+    assert FraudAlert.query.filter_by(content='sync together').count() == 1
+    assert writer.stats()['flushes'] == 1
+
+
+def test_sync_rows_share_one_transaction(db):
+    writer = BulkWriter((AnalysisHistory, FraudAlert))
+    # content is NOT NULL, so the alert insert fails and takes the history row with it
+    with pytest.raises(Exception):
+        writer.add_rows([history_row('sync-rollback'), alert_row(None)])
+    assert history_count(db, 'sync-rollback') == 0
+
+
+def test_buffered_rows_wait_for_flush(db):
+    writer = BulkWriter((AnalysisHistory, FraudAlert), durability='memory', max_delay=3600)
+    try:
+        writer.add_rows([history_row('buffered'), alert_row('buffered')])
+        assert history_count(db, 'buffered') == 0
+        assert writer.pending() == 2
+        assert writer.flush()
+        assert history_count(db, 'buffered') == 1
+    finally:
+        writer.close()
+
+
+def test_journal_replays_unwritten_rows(db, tmp_path):
+    journal = str(tmp_path / 'writes.jsonl')
+    writer = BulkWriter((AnalysisHistory,), durability='journal', journal_path=journal, max_delay=3600)
+    writer.add_rows([history_row('journaled')])
+    # Simulate a crash: the buffer and the lock are lost, the journal is not
+    writer._rows = []
+    writer._closed = True
+    writer._journal.close()
+    writer._journal_lock.close()
+
+    replayed = BulkWriter((AnalysisHistory,), durability='journal', journal_path=journal, max_delay=3600)
+    try:
+        assert replayed.pending() == 1
+        assert replayed.flush()
+        assert history_count(db, 'journaled') == 1
+    finally:
+        replayed.close()
+
+
+def test_journal_of_exited_process_is_taken_over(db, tmp_path):
+    journal = str(tmp_path / 'writes.jsonl')
+    # Left by a worker that is gone: no process holds its lock
+    orphan = tmp_path / 'writes.jsonl.4194999'
+    orphan.write_text('{"table": "analysis_history", "row": {"content_hash": "orphaned", "analysis_type": "text", '
+                      '"risk_score": 6.0}}\n{"table": "analysis_hist', encoding='utf-8')
+
+    writer = BulkWriter((AnalysisHistory,), durability='journal', journal_path=journal, max_delay=3600)
+    try:
+        assert writer.journal_path != str(orphan)
+        assert not orphan.exists()
+        assert writer.pending() == 1
+        assert writer.flush()
+        assert history_count(db, 'orphaned') == 1
+    finally:
+        writer.close()
+
+
+def test_running_writers_keep_their_own_journals(db, tmp_path):
+    journal = str(tmp_path / 'writes.jsonl')
+    first = BulkWriter((AnalysisHistory,), durability='journal', journal_path=journal, max_delay=3600)
+    try:
+        first.add_rows([history_row('first-writer')])
+        # Another worker of the same server: a locked journal is not taken over
+        other = tmp_path / 'writes.jsonl.4194998'
+        other.write_text('', encoding='utf-8')
+        with open(str(other) + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            first._adopt_orphaned_journals()
+        assert other.exists()
+        assert first.pending() == 1
+    finally:
+        first.close()
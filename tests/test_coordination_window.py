@@ -0,0 +1,108 @@
+import random
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from coordination_window import CoordinationWindow
+from models import FraudAlert, NetworkConnection
+
+# Far enough ahead that rows other tests add fall outside every window
+NOW = datetime(2100, 1, 1)
+
+
+@pytest.fixture
+def alerts(db):
+    """Add FraudAlert rows dated around NOW, deleted again after the test"""
+    added = []
+
+    def add(minutes_ago, risk_score=9.0, content='contact scam@example.com', alert_id=None):
+        alert = FraudAlert(id=alert_id, content_type='text', content=content, risk_score=risk_score,
+                           severity='high', created_at=NOW - timedelta(minutes=minutes_ago))
+        db.session.add(alert)
+        db.session.commit()
+        added.append(alert.id)
+        return alert.id
+
+    yield add
+    FraudAlert.query.filter(FraudAlert.id.in_(added)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def test_full_reload_picks_up_rows_committed_out_of_id_order(db, alerts):
+    window = CoordinationWindow(refresh_interval=0, max_age=3600)
+    newest = (db.session.query(db.func.max(FraudAlert.id)).scalar() or 0) + 10
+
+    alerts(5, alert_id=newest)
+    assert window.detect(now=NOW)['simultaneous_alerts'] == 1
+
+    # Committed after the higher id was read: the incremental read skips it
+    alerts(3, alert_id=newest - 5)
+    assert window.detect(now=NOW)['simultaneous_alerts'] == 1
+
+    window.max_age = 0
+    assert window.detect(now=NOW)['simultaneous_alerts'] == 2
+    assert window.stats()['reloads'] == 2
+
+
+@pytest.fixture
+def connections(db):
+    """Add NetworkConnection rows dated around NOW, deleted again after the test"""
+    added = []
+
+    def add(minutes_ago, source, target, score):
+        connection = NetworkConnection(source_entity=source, target_entity=target, connection_type='financial',
+                                       strength=0.5, suspicious_score=score,
+                                       detected_at=NOW - timedelta(minutes=minutes_ago))
+        db.session.add(connection)
+        db.session.commit()
+        added.append(connection.id)
+
+    yield add
+    NetworkConnection.query.filter(NetworkConnection.id.in_(added)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def naive_counts(hours):
+    """The per-call queries the window replaces: alert and connection counts and shared entities"""
+    cutoff = NOW - timedelta(hours=hours)
+    alerts = FraudAlert.query.filter(FraudAlert.created_at >= cutoff, FraudAlert.created_at <= NOW,
+                                     FraudAlert.risk_score >= 6.0).all()
+    connections = NetworkConnection.query.filter(NetworkConnection.detected_at >= cutoff,
+                                                 NetworkConnection.detected_at <= NOW,
+                                                 NetworkConnection.suspicious_score >= 6.0).all()
+    alert_entities = set()
+    for alert in alerts:
+        alert_entities.update(re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', alert.content))
+        alert_entities.update(re.findall(r'\b\d{10}\b', alert.content))
+    connection_entities = {entity for connection in connections
+                           for entity in (connection.source_entity, connection.target_entity)}
+    return len(alerts), len(connections), sorted(alert_entities & connection_entities)
+
+
+def test_window_matches_per_call_queries(db, alerts, connections):
+    rng = random.Random(25)
+    entities = [f'user{number}@example.com' for number in range(15)] + \
+        [str(9000000000 + number) for number in range(15)]
+    window = CoordinationWindow(refresh_interval=0)
+
+    for _ in range(4):
+        for _ in range(40):
+            # Whole minutes, so every event sits on a bucket edge like the window cutoffs
+            alerts(rng.randrange(0, 200 * 60), risk_score=rng.choice([3.0, 6.0, 9.5]),
+                   content=f'send to {rng.choice(entities)} or {rng.choice(entities)} now')
+            connections(rng.randrange(0, 200 * 60), rng.choice(entities), rng.choice(entities + ['shell-co']),
+                        rng.choice([2.0, 6.0, 8.0]))
+        for hours in (1, 6, 24, 168):
+            result = window.detect(hours, now=NOW)
+            alert_count, connection_count, overlap = naive_counts(hours)
+            assert result['simultaneous_alerts'] == alert_count
+            assert result['new_connections'] == connection_count
+            assert result['coordination_score'] == pytest.approx(
+                3.0 * (alert_count >= 3) + 2.0 * (connection_count >= 2) + 2.0 * len(overlap))
+            if overlap:
+                assert result['evidence'][-1] == f'Entities appear in both alerts and network connections: {overlap}'
+
+    assert window.stats()['reloads'] == 1
+    with pytest.raises(ValueError):
+        window.detect(169, now=NOW)
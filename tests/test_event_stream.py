@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from event_stream import EventStream
+from models import FraudAlert
+
+
+@pytest.fixture
+def stream(db):
+    # Polls only when a test calls _poll(), so events arrive in a known order
+    return EventStream(poll_interval=3600, max_subscribers=2, queue_size=3)
+
+
+def events(subscriber):
+    """Decode the messages waiting in a subscriber queue into (event, id, data)"""
+    decoded = []
+    while not subscriber.empty():
+        message = subscriber.get_nowait()
+        if message is None:
+            decoded.append(None)
+            continue
+        fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+        decoded.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return decoded
+
+
+def test_subscribers_beyond_the_cap_are_rejected(stream):
+    first = stream.subscribe()
+    assert stream.subscribe() is not None
+    assert stream.subscribe() is None
+    assert stream.stats()['rejected_subscribers'] == 1
+
+    stream.unsubscribe(first)
+    assert stream.subscribe() is not None
+
+
+def test_new_subscriber_gets_current_stats_then_events(stream):
+    subscriber = stream.subscribe()
+    stream.publish('alert', {'id': 1})
+    received = events(subscriber)
+    assert received[0][0] == 'stats' and received[0][1] is None
+    assert received[1] == ('alert', '1', {'id': 1})
+
+
+def test_reconnect_resumes_after_last_event_id(stream):
+    for alert_id in range(1, 4):
+        stream.publish('alert', {'id': alert_id})
+    subscriber = stream.subscribe(last_event_id=1)
+    assert [data['id'] for _, _, data in events(subscriber)] == [2, 3]
+
+
+def test_slow_subscriber_is_dropped(stream):
+    subscriber = stream.subscribe()
+    for alert_id in range(5):
+        stream.publish('alert', {'id': alert_id})
+    assert events(subscriber)[-1] is None
+    assert stream.stats()['dropped_subscribers'] == 1
+
+
+def test_poll_publishes_new_alerts(stream, db):
+    stream.start()
+    subscriber = stream.subscribe()
+    events(subscriber)
+
+    alert = FraudAlert(content_type='text', content='<b>guaranteed</b> returns', risk_score=8.5, severity='high')
+    db.session.add(alert)
+    db.session.commit()
+    try:
+        stream._poll()
+        published = [data for event, _, data in events(subscriber) if event == 'alert']
+        assert [data['id'] for data in published] == [alert.id]
+        assert published[0]['content_preview'] == '<b>guaranteed</b> returns'
+    finally:
+        db.session.delete(alert)
+        db.session.commit()
+
+
+def test_stream_route_answers_503_at_the_cap(client, monkeypatch):
+    import routes
+    monkeypatch.setattr(routes.event_stream, 'max_subscribers', 0)
+    response = client.get('/api/stream')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
@@ -0,0 +1,73 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from corpus_scanner import extract_corpus_features
+from fraud_detector import FraudDetector
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return FraudDetector(reload_interval=3600)
+
+
+def assert_scores_match(detector, items):
+    scores = detector.score_features(detector.extract_features(items))
+    for item, score in zip(items, scores):
+        item = item if isinstance(item, dict) else {'content': item}
+        full = detector.analyze_content(item['content'], item.get('content_type', 'text'), time_budget=3600)
+        assert score == pytest.approx(full['risk_score']), item
+
+
+def test_content_types_score_like_analyze_content(detector):
+    assert_scores_match(detector, [
+        'Guaranteed 500% returns, act now and message telegram @admin',
+        {'content': 'https://bit.ly/get-rich-quick?ref=123456789', 'content_type': 'url'},
+        {'content': 'http://a-b-c-d-e.example', 'content_type': 'url'},
+        {'content': 'ftp://files.example', 'content_type': 'url'},
+        {'content': 'holiday photo', 'content_type': 'image'},
+        {'content': 'guaranteed returns', 'language': 'auto'}
+    ])
+
+
+def test_text_is_cut_at_max_text_length(detector):
+    limit = detector.ruleset.max_text_length
+    text = 'x' * limit + ' guaranteed returns, contact telegram @admin'
+    assert detector.analyze_content(text, time_budget=3600)['input_truncated']
+    assert_scores_match(detector, [text])
+
+
+def test_non_string_fields_are_rejected(detector):
+    with pytest.raises(ValueError):
+        detector.extract_features([{'content': 'guaranteed returns', 'language': 3}])
+
+
+def test_random_texts_score_like_analyze_content(detector):
+    rng = random.Random(10)
+    pieces = ['x', ' ', '\n', '!', '95', '%', 'success', 'GUARANTEED', 'guaranteed returns', 'act now',
+              'telegram', '@u', 'whatsapp', '+91', '₹', '5 lakh', '$50,000', 'risk-free', '🚀', 'careful']
+    texts = [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 80))) for _ in range(300)]
+    assert_scores_match(detector, texts)
+
+
+def test_corpus_features_keep_content_types(detector, tmp_path):
+    records = [
+        {'content': 'guaranteed returns, act now'},
+        {'content': 'https://bit.ly/quick-money?ref=1', 'content_type': 'url'},
+        {'content': 'scan', 'content_type': 'video'},
+        {'content': 'labelled', 'language': ['english']},
+        'plain string record'
+    ]
+    corpus = tmp_path / 'corpus.jsonl'
+    corpus.write_text('\n'.join(json.dumps(record) for record in records) + '\nnot json\n', encoding='utf-8')
+
+    matrix = extract_corpus_features(str(corpus), str(tmp_path / 'features.npz'), workers=1, log=None)
+    with np.load(tmp_path / 'features.npz') as saved:
+        assert saved['lines'].tolist() == [1, 2, 3, 5]
+
+    valid = [records[0], records[1], records[2], records[4]]
+    assert detector.score_features(matrix).tolist() == pytest.approx(
+        detector.score_features(detector.extract_features(valid)).tolist())
+    assert_scores_match(detector, valid)
@@ -0,0 +1,45 @@
+import io
+import random
+
+import pytest
+
+from fraud_detector import FraudDetector
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return FraudDetector(reload_interval=3600)
+
+
+def assert_same_analysis(detector, text, **stream_options):
+    full = detector.analyze_content(text)
+    streamed = detector.analyze_stream(io.StringIO(text), **stream_options)
+    assert streamed['risk_score'] == full['risk_score']
+    assert streamed['indicators'] == full['indicators']
+    assert streamed['suspicious_patterns'] == full['suspicious_patterns']
+
+
+@pytest.mark.parametrize('head, tail', [('telegram', '@admin'), ('whatsapp', '+919876543210')])
+def test_line_pair_match_on_line_longer_than_chunk(detector, head, tail):
+    text = f'join our {head} group ' + 'x ' * 20000 + f' and message {tail} now\nthanks'
+    assert_same_analysis(detector, text, chunk_size=4096, overlap=256)
+
+
+def test_line_pair_match_after_unmatched_lines(detector):
+    text = 'telegram without a tail\n' * 50 + 'telegram ' + 'y' * 9000 + ' @admin\n' + 'done'
+    assert_same_analysis(detector, text, chunk_size=1024, overlap=64)
+
+
+def test_success_rates_after_lengthening_lowercase(detector):
+    # 'İ'.lower() is two characters long, which shifts text.lower() offsets
+    text = ('İ' * 30 + ' 95% success ') * 40
+    assert_same_analysis(detector, text, chunk_size=97, overlap=40)
+
+
+def test_random_documents_match_full_analysis(detector):
+    rng = random.Random(8)
+    pieces = ['x', ' ', '\n', '9', '95', '%', 'success', 'Success', 'ı', 'ſ', 'İ', 'Σ', '₹', '5 lakh',
+              'guaranteed', 'telegram', '@u', 'whatsapp', '+91']
+    for _ in range(500):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(50, 600)))
+        assert_same_analysis(detector, text, chunk_size=rng.randint(64, 512), overlap=rng.randint(32, 64))
@@ -0,0 +1,54 @@
+import random
+
+from fraud_detector import FraudDetector
+from keyword_matcher import KeywordMatcher
+
+
+def naive_find(families, text):
+    """The per-phrase substring checks the matcher replaces"""
+    hits = {}
+    for family, phrases in families.items():
+        found = [phrase for phrase in phrases if phrase and phrase in text]
+        if found:
+            hits[family] = found
+    return hits
+
+
+def naive_positions(families, text):
+    positions = {}
+    for phrase in {phrase for phrases in families.values() for phrase in phrases if phrase}:
+        offsets = [offset for offset in range(len(text)) if text.startswith(phrase, offset)]
+        if offsets:
+            positions[phrase] = offsets
+    return positions
+
+
+def test_overlapping_and_prefix_phrases():
+    families = {'a': ['ab', 'abc', 'b'], 'b': ['bca', 'ab', '']}
+    matcher = KeywordMatcher(families)
+    text = 'xabcabca'
+    assert matcher.find(text) == naive_find(families, text)
+    assert matcher.positions(text) == naive_positions(families, text)
+    assert matcher.positions(text, 2, 4) == {'b': [2], 'bca': [2]}
+
+
+def test_random_texts_match_substring_search():
+    rng = random.Random(1)
+    for _ in range(200):
+        families = {f'family{index}': [''.join(rng.choice('abc ') for _ in range(rng.randint(1, 4)))
+                                       for _ in range(rng.randint(1, 6))]
+                    for index in range(3)}
+        matcher = KeywordMatcher(families)
+        text = ''.join(rng.choice('abc ') for _ in range(rng.randint(0, 60)))
+        assert matcher.find(text) == naive_find(families, text)
+        assert matcher.positions(text) == naive_positions(families, text)
+
+
+def test_ruleset_phrases_match_substring_search():
+    ruleset = FraudDetector(reload_interval=3600).ruleset
+    matcher = ruleset.keyword_matcher
+    phrases = sorted({phrase for phrases in matcher.families.values() for phrase in phrases})
+    rng = random.Random(2)
+    for _ in range(100):
+        text = ' '.join(rng.choice(phrases + ['filler', 'now', 'x']) for _ in range(rng.randint(0, 30)))
+        assert matcher.find(text) == naive_find(matcher.families, text)
@@ -0,0 +1,326 @@
+import random
+
+import pytest
+
+from models import NetworkConnection
+from network_index import NetworkIndex
+
+CONNECTION_TYPES = ('financial', 'communication', 'ownership')
+
+
+def random_rows(rng, count, entities):
+    rows = []
+    for _ in range(count):
+        source = f'entity{rng.randrange(entities)}'
+        # A few self-loops, which count once for each end
+        target = source if rng.random() < 0.03 else f'entity{rng.randrange(entities)}'
+        rows.append((source, target, rng.choice(CONNECTION_TYPES), round(rng.uniform(0.1, 1.0), 2),
+                     round(rng.uniform(1.0, 10.0), 1)))
+    return rows
+
+
+@pytest.fixture
+def connections(db):
+    """Replace the connection table with the given rows; returns the rows in id order so far"""
+    NetworkConnection.query.delete()
+    db.session.commit()
+    added = []
+
+    def add(rows):
+        for source, target, connection_type, strength, score in rows:
+            db.session.add(NetworkConnection(source_entity=source, target_entity=target,
+                                             connection_type=connection_type, strength=strength,
+                                             suspicious_score=score))
+        db.session.commit()
+        added.extend(rows)
+        return added
+
+    yield add
+    NetworkConnection.query.delete()
+    db.session.commit()
+
+
+def naive_summary(rows, suspicious_score=5.0, high_risk_score=8.0, hub_degree=3):
+    degree = {}
+    high_risk = []
+    parent = {}
+
+    def find(entity):
+        while parent.setdefault(entity, entity) != entity:
+            entity = parent[entity]
+        return entity
+
+    suspicious = [row for row in rows if row[4] >= suspicious_score]
+    for source, target, _, _, score in suspicious:
+        for entity in (source, target):
+            degree[entity] = degree.get(entity, 0) + 1
+            if score >= high_risk_score and entity not in high_risk:
+                high_risk.append(entity)
+        parent[find(source)] = find(target)
+    sizes = {}
+    for entity in degree:
+        sizes[find(entity)] = sizes.get(find(entity), 0) + 1
+    return {
+        'connections': len(suspicious),
+        'score_sum': sum(row[4] for row in suspicious),
+        'hubs': sum(1 for count in degree.values() if count >= hub_degree),
+        'clusters': sum(1 for size in sizes.values() if size > 1),
+        'high_risk_entities': high_risk
+    }
+
+
+def assert_summary_matches(index, rows):
+    summary = index.suspicious_summary()
+    expected = naive_summary(rows)
+    assert summary['score_sum'] == pytest.approx(expected.pop('score_sum'))
+    summary.pop('score_sum')
+    assert summary == expected
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_index_matches_naive_scan(connections, seed):
+    rng = random.Random(seed)
+    rows = connections(random_rows(rng, 400, 120))
+    index = NetworkIndex()
+
+    assert_summary_matches(index, rows)
+    for entity in ('entity0', 'entity7', 'entity119', 'unknown'):
+        assert index.entity_connections(entity) == [
+            (source, target, strength, score) for source, target, _, strength, score in rows
+            if entity in (source, target)
+        ]
+
+
+def test_index_reads_new_rows_and_rebuilds_on_change(connections, db):
+    rng = random.Random(21)
+    rows = connections(random_rows(rng, 200, 60))
+    index = NetworkIndex()
+    assert_summary_matches(index, rows)
+
+    # Inserted rows are read incrementally once committed
+    rows = connections(random_rows(rng, 50, 80))
+    assert_summary_matches(index, rows)
+    assert index.stats()['rebuilds'] == 1
+
+    # An update invalidates the index
+    changed = NetworkConnection.query.order_by(NetworkConnection.id).first()
+    changed.suspicious_score = 9.9
+    db.session.commit()
+    rows[0] = rows[0][:4] + (9.9,)
+    assert_summary_matches(index, rows)
+    assert index.stats()['rebuilds'] == 2
+
+
+def naive_neighborhood(rows, entity, max_depth, connection_types=None, min_score=0.0, decay=0.5):
+    usable = [(number, row) for number, row in enumerate(rows)
+              if row[4] >= min_score and (connection_types is None or row[2] in connection_types)]
+    hops = {entity: 0}
+    risks = {}
+    followed = {}  # row number -> weight
+    frontier = {entity}
+    for depth in range(1, max_depth + 1):
+        weight = decay ** (depth - 1)
+        reached = set()
+        for number, (source, target, _, _, score) in usable:
+            if source not in frontier and target not in frontier:
+                continue
+            followed.setdefault(number, weight)
+            for node, other in ((source, target), (target, source)):
+                if node in frontier and other != node and hops.get(other, depth) == depth:
+                    hops[other] = depth
+                    risks[other] = max(risks.get(other, 0.0), score * weight)
+                    reached.add(other)
+        frontier = reached
+    weight_total = sum(followed.values())
+    return {
+        'hops': {other: depth for other, depth in hops.items() if other != entity},
+        'risks': risks,
+        'connections': len(followed),
+        'decayed_risk': sum(rows[number][4] * weight for number, weight in followed.items()) / weight_total
+        if weight_total else 0.0
+    }
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_neighborhood_matches_breadth_first_search(connections, seed):
+    rng = random.Random(seed)
+    rows = connections(random_rows(rng, 300, 150))
+    index = NetworkIndex()
+    options = [{}, {'min_score': 6.0}, {'connection_types': ['financial', 'ownership']}]
+    for entity in ('entity1', 'entity42', 'entity99'):
+        for max_depth in (1, 2, 3):
+            for option in options:
+                result = index.neighborhood(entity, max_depth=max_depth, max_fanout=1000, **option)
+                expected = naive_neighborhood(rows, entity, max_depth, **option)
+                if result is None:
+                    assert not any(entity in row[:2] for row in rows)
+                    continue
+                assert not result['truncated']
+                assert {item['entity']: item['hops'] for item in result['entities']} == expected['hops']
+                assert {item['entity']: item['risk'] for item in result['entities']} == \
+                    pytest.approx(expected['risks'])
+                assert result['connections'] == expected['connections']
+                assert result['decayed_risk'] == pytest.approx(expected['decayed_risk'])
+                hops = [item['hops'] for item in result['entities']]
+                assert hops == sorted(hops)
+
+
+def test_neighborhood_fanout_keeps_the_highest_scores(connections):
+    connections([('hub', f'leaf{score}', 'financial', 0.5, float(score)) for score in range(1, 8)])
+    result = NetworkIndex().neighborhood('hub', max_depth=1, max_fanout=3)
+    assert result['truncated']
+    assert sorted(item['entity'] for item in result['entities']) == ['leaf5', 'leaf6', 'leaf7']
+    assert NetworkIndex().neighborhood('nobody') is None
+
+
+def naive_components(rows, suspicious_score=5.0):
+    """{frozenset of entities: [scores]} for the components of the suspicious connections"""
+    components = []
+    for source, target, _, _, score in rows:
+        if score < suspicious_score:
+            continue
+        joined = [component for component in components if source in component[0] or target in component[0]]
+        entities, scores = {source, target}, [score]
+        for component in joined:
+            components.remove(component)
+            entities |= component[0]
+            scores += component[1]
+        components.append((entities, scores))
+    return {frozenset(entities): scores for entities, scores in components if len(entities) > 1}
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_clusters_match_connected_components(connections, seed):
+    rng = random.Random(seed)
+    rows = connections(random_rows(rng, 150, 200))
+    clusters = NetworkIndex().clusters(sample=1000)
+    expected = naive_components(rows)
+
+    assert {frozenset(cluster['entities']): cluster['connections'] for cluster in clusters} == \
+        {entities: len(scores) for entities, scores in expected.items()}
+    for cluster in clusters:
+        scores = expected[frozenset(cluster['entities'])]
+        assert cluster['size'] == len(cluster['entities'])
+        assert cluster['average_score'] == pytest.approx(sum(scores) / len(scores))
+    assert [cluster['size'] for cluster in clusters] == sorted((cluster['size'] for cluster in clusters), reverse=True)
+
+
+def test_communities_split_rings_joined_by_a_weak_link(connections):
+    rows = []
+    for ring in ('a', 'b'):
+        members = [f'{ring}{number}' for number in range(5)]
+        rows += [(first, second, 'financial', 1.0, 9.0)
+                 for position, first in enumerate(members) for second in members[position + 1:]]
+    rows.append(('a0', 'b0', 'communication', 0.1, 6.0))
+    connections(rows)
+    index = NetworkIndex()
+
+    clusters = index.clusters(sample=20)
+    assert [cluster['size'] for cluster in clusters] == [10]
+
+    result = index.communities(sample=20)
+    assert result['converged']
+    assert sorted(sorted(community['entities']) for community in result['communities']) == [
+        [f'a{number}' for number in range(5)], [f'b{number}' for number in range(5)]
+    ]
+    assert [community['connections'] for community in result['communities']] == [10, 10]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_communities_stay_inside_clusters(connections, seed):
+    rng = random.Random(seed)
+    connections(random_rows(rng, 300, 150))
+    index = NetworkIndex()
+    clusters = [set(cluster['entities']) for cluster in index.clusters(sample=1000)]
+    communities = index.communities(sample=1000)['communities']
+    assert communities
+    for community in communities:
+        assert community['size'] == len(community['entities']) >= 2
+        assert sum(1 for cluster in clusters if set(community['entities']) <= cluster) == 1
+
+
+def naive_centrality(rows, damping=0.85):
+    """Degrees, dense power-iteration PageRank and exact Brandes betweenness, over undirected edges"""
+    entities = sorted({entity for row in rows for entity in row[:2]})
+    size = len(entities)
+    neighbours = {entity: [] for entity in entities}
+    weights = {entity: {} for entity in entities}
+    for source, target, _, strength, score in rows:
+        if source == target:
+            continue
+        for node, other in ((source, target), (target, source)):
+            neighbours[node].append(other)
+            weights[node][other] = weights[node].get(other, 0.0) + strength * score
+    weighted_degree = {entity: sum(weights[entity].values()) for entity in entities}
+
+    ranks = {entity: 1.0 / size for entity in entities}
+    for _ in range(1000):
+        dangling = sum(ranks[entity] for entity in entities if not weighted_degree[entity])
+        ranks = {
+            entity: (1 - damping) / size + damping * (dangling / size + sum(
+                ranks[other] * weight / weighted_degree[other] for other, weight in weights[entity].items()))
+            for entity in entities
+        }
+
+    betweenness = dict.fromkeys(entities, 0.0)
+    for source in entities:
+        distance, paths, order = {source: 0}, {source: 1.0}, [source]
+        for node in order:
+            for other in neighbours[node]:
+                if other not in distance:
+                    distance[other] = distance[node] + 1
+                    paths[other] = 0.0
+                    order.append(other)
+                if distance[other] == distance[node] + 1:
+                    paths[other] += paths[node]
+        dependency = dict.fromkeys(order, 0.0)
+        for node in reversed(order):
+            for other in neighbours[node]:
+                if distance[other] == distance[node] + 1:
+                    dependency[node] += paths[node] / paths[other] * (1 + dependency[other])
+            if node != source:
+                betweenness[node] += dependency[node]
+
+    return {entity: {
+        'pagerank': ranks[entity],
+        'degree': len(neighbours[entity]),
+        'weighted_degree': weighted_degree[entity],
+        'betweenness': betweenness[entity] / ((size - 1) * (size - 2))
+    } for entity in entities}
+
+
+def assert_centrality_matches(index, rows, **options):
+    expected = naive_centrality(rows)
+    ranked = index.centrality(limit=len(expected), samples=len(expected), tolerance=1e-12, max_iterations=1000,
+                              **options)
+    assert len(ranked) == len(expected)
+    for entry in ranked:
+        naive = expected[entry['entity']]
+        assert entry['degree'] == naive['degree']
+        assert entry['weighted_degree'] == pytest.approx(naive['weighted_degree'])
+        assert entry['pagerank'] == pytest.approx(naive['pagerank'], rel=1e-6, abs=1e-12)
+        assert entry['betweenness'] == pytest.approx(naive['betweenness'], abs=1e-12)
+    return ranked
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_centrality_matches_naive_computation(connections, seed):
+    rng = random.Random(seed)
+    rows = connections(random_rows(rng, 120, 40))
+    index = NetworkIndex()
+    for order_by in ('pagerank', 'degree', 'weighted_degree', 'betweenness'):
+        ranked = assert_centrality_matches(index, rows, order_by=order_by)
+        keys = [entry[order_by] for entry in ranked]
+        assert keys == sorted(keys, reverse=True)
+    assert sum(entry['pagerank'] for entry in ranked) == pytest.approx(1.0)
+
+
+def test_centrality_after_new_rows_matches_fresh_ranking(connections):
+    rng = random.Random(24)
+    connections(random_rows(rng, 100, 30))
+    index = NetworkIndex()
+    index.centrality(samples=30)
+
+    # Warm-started PageRank and a re-sampled betweenness once the graph grows
+    rows = connections(random_rows(rng, 20, 35))
+    assert_centrality_matches(index, rows)
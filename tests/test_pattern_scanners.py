@@ -0,0 +1,63 @@
+import random
+import re
+
+import pytest
+
+from fraud_detector import FraudDetector
+from pattern_scanners import LinePairScanner, compile_pattern
+
+# Money patterns the rupee scanner replaces
+MONEY_PATTERNS = {
+    'lakh': r'₹\s*(\d+(?:,\d+)*)\s*lakh',
+    'crore': r'₹\s*(\d+(?:,\d+)*)\s*crore',
+    'any': r'₹\s*(\d+(?:,\d+)*(?:,\d+)*)'
+}
+
+PIECES = ['x', ' ', '\n', '+', '@', '@u', '%', '% return', '%return', '% success', '9876543210', '12345678901',
+          '95', '99.5', '1,00,000', '₹', '₹ ', '₹50', 'lakh', 'Crore', 'telegram', 'Telegram', 'whatsapp', '+91',
+          'deepfake', 'DeepFake', 'pump and dump', 'wash trading', '🚀', '😀', 'ı', 'İ', 'ſ']
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return FraudDetector(reload_interval=3600)
+
+
+def naive_features(rules, text):
+    """The per-pattern re.findall passes the fused scanners replace"""
+    patterns = {}
+    for entry in rules['suspicious_patterns']:
+        pattern = entry['pattern'] if 'pattern' in entry else re.escape(entry['phrase'])
+        patterns[entry['name']] = re.findall(pattern, text, re.IGNORECASE)
+    money = [match for name in ('lakh', 'crore', 'any') for match in re.findall(MONEY_PATTERNS[name], text)]
+    return {
+        'pattern_matches': patterns,
+        'money_amounts': money,
+        'success_rates': [float(rate) for rate in re.findall(rules['success_rate']['pattern'], text.lower())],
+        'emoji_count': len(re.findall(rules['emoji']['pattern'], text))
+    }
+
+
+def test_fused_scanners_match_separate_passes(detector):
+    ruleset = detector.ruleset
+    assert ruleset.number_scanner is not None and ruleset.rupee_unit_patterns
+    rng = random.Random(2)
+    for _ in range(1000):
+        text = ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 40)))
+        features = detector._extract_text_features(text, ruleset)
+        expected = naive_features(ruleset.rules, text)
+        assert {name: matches for name, matches in features['pattern_matches'].items() if matches} == \
+            {name: matches for name, matches in expected['pattern_matches'].items() if matches}, text
+        assert features['money_amounts'] == expected['money_amounts'], text
+        assert features['success_rates'] == expected['success_rates'], text
+        assert features['emoji_count'] == expected['emoji_count'], text
+
+
+@pytest.mark.parametrize('pattern', [r'telegram.*@\w+', r'whatsapp.*\+\d+'])
+def test_line_pair_scanner_matches_re(pattern):
+    scanner = compile_pattern(pattern, re.IGNORECASE)
+    assert isinstance(scanner, LinePairScanner)
+    rng = random.Random(3)
+    for _ in range(500):
+        text = ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 30)))
+        assert scanner.findall(text) == re.findall(pattern, text, re.IGNORECASE), text
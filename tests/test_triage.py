@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from fraud_detector import FraudDetector
+
+PIECES = ['guaranteed returns', 'act now', 'limited spots', 'telegram @admin', 'whatsapp +919876543210',
+          'risk-free', 'deepfake', '95% success', '₹5 lakh', '500% return', 'AMAZING PROFIT', '🚀',
+          'careful', 'scam warning', 'plain words', 'market update', '\n', ' ', 'x']
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return FraudDetector(reload_interval=3600)
+
+
+def test_triage_recommendation_matches_full_analysis(detector):
+    rng = random.Random(9)
+    stopped_early = 0
+    for _ in range(500):
+        text = ' '.join(rng.choice(PIECES) for _ in range(rng.randint(10, 120)))
+        full = detector.analyze_content(text, time_budget=3600)
+        triage = detector.analyze_content(text, mode='triage', time_budget=3600)
+        assert triage['recommendation'] == full['recommendation'], text
+        if triage['truncated']:
+            stopped_early += 1
+        else:
+            assert triage['risk_score'] == full['risk_score']
+    assert stopped_early
+
+
+def test_short_text_is_analyzed_in_full(detector):
+    text = 'guaranteed returns, act now'
+    assert len(text) < detector.TRIAGE_MIN_LENGTH
+    assert detector.analyze_content(text, mode='triage') == detector.analyze_content(text)
+
+
+def test_unknown_mode_is_rejected(detector):
+    with pytest.raises(ValueError):
+        detector.analyze_content('text', mode='fast')